@@ -9,12 +9,19 @@ from methods.wallets import generate_keypair, verify_signature
 
 node_address = "http://localhost:8000"
 
-# Get nonce from the server
-def get_nonce(wallet_address: str):
+# Re-poll the nonces every this many transactions
+NONCE_POLL_INTERVAL = 100
+
+# Get the nonces of several wallets from the server
+def get_nonces(wallet_addresses: list, since: dict = None):
     """
-    Get the nonce from the server.
+    Get the nonces of several wallets from the server in a single request.
+    With since (the data of a previous call), only the nonces changed after it are returned.
     """
-    response = requests.post(f"{node_address}/api/v1/blockchain_investigation/wallets/nonce/", json={"public_key": wallet_address})
+    query = {"public_keys": wallet_addresses}
+    if since is not None:
+        query.update(since_version=since["version"], epoch=since["epoch"])
+    response = requests.post(f"{node_address}/api/v1/blockchain_investigation/wallets/nonces/", json=query)
     return response.json()["data"]
 
 # Load private and public keys from the keypair file (or generate a new keypair)
@@ -60,8 +67,17 @@ def main():
     recipient = sebastian_keypair["public_key"]
     amount = 1000
 
+    # The nonce is tracked locally and only re-polled from time to time, with the changes since the last poll
+    nonces = get_nonces([sender])
+    nonce = nonces["wallets"].get(sender, 0)
+    sent = 0
+
     while True:
-        nonce = get_nonce(sender) + 1
+        if sent and sent % NONCE_POLL_INTERVAL == 0:
+            nonces = get_nonces([sender], since=nonces)
+            nonce = max(nonce, nonces["wallets"].get(sender, 0))
+        nonce += 1
+        sent += 1
 
         transaction = ClientTransaction(sender, recipient, amount, nonce, genesis_keypair["private_key"])
         transaction.sign_transaction()
@@ -1,13 +1,25 @@
 from app.api.models.blockchain import DAG
+from app.api.methods.engine import DAGEngine
 
 # Instantiating the blockchain
 dag = DAG() # type: ignore
 dag.load_graph_from_json_file(dag.json_file_path)
 
+# Instantiating the single writer of the blockchain: routes send it their changes and read its snapshots
+engine = DAGEngine(dag)
+
 def get_blockchain():
     return dag
 
+def get_engine():
+    return engine
+
 def reset_blockchain():
-    global dag
+    global dag, engine
+    engine.stop()
+    if dag.block_log is not None:
+        dag.block_log.close()
+    dag.accounts.close()
     dag = DAG() # type: ignore
-    dag.load_graph_from_json_file(dag.json_file_path)
\ No newline at end of file
+    dag.load_graph_from_json_file(dag.json_file_path)
+    engine = DAGEngine(dag)
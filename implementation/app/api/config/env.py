@@ -30,4 +30,68 @@ MQTT_BROKER_PASSWORD = os.getenv('MQTT_BROKER_PASSWORD')
 GENESIS_PUBLIC_KEY = os.getenv('GENESIS_PUBLIC_KEY')
 
 # SEBASTIAN configuration
-SEBASTIAN_PUBLIC_KEY = os.getenv('SEBASTIAN_PUBLIC_KEY')
\ No newline at end of file
+SEBASTIAN_PUBLIC_KEY = os.getenv('SEBASTIAN_PUBLIC_KEY')
+
+# Signature verification configuration
+SIGNATURE_CACHE_SIZE = int(os.getenv('SIGNATURE_CACHE_SIZE', 100000)) # Verification results kept in the LRU cache
+PUBLIC_KEY_CACHE_SIZE = int(os.getenv('PUBLIC_KEY_CACHE_SIZE', 10000)) # Decoded public keys kept in memory
+SIGNATURE_WORKERS = int(os.getenv('SIGNATURE_WORKERS', os.cpu_count() or 1)) # Processes used for batch verification
+SIGNATURE_BATCH_THRESHOLD = int(os.getenv('SIGNATURE_BATCH_THRESHOLD', 32)) # Smaller batches are verified in process
+
+# Block log configuration
+BLOCK_LOG_PATH = os.getenv('BLOCK_LOG_PATH', 'app/api/shared/blocklog') # Directory of the block log segments
+BLOCK_LOG_SEGMENT_MB = int(os.getenv('BLOCK_LOG_SEGMENT_MB', 64)) # Size at which a new segment is started
+BLOCK_LOG_GROUP_COMMIT_MS = int(os.getenv('BLOCK_LOG_GROUP_COMMIT_MS', 50)) # Interval between group fsyncs
+BLOCK_LOG_COMPACTION_INTERVAL_S = int(os.getenv('BLOCK_LOG_COMPACTION_INTERVAL_S', 600)) # Interval between background compactions
+
+# Checkpoints configuration
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'app/api/shared/checkpoints') # Directory of the state checkpoints
+CHECKPOINT_INTERVAL_BLOCKS = int(os.getenv('CHECKPOINT_INTERVAL_BLOCKS', 1000)) # Confirmed blocks between checkpoints
+CHECKPOINT_RETAIN = int(os.getenv('CHECKPOINT_RETAIN', 3)) # Checkpoints kept on disk
+
+# Outbox configuration
+OUTBOX_PATH = os.getenv('OUTBOX_PATH', 'app/api/shared/outbox.sqlite3') # Database of the pending deliveries to neighbors
+OUTBOX_CONCURRENCY = int(os.getenv('OUTBOX_CONCURRENCY', 8)) # Deliveries in flight at the same time (at most one per neighbor)
+OUTBOX_TIMEOUT_S = float(os.getenv('OUTBOX_TIMEOUT_S', 5)) # Timeout of each delivery
+OUTBOX_MAX_BACKOFF_S = float(os.getenv('OUTBOX_MAX_BACKOFF_S', 300)) # Upper bound of the retry backoff
+OUTBOX_CIRCUIT_FAILURES = int(os.getenv('OUTBOX_CIRCUIT_FAILURES', 5)) # Consecutive failures that open the circuit of a neighbor
+OUTBOX_CIRCUIT_COOLDOWN_S = float(os.getenv('OUTBOX_CIRCUIT_COOLDOWN_S', 60)) # Time a neighbor circuit stays open
+OUTBOX_MAX_PENDING_PER_PEER = int(os.getenv('OUTBOX_MAX_PENDING_PER_PEER', 10000)) # Older deliveries are dropped beyond this
+
+# Transaction gossip configuration
+GOSSIP_BATCH_MAX_TRANSACTIONS = int(os.getenv('GOSSIP_BATCH_MAX_TRANSACTIONS', 256)) # Transactions that flush a neighbor batch
+GOSSIP_BATCH_MAX_KB = int(os.getenv('GOSSIP_BATCH_MAX_KB', 512)) # Size that flushes a neighbor batch
+GOSSIP_BATCH_WINDOW_MS = int(os.getenv('GOSSIP_BATCH_WINDOW_MS', 50)) # Time a transaction waits for others before being flushed
+
+# Gossip deduplication configuration
+SEEN_CACHE_SIZE = int(os.getenv('SEEN_CACHE_SIZE', 200000)) # Transaction and block ids remembered, each
+SEEN_CACHE_TTL_S = float(os.getenv('SEEN_CACHE_TTL_S', 600)) # Time an id is remembered
+
+# Synchronization configuration
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', 500)) # Blocks fetched per request while syncing
+SYNC_BLOOM_ERROR_RATE = float(os.getenv('SYNC_BLOOM_ERROR_RATE', 0.01)) # False positive rate of the known blocks summary
+SYNC_TIMEOUT_S = float(os.getenv('SYNC_TIMEOUT_S', 30)) # Timeout of each sync request
+SYNC_BLOOM_MAX_KB = int(os.getenv('SYNC_BLOOM_MAX_KB', 16384)) # Largest known blocks summary accepted from a neighbor
+
+# Wallet queries configuration
+WALLETS_BULK_LIMIT = int(os.getenv('WALLETS_BULK_LIMIT', 1000)) # Accounts per bulk balance or nonce query
+
+# Account state configuration
+ACCOUNT_STATE_BACKEND = os.getenv('ACCOUNT_STATE_BACKEND', 'memory') # Where balances and nonces are kept: memory or sqlite (bounded memory)
+ACCOUNT_STATE_PATH = os.getenv('ACCOUNT_STATE_PATH', 'app/api/shared/accounts.sqlite3') # Database of the sqlite account state
+ACCOUNT_CACHE_SIZE = int(os.getenv('ACCOUNT_CACHE_SIZE', 100000)) # Hot accounts kept in memory by the sqlite account state
+
+# Key registry configuration
+KEY_REGISTRY_PATH = os.getenv('KEY_REGISTRY_PATH', 'app/api/shared/keys.sqlite3') # Database of the public keys by address
+
+# Ingestion pipeline configuration
+INGESTION_QUEUE_SIZE = int(os.getenv('INGESTION_QUEUE_SIZE', 4096)) # Transactions waiting for each stage, new ones are refused (503) beyond this
+INGESTION_BATCH_SIZE = int(os.getenv('INGESTION_BATCH_SIZE', 256)) # Transactions verified and admitted at once
+INGESTION_MAX_PENDING_PER_SENDER = int(os.getenv('INGESTION_MAX_PENDING_PER_SENDER', 1024)) # Transactions of a sender in flight, new ones are refused (429) beyond this
+INGESTION_TIMEOUT_S = float(os.getenv('INGESTION_TIMEOUT_S', 10)) # Time a request waits for its transactions to be processed
+INGESTION_RETRY_AFTER_S = int(os.getenv('INGESTION_RETRY_AFTER_S', 1)) # Retry-After sent with the refusals
+
+# Pending (future nonce) transactions configuration
+PENDING_MAX_PER_SENDER = int(os.getenv('PENDING_MAX_PER_SENDER', 512)) # Transactions a sender can send ahead of its next nonce, also the largest nonce gap accepted
+PENDING_MAX_TRANSACTIONS = int(os.getenv('PENDING_MAX_TRANSACTIONS', 65536)) # Transactions waiting for their nonce, the oldest are dropped beyond this
+PENDING_TTL_S = float(os.getenv('PENDING_TTL_S', 300)) # Time a transaction waits for the transactions filling its nonce gap
@@ -0,0 +1,20 @@
+from typing import List
+
+from app.api.methods.ingestion import IngestionPipeline
+
+from app.api.models.blockchain import DAG
+
+from app.api.config.dag import get_engine
+from app.api.config.env import INGESTION_QUEUE_SIZE, INGESTION_BATCH_SIZE, INGESTION_MAX_PENDING_PER_SENDER
+from app.api.config.env import INGESTION_TIMEOUT_S, INGESTION_RETRY_AFTER_S
+
+def admit_transactions(transactions: List) -> List:
+    return get_engine().execute(DAG.admit_transactions, transactions)
+
+# Instantiating the ingestion pipeline of the received transactions, started with the API
+ingestion = IngestionPipeline(admit_transactions,
+                              queue_size=INGESTION_QUEUE_SIZE,
+                              batch_size=INGESTION_BATCH_SIZE,
+                              max_pending_per_sender=INGESTION_MAX_PENDING_PER_SENDER,
+                              timeout=INGESTION_TIMEOUT_S,
+                              retry_after=INGESTION_RETRY_AFTER_S)
@@ -0,0 +1,6 @@
+from app.api.methods.keys import KeyRegistry
+
+from app.api.config.env import KEY_REGISTRY_PATH, PUBLIC_KEY_CACHE_SIZE
+
+# Instantiating the registry of the full public keys, by address (its database is opened on first use)
+key_registry = KeyRegistry(KEY_REGISTRY_PATH, PUBLIC_KEY_CACHE_SIZE)
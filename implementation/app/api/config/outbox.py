@@ -0,0 +1,29 @@
+from typing import List
+
+from app.api.methods.batcher import TransactionBatcher
+from app.api.methods.codec import encode_transaction_batch
+from app.api.methods.gossip import TRANSACTION_BATCH_PATH, announce_and_post
+from app.api.methods.outbox import Outbox
+
+from app.api.config.env import OUTBOX_PATH, OUTBOX_CONCURRENCY, OUTBOX_TIMEOUT_S, OUTBOX_MAX_BACKOFF_S
+from app.api.config.env import OUTBOX_CIRCUIT_FAILURES, OUTBOX_CIRCUIT_COOLDOWN_S, OUTBOX_MAX_PENDING_PER_PEER
+from app.api.config.env import GOSSIP_BATCH_MAX_TRANSACTIONS, GOSSIP_BATCH_MAX_KB, GOSSIP_BATCH_WINDOW_MS
+
+# Instantiating the outbox of deliveries to the neighbors, started with the API.
+# Deliveries announce their ids first, so neighbors only receive the bodies they lack
+outbox = Outbox(OUTBOX_PATH, announce_and_post,
+                concurrency=OUTBOX_CONCURRENCY,
+                timeout=OUTBOX_TIMEOUT_S,
+                max_backoff=OUTBOX_MAX_BACKOFF_S,
+                circuit_failures=OUTBOX_CIRCUIT_FAILURES,
+                circuit_cooldown=OUTBOX_CIRCUIT_COOLDOWN_S,
+                max_pending_per_peer=OUTBOX_MAX_PENDING_PER_PEER)
+
+def enqueue_transaction_batch(peer: str, payloads: List[bytes]) -> None:
+    outbox.enqueue(peer, TRANSACTION_BATCH_PATH, encode_transaction_batch(payloads))
+
+# Instantiating the batcher of the transactions gossiped to the neighbors
+transaction_batcher = TransactionBatcher(enqueue_transaction_batch,
+                                         max_count=GOSSIP_BATCH_MAX_TRANSACTIONS,
+                                         max_bytes=GOSSIP_BATCH_MAX_KB * 1024,
+                                         window=GOSSIP_BATCH_WINDOW_MS / 1000)
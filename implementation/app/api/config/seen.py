@@ -0,0 +1,7 @@
+from app.api.methods.seen import SeenCache
+
+from app.api.config.env import SEEN_CACHE_SIZE, SEEN_CACHE_TTL_S
+
+# Instantiating the ids of the transactions and blocks already seen by the node
+seen_transactions = SeenCache(SEEN_CACHE_SIZE, SEEN_CACHE_TTL_S)
+seen_blocks = SeenCache(SEEN_CACHE_SIZE, SEEN_CACHE_TTL_S)
@@ -0,0 +1,501 @@
+# methods/accounts.py
+
+import json
+import os
+import sqlite3
+import threading
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Optional, Set, Tuple
+from urllib.parse import quote
+
+class AccountState(ABC):
+    """
+    Balances and nonces of the wallets by address, behind a backend independent interface.
+
+    Balances are integers in the decimal places of the DAG. An account without a balance
+    is unknown (it never received anything), an account without a nonce never sent anything.
+    Writes are staged and made durable, as one batch, by commit().
+
+    Two nonces are kept per account. The applied nonce comes from the confirmed blocks and
+    is stored (and checkpointed) with the balances. The admitted nonce comes from the
+    transactions admitted to the mempool and the blocks accepted but not applied yet; it is
+    only kept in memory, as those transactions and blocks are rebuilt on restart. The nonce
+    of an account is the greater of both.
+
+    Args:
+    - persistent: bool (the state survives restarts and is its own checkpoint)
+    - sequence: int (block log position of the last commit, -1 if none)
+    - unapplied_blocks: Set[str] (confirmed blocks that could not be applied, as of the last commit)
+    - admitted_nonces: Dict[str, int] (admitted nonces ahead of the applied ones)
+    """
+    persistent = False
+
+    def __init__(self) -> None:
+        self.sequence = -1
+        self.unapplied_blocks: Set[str] = set()
+        self.admitted_nonces: Dict[str, int] = {}
+
+    # Reads
+
+    @abstractmethod
+    def balance(self, account: str) -> Optional[int]:
+        """
+        Get the balance of an account.
+        """
+
+    @abstractmethod
+    def applied_nonce(self, account: str) -> Optional[int]:
+        """
+        Get the nonce of the last transaction of an account applied from a confirmed block.
+        """
+
+    def nonce(self, account: str) -> Optional[int]:
+        """
+        Get the nonce of the last transaction of an account admitted, accepted in a block or applied.
+        """
+        applied = self.applied_nonce(account)
+        admitted = self.admitted_nonces.get(account)
+        if admitted is None or (applied is not None and applied >= admitted):
+            return applied
+        return admitted
+
+    @abstractmethod
+    def export(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Get every balance and applied nonce, for a checkpoint.
+        """
+
+    @abstractmethod
+    def view_balances(self) -> Mapping[str, int]:
+        """
+        Get the balances for a snapshot: a frozen copy, or a live view for states too large to copy.
+        """
+
+    @abstractmethod
+    def view_nonces(self) -> Mapping[str, int]:
+        """
+        Get the nonces (see nonce) for a snapshot: a frozen copy, or a live view for states too large to copy.
+        """
+
+    # Writes
+
+    @abstractmethod
+    def set_balances(self, balances: Dict[str, int]) -> None:
+        """
+        Set the balances of several accounts.
+        """
+
+    @abstractmethod
+    def set_nonce(self, account: str, nonce: int) -> None:
+        """
+        Set the applied nonce of an account.
+        """
+
+    def set_nonces(self, nonces: Dict[str, int]) -> None:
+        for account, nonce in nonces.items():
+            self.set_nonce(account, nonce)
+
+    def advance_nonce(self, account: str, nonce: int) -> None:
+        """
+        Record the nonce of a transaction admitted to the mempool or accepted in a block.
+        Nonces only move forward.
+        """
+        current = self.nonce(account)
+        if current is None or nonce > current:
+            self.admitted_nonces[account] = nonce
+
+    def settle_nonces(self, nonces: Dict[str, int]) -> None:
+        """
+        Forget the admitted nonces caught up by the applied nonces.
+        """
+        for account, nonce in nonces.items():
+            if self.admitted_nonces.get(account, nonce + 1) <= nonce:
+                del self.admitted_nonces[account]
+
+    def apply_transactions(self, transactions: Iterable) -> bool:
+        """
+        Apply the transfers and nonces of a list of transactions, all or nothing.
+        Returns False, leaving the state untouched, if a sender runs out of funds.
+        """
+        overlay = AccountOverlay(self)
+        for tx in transactions:
+            if not overlay.transfer(tx.sender_address, tx.recipient_address, tx.amount):
+                overlay.rollback()
+                return False # Insufficient funds
+            overlay.advance_nonce(tx.sender_address, tx.nonce)
+        overlay.commit()
+        return True
+
+    def commit(self, sequence: int, unapplied_blocks: Set[str]) -> None:
+        """
+        Make the staged writes durable, as the state after the block log position sequence.
+        """
+        self.sequence = sequence
+        self.unapplied_blocks = set(unapplied_blocks)
+
+    @abstractmethod
+    def reset(self, balances: Dict[str, int], nonces: Dict[str, int], sequence: int = -1) -> None:
+        """
+        Replace the whole state, with the state at the block log position sequence (applied nonces).
+        The admitted nonces are dropped.
+        """
+
+    def close(self) -> None:
+        pass
+
+class AccountOverlay:
+    """
+    Copy on write overlay of an account state, for changes applied all or nothing.
+
+    Reads fall through to the state (applied nonces) for the accounts not written yet. Writes are kept in the
+    overlay until commit() writes them to the state as one batch, or rollback() drops them,
+    so the cost depends on the accounts written and not on the size of the state.
+
+    Args:
+    - state: AccountState
+    """
+    __slots__ = ('state', 'balances', 'nonces')
+
+    def __init__(self, state: AccountState) -> None:
+        self.state = state
+        self.balances: Dict[str, int] = {}
+        self.nonces: Dict[str, int] = {}
+
+    def balance(self, account: str) -> Optional[int]:
+        return self.balances[account] if account in self.balances else self.state.balance(account)
+
+    def nonce(self, account: str) -> Optional[int]:
+        return self.nonces[account] if account in self.nonces else self.state.applied_nonce(account)
+
+    def transfer(self, sender: str, recipient: str, amount: int) -> bool:
+        """
+        Move an amount between two accounts. Returns False, changing nothing, if the sender runs out of funds.
+        """
+        sender_balance = self.balance(sender) or 0
+        if sender_balance < amount:
+            return False
+        self.balances[sender] = sender_balance - amount
+        self.balances[recipient] = (self.balance(recipient) or 0) + amount
+        return True
+
+    def advance_nonce(self, account: str, nonce: int) -> None:
+        current = self.nonce(account)
+        if current is None or nonce > current:
+            self.nonces[account] = nonce
+
+    def commit(self) -> None:
+        """
+        Write the changes to the state (staged there until the state itself is committed).
+        """
+        if self.balances:
+            self.state.set_balances(self.balances)
+        if self.nonces:
+            self.state.set_nonces(self.nonces)
+            self.state.settle_nonces(self.nonces)
+        self.rollback()
+
+    def rollback(self) -> None:
+        """
+        Drop the changes.
+        """
+        self.balances = {}
+        self.nonces = {}
+
+class MemoryAccountState(AccountState):
+    """
+    Account state kept in two dicts. The whole state must fit in memory.
+
+    Args:
+    - balances: Dict[str, int]
+    - nonces: Dict[str, int]
+    """
+
+    def __init__(self, balances: Optional[Dict[str, int]] = None, nonces: Optional[Dict[str, int]] = None) -> None:
+        super().__init__()
+        self.balances: Dict[str, int] = dict(balances or {})
+        self.nonces: Dict[str, int] = dict(nonces or {})
+
+    def balance(self, account: str) -> Optional[int]:
+        return self.balances.get(account)
+
+    def applied_nonce(self, account: str) -> Optional[int]:
+        return self.nonces.get(account)
+
+    def export(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        return self.balances, self.nonces
+
+    def view_balances(self) -> Mapping[str, int]:
+        return dict(self.balances)
+
+    def view_nonces(self) -> Mapping[str, int]:
+        nonces = dict(self.nonces)
+        for account in self.admitted_nonces:
+            nonces[account] = self.nonce(account) # type: ignore
+        return nonces
+
+    def set_balances(self, balances: Dict[str, int]) -> None:
+        self.balances.update(balances)
+
+    def set_nonce(self, account: str, nonce: int) -> None:
+        self.nonces[account] = nonce
+
+    def set_nonces(self, nonces: Dict[str, int]) -> None:
+        self.nonces.update(nonces)
+
+    def reset(self, balances: Dict[str, int], nonces: Dict[str, int], sequence: int = -1) -> None:
+        self.balances = dict(balances)
+        self.nonces = dict(nonces)
+        self.admitted_nonces = {}
+        self.sequence = sequence
+        self.unapplied_blocks = set()
+
+class SQLiteAccountState(AccountState):
+    """
+    Account state stored in SQLite (WAL mode), for account sets larger than the memory.
+
+    Recently used accounts are kept in an LRU cache of cache_size entries. Writes are staged
+    in memory and written in a single transaction by commit(), once per confirming block,
+    together with the block log position they correspond to, so the stored state is always
+    the state after a known block and the node restarts from it instead of a checkpoint.
+
+    Args:
+    - path: str
+    - cache_size: int
+    """
+    persistent = True
+
+    def __init__(self, path: str, cache_size: int = 100000) -> None:
+        super().__init__()
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict() # account -> (balance, nonce)
+        self._staged: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        self._staged_new: Set[str] = set()
+        self._lock = threading.RLock()
+        self.path = path
+        # Connections of the snapshot readers, one per thread, which never take the state lock
+        self._readers = threading.local()
+        self._reader_connections: list = []
+        self._readers_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                address TEXT PRIMARY KEY,
+                balance INTEGER,
+                nonce INTEGER
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        meta = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+        self.sequence = int(meta.get("sequence", -1))
+        self.unapplied_blocks = set(json.loads(meta.get("unapplied_blocks", "[]")))
+
+    # Reads
+
+    def _get(self, account: str) -> Tuple[Optional[int], Optional[int]]:
+        with self._lock:
+            if account in self._staged:
+                return self._staged[account]
+            if account in self._cache:
+                self._cache.move_to_end(account)
+                return self._cache[account]
+            row = self._db.execute("SELECT balance, nonce FROM accounts WHERE address = ?", (account,)).fetchone()
+            values = (row[0], row[1]) if row is not None else (None, None)
+            self._cache[account] = values
+            self._evict()
+            return values
+
+    def _evict(self) -> None:
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def balance(self, account: str) -> Optional[int]:
+        return self._get(account)[0]
+
+    def applied_nonce(self, account: str) -> Optional[int]:
+        return self._get(account)[1]
+
+    def accounts(self) -> Iterator[str]:
+        with self._lock:
+            stored = [row[0] for row in self._db.execute("SELECT address FROM accounts")]
+            staged = list(self._staged_new)
+        return iter(stored + staged)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] + len(self._staged_new)
+
+    def export(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        balances: Dict[str, int] = {}
+        nonces: Dict[str, int] = {}
+        for account in self.accounts():
+            balance, nonce = self._get(account)
+            if balance is not None:
+                balances[account] = balance
+            if nonce is not None:
+                nonces[account] = nonce
+        return balances, nonces
+
+    def view_balances(self) -> Mapping[str, int]:
+        return AccountsView(self, self.committed_balance)
+
+    def view_nonces(self) -> Mapping[str, int]:
+        return AccountsView(self, self.committed_nonce)
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Get the read connection of the current thread, opening it on first use.
+        """
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True, check_same_thread=False, isolation_level=None)
+            with self._readers_lock:
+                self._reader_connections.append(connection)
+            self._readers.connection = connection
+        return connection
+
+    def read_committed(self, account: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Read the committed balance and applied nonce of an account, for the snapshot readers.
+
+        Reads go through a connection of the reading thread (WAL readers do not block the
+        writer, nor wait for it), not through the state lock, the cache or the staged writes.
+        """
+        row = self._reader().execute("SELECT balance, nonce FROM accounts WHERE address = ?", (account,)).fetchone()
+        return (row[0], row[1]) if row is not None else (None, None)
+
+    def committed_balance(self, account: str) -> Optional[int]:
+        return self.read_committed(account)[0]
+
+    def committed_nonce(self, account: str) -> Optional[int]:
+        """
+        Get the nonce of an account (see nonce) from its committed applied nonce, for the snapshot readers.
+        """
+        applied = self.read_committed(account)[1]
+        admitted = self.admitted_nonces.get(account)
+        if admitted is None or (applied is not None and applied >= admitted):
+            return applied
+        return admitted
+
+    def committed_accounts(self) -> Iterator[str]:
+        """
+        Iterate the committed accounts, for the snapshot readers.
+        """
+        return (row[0] for row in self._reader().execute("SELECT address FROM accounts").fetchall())
+
+    # Writes
+
+    def _stage(self, account: str, balance: Optional[int], nonce: Optional[int]) -> None:
+        if account not in self._staged and self._get(account) == (None, None):
+            self._staged_new.add(account)
+        self._staged[account] = (balance, nonce)
+
+    def set_balances(self, balances: Dict[str, int]) -> None:
+        with self._lock:
+            for account, balance in balances.items():
+                self._stage(account, balance, self._get(account)[1])
+
+    def set_nonce(self, account: str, nonce: int) -> None:
+        with self._lock:
+            self._stage(account, self._get(account)[0], nonce)
+
+    def set_nonces(self, nonces: Dict[str, int]) -> None:
+        with self._lock:
+            for account, nonce in nonces.items():
+                self._stage(account, self._get(account)[0], nonce)
+
+    def commit(self, sequence: int, unapplied_blocks: Set[str]) -> None:
+        with self._lock:
+            rows = [(account, balance, nonce) for account, (balance, nonce) in self._staged.items()]
+            meta = [("sequence", str(sequence))]
+            if unapplied_blocks != self.unapplied_blocks:
+                meta.append(("unapplied_blocks", json.dumps(sorted(unapplied_blocks))))
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("""
+                    INSERT INTO accounts (address, balance, nonce) VALUES (?, ?, ?)
+                    ON CONFLICT (address) DO UPDATE SET balance = excluded.balance, nonce = excluded.nonce
+                """, rows)
+                self._db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", meta)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._cache.update(self._staged)
+            self._evict()
+            self._staged.clear()
+            self._staged_new.clear()
+            super().commit(sequence, unapplied_blocks)
+
+    def reset(self, balances: Dict[str, int], nonces: Dict[str, int], sequence: int = -1) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM accounts")
+                self._db.execute("DELETE FROM meta")
+                self._db.executemany("INSERT INTO accounts (address, balance, nonce) VALUES (?, ?, ?)", [
+                    (account, balances.get(account), nonces.get(account))
+                    for account in set(balances) | set(nonces)
+                ])
+                self._db.execute("INSERT INTO meta (name, value) VALUES ('sequence', ?)", (str(sequence),))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._cache.clear()
+            self._staged.clear()
+            self._staged_new.clear()
+            self.admitted_nonces = {}
+            self.sequence = sequence
+            self.unapplied_blocks = set()
+
+    def close(self) -> None:
+        """
+        Close the database. Writes staged since the last commit are dropped: they belong to
+        blocks after the committed position, which are replayed from the block log.
+        """
+        with self._lock:
+            self._db.close()
+        with self._readers_lock:
+            for connection in self._reader_connections:
+                connection.close()
+            self._reader_connections = []
+
+class AccountsView(Mapping):
+    """
+    Live, read only mapping of the committed balances or nonces (value) of a SQLite account state.
+    """
+    __slots__ = ('_state', '_value')
+
+    def __init__(self, state: SQLiteAccountState, value: Callable[[str], Optional[int]]) -> None:
+        self._state = state
+        self._value = value
+
+    def __getitem__(self, account: str) -> int:
+        value = self._value(account)
+        if value is None:
+            raise KeyError(account)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (account for account in self._state.committed_accounts() if account in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+def open_account_state(backend: str, path: str, cache_size: int) -> AccountState:
+    """
+    Open the account state of a backend: memory or sqlite.
+    """
+    if backend == "memory":
+        return MemoryAccountState()
+    if backend == "sqlite":
+        return SQLiteAccountState(path, cache_size)
+    raise ValueError(f"Unknown account state backend {backend}.")
@@ -0,0 +1,108 @@
+# methods/batcher.py
+
+import threading
+import time
+
+from typing import Callable, Dict, List, Optional
+
+from app.api.config.logger import logger
+
+class PeerBatch:
+    """
+    Transactions waiting to be sent to a neighbor.
+    """
+
+    def __init__(self) -> None:
+        self.payloads: List[bytes] = []
+        self.size = 0
+        self.opened_at = 0.0
+
+class TransactionBatcher:
+    """
+    Coalesce the transactions gossiped to each neighbor into batches.
+
+    A neighbor batch is flushed when it holds max_count transactions, when it reaches
+    max_bytes, or window seconds after its first transaction, whichever comes first.
+    Flushing hands the batch to the flush callback (normally the outbox), so it never
+    blocks on the network.
+
+    Args:
+    - flush: Callable[[str, List[bytes]], None]
+    - max_count: int
+    - max_bytes: int
+    - window: float
+    """
+
+    def __init__(self, flush: Callable[[str, List[bytes]], None], max_count: int = 256, max_bytes: int = 512 * 1024, window: float = 0.05) -> None:
+        self.flush = flush
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.window = window
+
+        self.batches: Dict[str, PeerBatch] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, peer: str, payload: bytes) -> None:
+        """
+        Add an encoded transaction to the batch of a neighbor, flushing it if it is full.
+        """
+        with self._lock:
+            batch = self.batches.setdefault(peer, PeerBatch())
+            if not batch.payloads:
+                batch.opened_at = time.monotonic()
+            batch.payloads.append(payload)
+            batch.size += len(payload)
+            full = len(batch.payloads) >= self.max_count or batch.size >= self.max_bytes
+            payloads = self._take(peer) if full else None
+        if payloads:
+            self._flush(peer, payloads)
+
+    def _take(self, peer: str) -> List[bytes]:
+        batch = self.batches.pop(peer)
+        return batch.payloads
+
+    def _flush(self, peer: str, payloads: List[bytes]) -> None:
+        try:
+            self.flush(peer, payloads)
+        except Exception as e:
+            logger.error(f"Batcher: could not flush {len(payloads)} transactions to {peer}: {e}")
+
+    def flush_due(self, force: bool = False) -> None:
+        """
+        Flush the batches whose window elapsed (or all of them if force).
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [peer for peer, batch in self.batches.items() if force or now - batch.opened_at >= self.window]
+            taken = [(peer, self._take(peer)) for peer in due]
+        for peer, payloads in taken:
+            self._flush(peer, payloads)
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """
+        Start the thread flushing the batches when their window elapses.
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._background, name="tx-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and flush what is left.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush_due(force=True)
+
+    def _background(self) -> None:
+        # Waking at half the window keeps the added latency below 1.5 windows
+        while not self._stopped.wait(self.window / 2):
+            self.flush_due()
@@ -0,0 +1,243 @@
+# methods/block_log.py
+
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+from bisect import bisect_right
+from hashlib import sha256
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from app.api.config.logger import logger
+
+# Record header: sequence number, payload length and crc32 of (sequence, length, payload)
+RECORD_HEADER = struct.Struct('<QII')
+SEGMENT_NAME = re.compile(r'^segment-(\d{16})\.log$')
+
+class BlockLog:
+    """
+    Segmented, append-only log of blocks.
+
+    Every record carries a sequence number and a checksum. Appends are flushed to the OS right
+    away and fsync'ed in groups by a background thread every group_commit_interval seconds, so
+    many appends share one fsync. A torn or corrupted tail left by a crash is truncated when the
+    log is opened. Each process writes to a new segment, and small sealed segments are merged by
+    the background thread (dropping duplicated and corrupted records).
+
+    Args:
+    - path: str
+    - segment_size: int
+    - group_commit_interval: float
+    - compaction_interval: float
+    """
+
+    def __init__(self, path: str, segment_size: int = 64 * 1024 * 1024, group_commit_interval: float = 0.05, compaction_interval: float = 600) -> None:
+        self.path = path
+        self.segment_size = segment_size
+        self.group_commit_interval = group_commit_interval
+        self.compaction_interval = compaction_interval
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._closed = threading.Event()
+
+        os.makedirs(self.path, exist_ok=True)
+        self.next_sequence = self._recover()
+        self._active_first_sequence = self.next_sequence
+        self._active = self._open_segment(self.next_sequence)
+
+        self._thread = threading.Thread(target=self._background, name="block-log", daemon=True)
+        self._thread.start()
+
+    # Segments
+
+    def _segment_path(self, first_sequence: int) -> str:
+        return os.path.join(self.path, f"segment-{first_sequence:016d}.log")
+
+    def segments(self) -> List[int]:
+        """
+        Get the first sequence number of every segment, in order.
+        """
+        names = (SEGMENT_NAME.match(name) for name in os.listdir(self.path))
+        return sorted(int(match.group(1)) for match in names if match)
+
+    def _open_segment(self, first_sequence: int):
+        return open(self._segment_path(first_sequence), 'ab')
+
+    def _recover(self) -> int:
+        """
+        Check the newest segment, truncate a torn or corrupted tail and return the next sequence number.
+        """
+        segments = self.segments()
+        if not segments:
+            return 0
+
+        path = self._segment_path(segments[-1])
+        last_sequence, valid_size = segments[-1] - 1, 0
+        with open(path, 'rb') as file:
+            for sequence, _, end in self._scan(file):
+                last_sequence, valid_size = sequence, end
+        if valid_size < os.path.getsize(path):
+            logger.warning(f"Block log: truncating corrupted tail of {path} at byte {valid_size}.")
+            with open(path, 'r+b') as file:
+                file.truncate(valid_size)
+                file.flush()
+                os.fsync(file.fileno())
+        return last_sequence + 1
+
+    @staticmethod
+    def _scan(file: BinaryIO) -> Iterator[Tuple[int, bytes, int]]:
+        """
+        Iterate the valid records of an open segment as (sequence, payload, end offset), stopping at the first invalid one.
+        """
+        offset = 0
+        while True:
+            header = file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            sequence, length, checksum = RECORD_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload, zlib.crc32(header[:12])) != checksum:
+                return
+            offset += RECORD_HEADER.size + length
+            yield sequence, payload, offset
+
+    # Writing
+
+    def append(self, payload: bytes) -> int:
+        """
+        Append a record and return its sequence number. The record is durable after the next group commit.
+        """
+        with self._lock:
+            sequence = self.next_sequence
+            header = struct.pack('<QI', sequence, len(payload))
+            checksum = zlib.crc32(payload, zlib.crc32(header))
+            self._active.write(header + struct.pack('<I', checksum) + payload)
+            self._active.flush()
+            self.next_sequence += 1
+            self._dirty = True
+
+            if self._active.tell() >= self.segment_size:
+                self._roll()
+            return sequence
+
+    def sync(self) -> None:
+        """
+        Force the pending appends to disk.
+        """
+        with self._lock:
+            if self._dirty and not self._active.closed:
+                os.fsync(self._active.fileno())
+                self._dirty = False
+
+    def _roll(self) -> None:
+        self.sync()
+        self._active.close()
+        self._active_first_sequence = self.next_sequence
+        self._active = self._open_segment(self.next_sequence)
+
+    def close(self) -> None:
+        """
+        Stop the background thread and close the log, syncing the pending appends.
+        """
+        self._closed.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            self.sync()
+            self._active.close()
+
+    # Reading
+
+    def read(self, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        Iterate (sequence, payload) records with a sequence number greater than or equal to start.
+
+        Segments are listed and opened under the lock, one at a time, so a compaction swaps them
+        either before or after a segment is opened. The next segment is the one holding start:
+        after a compaction merged the rest of the segment being read into it, that is the merged
+        segment again (a new file under the same name), read from start on.
+        """
+        current: Optional[Tuple[int, int]] = None # (first sequence, inode) of the segment read last
+        while True:
+            with self._lock:
+                self._active.flush()
+                segments = self.segments()
+                index = max(0, bisect_right(segments, start) - 1)
+                if current is not None and index < len(segments) and segments[index] == current[0] \
+                        and os.stat(self._segment_path(segments[index])).st_ino == current[1]:
+                    index += 1 # Read to its end already
+                if index >= len(segments):
+                    return
+                file = open(self._segment_path(segments[index]), 'rb')
+            with file:
+                current = (segments[index], os.fstat(file.fileno()).st_ino)
+                for sequence, payload, _ in self._scan(file):
+                    # Sequences only grow, which also skips the records read before a compaction
+                    if sequence >= start:
+                        yield sequence, payload
+                        start = sequence + 1
+
+    def is_empty(self) -> bool:
+        return self.next_sequence == 0
+
+    # Background work
+
+    def _background(self) -> None:
+        last_compaction = time.monotonic()
+        while not self._closed.wait(self.group_commit_interval):
+            try:
+                self.sync()
+                if time.monotonic() - last_compaction >= self.compaction_interval:
+                    self.compact()
+                    last_compaction = time.monotonic()
+            except Exception as e:
+                logger.error(f"Block log: background task failed: {e}")
+
+    def compact(self) -> int:
+        """
+        Merge runs of adjacent small sealed segments into one, dropping duplicated and corrupted records.
+        Returns the number of segments removed.
+        """
+        with self._lock:
+            sealed = [first_sequence for first_sequence in self.segments() if first_sequence != self._active_first_sequence]
+
+        removed = 0
+        run: List[int] = []
+        run_size = 0
+        for first_sequence in sealed + [None]: # type: ignore
+            size = os.path.getsize(self._segment_path(first_sequence)) if first_sequence is not None else None
+            if size is not None and run_size + size <= self.segment_size:
+                run.append(first_sequence)
+                run_size += size
+                continue
+            if len(run) > 1:
+                self._merge(run)
+                removed += len(run) - 1
+            run, run_size = ([first_sequence], size) if first_sequence is not None else ([], 0)
+        return removed
+
+    def _merge(self, run: List[int]) -> None:
+        seen = set()
+        merged_path = self._segment_path(run[0])
+        temporary_path = merged_path + '.compacting'
+        with open(temporary_path, 'wb') as output:
+            for first_sequence in run:
+                with open(self._segment_path(first_sequence), 'rb') as file:
+                    for sequence, payload, _ in self._scan(file):
+                        digest = sha256(payload).digest()
+                        if digest in seen:
+                            continue
+                        seen.add(digest)
+                        header = struct.pack('<QI', sequence, len(payload))
+                        output.write(header + struct.pack('<I', zlib.crc32(payload, zlib.crc32(header))) + payload)
+            output.flush()
+            os.fsync(output.fileno())
+        # Readers list and open the segments under the lock, so they see all of the run or only the merged segment
+        with self._lock:
+            os.replace(temporary_path, merged_path)
+            for first_sequence in run[1:]:
+                os.remove(self._segment_path(first_sequence))
+        logger.info(f"Block log: compacted {len(run)} segments into {merged_path}.")
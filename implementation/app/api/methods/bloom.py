@@ -0,0 +1,78 @@
+# methods/bloom.py
+
+import math
+import struct
+
+from hashlib import sha256
+from typing import Iterable, Iterator, Optional
+
+# Header: number of bits, number of hash functions and seed
+BLOOM_HEADER = struct.Struct('<IBI')
+
+class BloomFilter:
+    """
+    Bloom filter over hexadecimal ids (block hashes), used as a compact summary of the
+    blocks a node knows. Membership tests may return false positives, never false negatives;
+    filters built with different seeds have independent false positives.
+
+    Args:
+    - size: int (bits)
+    - hash_count: int
+    - seed: int
+    """
+
+    def __init__(self, size: int, hash_count: int, seed: int = 0) -> None:
+        self.size = max(8, size)
+        self.hash_count = max(1, hash_count)
+        self.seed = seed
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01, seed: int = 0) -> 'BloomFilter':
+        """
+        Build an empty filter sized for capacity ids at the given false positive rate.
+        """
+        capacity = max(1, capacity)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        return cls(size, round(size / capacity * math.log(2)), seed)
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int, error_rate: float = 0.01, seed: int = 0) -> 'BloomFilter':
+        bloom = cls.for_capacity(capacity, error_rate, seed)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing over a sha256 digest of the id
+        digest = sha256(self.seed.to_bytes(4, 'little') + item.encode()).digest()
+        first, second = struct.unpack_from('<QQ', digest)
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_bytes(self) -> bytes:
+        return BLOOM_HEADER.pack(self.size, self.hash_count, self.seed) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_size: Optional[int] = None) -> 'BloomFilter':
+        """
+        Rebuild a filter from its encoding. Raises ValueError on a malformed payload or a
+        filter larger than max_size bits, checked before anything is allocated.
+        """
+        if len(data) < BLOOM_HEADER.size:
+            raise ValueError("Truncated bloom filter.")
+        size, hash_count, seed = BLOOM_HEADER.unpack_from(data)
+        if len(data) - BLOOM_HEADER.size != (size + 7) // 8:
+            raise ValueError("Bloom filter size does not match its header.")
+        if max_size is not None and size > max_size:
+            raise ValueError(f"Bloom filter larger than {max_size} bits.")
+        bloom = cls(size, hash_count, seed)
+        bloom.bits[:] = data[BLOOM_HEADER.size:]
+        return bloom
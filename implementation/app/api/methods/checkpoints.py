@@ -0,0 +1,68 @@
+# methods/checkpoints.py
+
+import json
+import os
+import re
+
+from hashlib import sha256
+from typing import Optional
+
+from app.api.config.logger import logger
+
+CHECKPOINT_VERSION = 3 # Version 3: balances and nonces keyed by wallet address
+COMPATIBLE_VERSIONS = (2, CHECKPOINT_VERSION) # Version 2: blocks identified by their binary codec hash
+CHECKPOINT_NAME = re.compile(r'^checkpoint-(\d{16})\.json$')
+
+def _checkpoint_path(path: str, sequence: int) -> str:
+    return os.path.join(path, f"checkpoint-{sequence:016d}.json")
+
+def list_checkpoints(path: str) -> list:
+    """
+    Get the block log sequence numbers of the checkpoints in a directory, newest first.
+    """
+    if not os.path.isdir(path):
+        return []
+    names = (CHECKPOINT_NAME.match(name) for name in os.listdir(path))
+    return sorted((int(match.group(1)) for match in names if match), reverse=True)
+
+def save_checkpoint(path: str, sequence: int, state: dict, retain: int = 3) -> None:
+    """
+    Atomically write a checkpoint of the state at a block log sequence number,
+    keeping only the newest retain checkpoints.
+
+    The file holds the sha256 of the payload on its first line, followed by the JSON payload.
+    """
+    os.makedirs(path, exist_ok=True)
+    payload = json.dumps({"version": CHECKPOINT_VERSION, "sequence": sequence, **state}).encode('utf-8')
+    file_path = _checkpoint_path(path, sequence)
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(sha256(payload).hexdigest().encode() + b'\n' + payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, file_path)
+
+    for old_sequence in list_checkpoints(path)[retain:]:
+        os.remove(_checkpoint_path(path, old_sequence))
+
+def load_latest_checkpoint(path: str, max_sequence: int) -> Optional[dict]:
+    """
+    Load the newest valid checkpoint not beyond max_sequence (the last record of the block log).
+    Corrupted checkpoints, or checkpoints ahead of the log, are skipped.
+    """
+    for sequence in list_checkpoints(path):
+        if sequence > max_sequence:
+            logger.warning(f"Checkpoint {sequence} is ahead of the block log, skipping it.")
+            continue
+        try:
+            with open(_checkpoint_path(path, sequence), 'rb') as file:
+                checksum, payload = file.read().split(b'\n', 1)
+            if sha256(payload).hexdigest().encode() != checksum:
+                raise ValueError("checksum mismatch")
+            checkpoint = json.loads(payload)
+            if checkpoint.get("version") not in COMPATIBLE_VERSIONS or checkpoint.get("sequence") != sequence:
+                raise ValueError("unexpected version or sequence")
+            return checkpoint
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint {sequence} is not valid ({e}), skipping it.")
+    return None
@@ -0,0 +1,303 @@
+# methods/codec.py
+
+import struct
+
+from hashlib import sha256
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.api.methods.wallets import decode_public_key, encode, raw_signature
+
+"""
+Versioned binary codec for transactions and blocks.
+
+Keys and signatures are stored as raw bytes instead of Base64 text. Every top level
+payload starts with a (version, kind) envelope so peers and the block log can tell the
+format apart from JSON (which always starts with '{').
+
+Transaction: sender, recipient, signature (u16 length + raw bytes), amount, nonce (i64),
+timestamp (u8 length + ISO 8601 text).
+Block: index, nonce (i64), timestamp, children hashes (u16 count + raw sha256 digests),
+transactions (u32 count + u32 length + transaction payload).
+Block digest: the input of the block hash, same header but each transaction is
+represented by its 32 bytes id (sha256 of its payload).
+Transaction and block batches: u32 count + u32 length + payload, used by gossip and sync.
+Compact block: the block as stored in the block log, each transaction referring to its
+sender and recipient by their 32 bytes address instead of the full public key, which is
+kept once in the key registry. It decodes to the same block (and hash).
+"""
+
+CODEC_VERSION = 1
+BINARY_MEDIA_TYPE = "application/x-dag-binary"
+
+KIND_TRANSACTION = 1
+KIND_BLOCK = 2
+KIND_BLOCK_DIGEST = 3
+KIND_TRANSACTION_BATCH = 4
+KIND_BLOCK_BATCH = 5
+KIND_COMPACT_BLOCK = 6
+
+ENVELOPE = struct.Struct('<BB')
+AMOUNTS = struct.Struct('<qq')
+U8 = struct.Struct('<B')
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+
+class CodecError(ValueError):
+    """
+    Raised when a payload can not be encoded or decoded.
+    """
+
+class _Reader:
+    """
+    Cursor over a payload being decoded.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def take(self, size: int) -> memoryview:
+        end = self.offset + size
+        if end > len(self.data):
+            raise CodecError("Truncated payload.")
+        chunk = self.data[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        return layout.unpack(self.take(layout.size))
+
+    def blob(self, layout: struct.Struct) -> bytes:
+        return bytes(self.take(self.unpack(layout)[0]))
+
+def _blob(layout: struct.Struct, data: bytes) -> bytes:
+    return layout.pack(len(data)) + data
+
+def _header(index: int, nonce: int, timestamp: datetime, children_hashes) -> bytes:
+    try:
+        children = [bytes.fromhex(child_hash) for child_hash in children_hashes]
+    except ValueError:
+        raise CodecError("Children hashes must be hexadecimal digests.")
+    return b''.join([
+        AMOUNTS.pack(index, nonce),
+        _blob(U8, timestamp.isoformat().encode()),
+        U16.pack(len(children)),
+        *(_blob(U8, child) for child in children)
+    ])
+
+def _read_header(reader: _Reader) -> dict:
+    index, nonce = reader.unpack(AMOUNTS)
+    timestamp = datetime.fromisoformat(reader.blob(U8).decode())
+    children_hashes = [reader.blob(U8).hex() for _ in range(reader.unpack(U16)[0])]
+    return {"index": index, "nonce": nonce, "timestamp": timestamp, "children_hashes": children_hashes}
+
+def _open(data: bytes, kind: int) -> _Reader:
+    reader = _Reader(data)
+    version, payload_kind = reader.unpack(ENVELOPE)
+    if version != CODEC_VERSION:
+        raise CodecError(f"Unsupported codec version {version}.")
+    if payload_kind != kind:
+        raise CodecError(f"Unexpected payload kind {payload_kind}.")
+    return reader
+
+def encode_transaction(transaction) -> bytes:
+    """
+    Encode a transaction.
+    """
+    try:
+        return b''.join([
+            ENVELOPE.pack(CODEC_VERSION, KIND_TRANSACTION),
+            _blob(U16, decode_public_key(transaction.sender)),
+            _blob(U16, decode_public_key(transaction.recipient)),
+            _blob(U16, raw_signature(transaction.signature)),
+            AMOUNTS.pack(transaction.amount, transaction.nonce),
+            _blob(U8, transaction.timestamp.isoformat().encode())
+        ])
+    except (ValueError, struct.error) as e:
+        raise CodecError(f"Transaction can not be encoded: {e}")
+
+def _read_transaction(reader: _Reader) -> dict:
+    sender, recipient, signature = reader.blob(U16), reader.blob(U16), reader.blob(U16)
+    amount, nonce = reader.unpack(AMOUNTS)
+    timestamp = datetime.fromisoformat(reader.blob(U8).decode())
+    return {
+        "sender": encode(sender),
+        "recipient": encode(recipient),
+        "amount": amount,
+        "nonce": nonce,
+        "signature": encode(signature),
+        "timestamp": timestamp
+    }
+
+def decode_transaction(data: bytes) -> dict:
+    """
+    Decode a transaction into the fields of the Transaction model.
+    """
+    try:
+        return _read_transaction(_open(data, KIND_TRANSACTION))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CodecError(f"Transaction can not be decoded: {e}")
+
+def encode_block(block) -> bytes:
+    """
+    Encode a block and its transactions.
+    """
+    try:
+        return b''.join([
+            ENVELOPE.pack(CODEC_VERSION, KIND_BLOCK),
+            _header(block.index, block.nonce, block.timestamp, block.children_hashes),
+            U32.pack(len(block.transactions)),
+            *(_blob(U32, tx.to_bytes()) for tx in block.transactions)
+        ])
+    except struct.error as e:
+        raise CodecError(f"Block can not be encoded: {e}")
+
+def decode_block(data: bytes) -> dict:
+    """
+    Decode a block into the fields of the Block model.
+    """
+    try:
+        reader = _open(data, KIND_BLOCK)
+        fields = _read_header(reader)
+        transactions: List[dict] = []
+        for _ in range(reader.unpack(U32)[0]):
+            transactions.append(_read_transaction(_open(reader.blob(U32), KIND_TRANSACTION)))
+        fields["transactions"] = transactions
+        return fields
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CodecError(f"Block can not be decoded: {e}")
+
+def encode_block_digest(block) -> bytes:
+    """
+    Encode the input of the block hash: the block header and the ids of its transactions.
+    """
+    try:
+        return b''.join([
+            ENVELOPE.pack(CODEC_VERSION, KIND_BLOCK_DIGEST),
+            _header(block.index, block.nonce, block.timestamp, block.children_hashes),
+            U32.pack(len(block.transactions)),
+            *(bytes.fromhex(tx.id) for tx in block.transactions)
+        ])
+    except struct.error as e:
+        raise CodecError(f"Block can not be encoded: {e}")
+
+def block_hash(data: bytes) -> str:
+    """
+    Compute the hash of an encoded block without decoding its transactions.
+    """
+    try:
+        reader = _open(data, KIND_BLOCK)
+        _read_header(reader)
+        header = bytes(reader.data[ENVELOPE.size:reader.offset])
+        count = reader.unpack(U32)[0]
+        digests = [sha256(reader.blob(U32)).digest() for _ in range(count)]
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CodecError(f"Block can not be decoded: {e}")
+    return sha256(b''.join([ENVELOPE.pack(CODEC_VERSION, KIND_BLOCK_DIGEST), header, U32.pack(count), *digests])).hexdigest()
+
+def _encode_batch(kind: int, payloads: List[bytes]) -> bytes:
+    try:
+        return b''.join([
+            ENVELOPE.pack(CODEC_VERSION, kind),
+            U32.pack(len(payloads)),
+            *(_blob(U32, payload) for payload in payloads)
+        ])
+    except struct.error as e:
+        raise CodecError(f"Batch can not be encoded: {e}")
+
+def _decode_batch(data: bytes, kind: int) -> List[bytes]:
+    try:
+        reader = _open(data, kind)
+        return [reader.blob(U32) for _ in range(reader.unpack(U32)[0])]
+    except ValueError as e:
+        raise CodecError(f"Batch can not be decoded: {e}")
+
+def encode_transaction_batch(payloads: List[bytes]) -> bytes:
+    """
+    Encode a batch of already encoded transactions.
+    """
+    return _encode_batch(KIND_TRANSACTION_BATCH, payloads)
+
+def decode_transaction_batch(data: bytes) -> List[bytes]:
+    """
+    Split a batch into its encoded transactions.
+    """
+    return _decode_batch(data, KIND_TRANSACTION_BATCH)
+
+def encode_block_batch(payloads: List[bytes]) -> bytes:
+    """
+    Encode a batch of already encoded blocks.
+    """
+    return _encode_batch(KIND_BLOCK_BATCH, payloads)
+
+def decode_block_batch(data: bytes) -> List[bytes]:
+    """
+    Split a batch into its encoded blocks.
+    """
+    return _decode_batch(data, KIND_BLOCK_BATCH)
+
+def encode_compact_block(block) -> bytes:
+    """
+    Encode a block for storage, with the addresses of the wallets instead of their public keys.
+    """
+    try:
+        return b''.join([
+            ENVELOPE.pack(CODEC_VERSION, KIND_COMPACT_BLOCK),
+            _header(block.index, block.nonce, block.timestamp, block.children_hashes),
+            U32.pack(len(block.transactions)),
+            *(b''.join([
+                bytes.fromhex(tx.sender_address),
+                bytes.fromhex(tx.recipient_address),
+                _blob(U16, raw_signature(tx.signature)),
+                AMOUNTS.pack(tx.amount, tx.nonce),
+                _blob(U8, tx.timestamp.isoformat().encode())
+            ]) for tx in block.transactions)
+        ])
+    except (ValueError, struct.error) as e:
+        raise CodecError(f"Block can not be encoded: {e}")
+
+def decode_compact_block(data: bytes, resolve: Callable[[str], Optional[str]]) -> dict:
+    """
+    Decode a compact block into the fields of the Block model, resolving the addresses
+    into public keys with resolve.
+    """
+    def public_key(reader: _Reader) -> str:
+        key_address = bytes(reader.take(32)).hex()
+        key = resolve(key_address)
+        if key is None:
+            raise CodecError(f"Unknown public key for the address {key_address}.")
+        return key
+
+    try:
+        reader = _open(data, KIND_COMPACT_BLOCK)
+        fields = _read_header(reader)
+        transactions: List[dict] = []
+        for _ in range(reader.unpack(U32)[0]):
+            sender, recipient, signature = public_key(reader), public_key(reader), encode(reader.blob(U16))
+            amount, nonce = reader.unpack(AMOUNTS)
+            timestamp = datetime.fromisoformat(reader.blob(U8).decode())
+            transactions.append({
+                "sender": sender,
+                "recipient": recipient,
+                "amount": amount,
+                "nonce": nonce,
+                "signature": signature,
+                "timestamp": timestamp
+            })
+        fields["transactions"] = transactions
+        return fields
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CodecError(f"Block can not be decoded: {e}")
+
+def payload_kind(data: bytes) -> Optional[int]:
+    """
+    Get the kind of a binary payload, or None if it is not binary.
+    """
+    return data[1] if is_binary(data) else None
+
+def is_binary(data: bytes) -> bool:
+    """
+    Tell a binary payload apart from a JSON one.
+    """
+    return len(data) >= ENVELOPE.size and data[0] == CODEC_VERSION
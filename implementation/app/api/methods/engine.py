@@ -0,0 +1,94 @@
+# methods/engine.py
+
+import queue
+import threading
+
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from app.api.config.logger import logger
+
+from app.api.models.blockchain import DAG
+from app.api.models.snapshot import DAGSnapshot
+
+T = TypeVar('T')
+
+class DAGEngine:
+    """
+    Single writer in front of the DAG.
+
+    Every change to the DAG is a command (a function taking the DAG) executed by one writer
+    thread, in arrival order, so handlers never mutate the DAG concurrently and need no
+    locks. After each group of queued commands the writer publishes a new DAGSnapshot, then
+    resolves the commands, so a handler reads its own writes. Readers use the current
+    snapshot and never wait for the writer.
+
+    Args:
+    - dag: DAG
+    - max_batch: int
+    - max_layers: int
+    """
+
+    def __init__(self, dag: DAG, max_batch: int = 256, max_layers: int = 64) -> None:
+        self.dag = dag
+        self.max_batch = max_batch
+        self.max_layers = max_layers
+        self.snapshot = DAGSnapshot.capture(dag)
+
+        self._commands: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="dag-writer", daemon=True)
+        self._thread.start()
+
+    def execute(self, command: Callable[..., T], *args, timeout: Optional[float] = None) -> T:
+        """
+        Run a command on the DAG in the writer and wait for its result.
+        Exceptions raised by the command are raised here.
+        """
+        if threading.current_thread() is self._thread:
+            # Commands issued by a command run right away
+            return command(self.dag, *args)
+        future: Future = Future()
+        self._commands.put((command, args, future))
+        return future.result(timeout)
+
+    def stop(self) -> None:
+        """
+        Stop the writer once the queued commands are done.
+        """
+        self._commands.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Tuple[Callable, tuple, Future]] = []
+            item = self._commands.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+
+            results = []
+            for command, args, future in batch:
+                try:
+                    results.append((future, command(self.dag, *args), None))
+                except Exception as e:
+                    results.append((future, None, e))
+
+            if batch:
+                try:
+                    self.snapshot = self.snapshot.advance(self.dag, self.max_layers)
+                except Exception as e:
+                    logger.error(f"DAG engine: could not publish a snapshot, taking a full one: {e}")
+                    self.snapshot = DAGSnapshot.capture(self.dag, self.snapshot.version + 1, self.snapshot)
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+            if item is None:
+                return
@@ -0,0 +1,114 @@
+# methods/gossip.py
+
+import json
+
+import requests
+
+from datetime import datetime
+from hashlib import sha256
+from typing import Optional, Tuple
+
+from app.api.methods.codec import BINARY_MEDIA_TYPE, block_hash, decode_block, decode_transaction, decode_transaction_batch, encode_transaction_batch
+
+from app.api.config.env import API_NAME
+
+BLOCK_PATH = "nodes/block/"
+TRANSACTION_PATH = "nodes/transaction/"
+TRANSACTION_BATCH_PATH = "nodes/transactions/batch/"
+INVENTORY_PATH = "nodes/inventory/"
+
+# Neighbors that do not support binary payloads, so they only get JSON
+json_only_neighbors = set()
+# Neighbors without the batch endpoint, so they get one transaction per request
+unbatched_neighbors = set()
+# Neighbors without the inventory endpoint, so they get the bodies without an announcement
+unannounced_neighbors = set()
+
+# Decoders used to fall back to JSON, by neighbor path
+JSON_FALLBACKS = {
+    BLOCK_PATH: decode_block,
+    TRANSACTION_PATH: decode_transaction,
+    TRANSACTION_BATCH_PATH: lambda payload: [decode_transaction(tx) for tx in decode_transaction_batch(payload)],
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def post_payload(neighbor: str, path: str, payload: bytes, timeout: Optional[float] = None) -> requests.Response:
+    """
+    Post a binary encoded payload to a neighbor.
+
+    The binary codec is tried first; if the neighbor does not support it (415) the payload is
+    sent again as JSON, and the neighbor is remembered as JSON only. Any other failure, such as
+    a rejected payload (422), is returned as is. Transaction batches are split into single transactions for
+    neighbors without the batch endpoint.
+    """
+    if path == TRANSACTION_BATCH_PATH and neighbor in unbatched_neighbors:
+        return _post_unbatched(neighbor, payload, timeout)
+
+    url = f"{neighbor}api/v1/{API_NAME}/{path}"
+    response = None
+    if neighbor not in json_only_neighbors:
+        response = requests.post(url, data=payload, headers={"Content-Type": BINARY_MEDIA_TYPE}, timeout=timeout)
+        if response.status_code == 415:
+            json_only_neighbors.add(neighbor)
+            response = None
+    if response is None:
+        body = json.dumps(JSON_FALLBACKS[path](payload), default=_json_default)
+        response = requests.post(url, data=body, headers={"Content-Type": "application/json"}, timeout=timeout)
+
+    if path == TRANSACTION_BATCH_PATH and response.status_code in (404, 405):
+        unbatched_neighbors.add(neighbor)
+        return _post_unbatched(neighbor, payload, timeout)
+    return response
+
+def _post_unbatched(neighbor: str, payload: bytes, timeout: Optional[float]) -> requests.Response:
+    """
+    Post the transactions of a batch one by one, to a neighbor without the batch endpoint.
+    Returns the first failed response, or the last one.
+    """
+    response = None
+    for transaction in decode_transaction_batch(payload):
+        response = post_payload(neighbor, TRANSACTION_PATH, transaction, timeout)
+        if response.status_code >= 500 or response.status_code == 429:
+            return response
+    return response # type: ignore
+
+def announce(neighbor: str, inventory: dict, timeout: Optional[float] = None) -> Tuple[requests.Response, Optional[dict]]:
+    """
+    Announce transaction and block ids to a neighbor.
+
+    Returns the response and the inventory of the ids the neighbor lacks, or None as the
+    inventory if the neighbor does not support announcements. Failed announcements raise,
+    so the delivery is retried.
+    """
+    response = requests.post(f"{neighbor}api/v1/{API_NAME}/{INVENTORY_PATH}", json=inventory, timeout=timeout)
+    if response.status_code in (404, 405):
+        unannounced_neighbors.add(neighbor)
+        return response, None
+    response.raise_for_status()
+    return response, response.json()["data"]
+
+def announce_and_post(neighbor: str, path: str, payload: bytes, timeout: Optional[float] = None) -> requests.Response:
+    """
+    Deliver a block or a transaction batch to a neighbor, announcing its ids first and
+    posting only the bodies the neighbor lacks.
+    """
+    if neighbor in unannounced_neighbors or path not in (BLOCK_PATH, TRANSACTION_BATCH_PATH):
+        return post_payload(neighbor, path, payload, timeout)
+
+    if path == BLOCK_PATH:
+        response, wanted = announce(neighbor, {"blocks": [block_hash(payload)]}, timeout)
+        if wanted is not None and not wanted["blocks"]:
+            return response
+        return post_payload(neighbor, path, payload, timeout)
+
+    transactions = {sha256(transaction).hexdigest(): transaction for transaction in decode_transaction_batch(payload)}
+    response, wanted = announce(neighbor, {"transactions": list(transactions)}, timeout)
+    if wanted is not None:
+        if not wanted["transactions"]:
+            return response
+        payload = encode_transaction_batch([transactions[tx_id] for tx_id in wanted["transactions"] if tx_id in transactions])
+    return post_payload(neighbor, path, payload, timeout)
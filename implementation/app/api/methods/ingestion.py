@@ -0,0 +1,224 @@
+# methods/ingestion.py
+
+import queue
+import threading
+
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.api.config.logger import logger
+
+from app.api.methods.wallets import verify_signatures
+
+"""
+Staged ingestion of the transactions received by the node (clients and neighbors):
+
+decode (routes) -> dedupe -> signature verification -> nonce/balance admission -> mempool
+
+Each stage runs in its own thread and hands its work to the next one through a bounded
+queue. Signatures are verified in batches by the verification worker processes, outside
+the DAG writer, which only runs the cheap admission checks. When the queues are full new
+work is refused at once (IngestionOverloaded) instead of waiting behind the backlog.
+"""
+
+class IngestionOverloaded(Exception):
+    """
+    The pipeline can not take more transactions right now.
+
+    Args:
+    - status_code: int (429 when a sender has too many transactions in flight, 503 when the pipeline is full)
+    - retry_after: int (seconds)
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def verify_transactions(transactions: List) -> List[Optional[str]]:
+    """
+    Verify the signatures of a batch of transactions in one pass.
+    Returns, for each transaction, None if its signature is valid or the reason it was rejected.
+    """
+    try:
+        valid_signatures = verify_signatures([(tx.message, tx.signature, tx.sender) for tx in transactions])
+    except Exception as e:
+        logger.error(f"Ingestion: could not verify {len(transactions)} signatures: {e}")
+        valid_signatures = [False] * len(transactions)
+    return [None if valid else "Invalid signature." for valid in valid_signatures]
+
+def verify_and_admit(transactions: List, admit: Callable[[List], List[Optional[str]]]) -> List[Optional[str]]:
+    """
+    Verify the signatures of a batch of transactions and hand the valid ones to admit, in order,
+    the same two stages as the pipeline without its queues.
+    Returns, for each transaction, None if it was admitted or the reason it was rejected.
+    """
+    verified = verify_transactions(transactions)
+    admitted = iter(admit([tx for tx, result in zip(transactions, verified) if result is None]))
+    return [next(admitted) if result is None else result for result in verified]
+
+class IngestionPipeline:
+    """
+    Bounded, staged pipeline from received transactions to the mempool.
+
+    A single verifier thread takes the transactions in arrival order, in batches of up to
+    batch_size, so the transactions of a sender reach the admission stage in nonce order.
+    The admission thread hands each verified batch to admit (the DAG writer), which returns
+    None for every admitted transaction or the reason it was rejected.
+
+    Args:
+    - admit: Callable[[List], List[Optional[str]]]
+    - queue_size: int (transactions waiting for each stage)
+    - batch_size: int
+    - max_pending_per_sender: int
+    - timeout: float (seconds a caller waits for its results)
+    - retry_after: int (seconds suggested to the refused callers)
+    """
+
+    def __init__(self, admit: Callable[[List], List[Optional[str]]], queue_size: int = 4096, batch_size: int = 256,
+                 max_pending_per_sender: int = 1024, timeout: float = 10, retry_after: int = 1) -> None:
+        self.admit = admit
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_pending_per_sender = max_pending_per_sender
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._verify_queue: queue.Queue = queue.Queue(queue_size)
+        self._admit_queue: queue.Queue = queue.Queue(queue_size)
+        self._in_flight: Dict[str, Future] = {} # transaction id -> result
+        self._senders: Dict[str, int] = {} # sender address -> transactions in flight
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    # Submission
+
+    def submit(self, transactions: List) -> List[Future]:
+        """
+        Queue a list of transactions, all or nothing, returning the future result of each.
+
+        A transaction already in flight is not queued again and shares the result of the
+        first one (dedupe). Raises IngestionOverloaded, queuing nothing, if a sender would
+        have more than max_pending_per_sender transactions in flight or the first stage is full.
+        """
+        with self._lock:
+            futures: List[Future] = []
+            queued: Dict[str, Tuple[object, Future]] = {} # transaction id -> (transaction, result)
+            senders: Dict[str, int] = {}
+            for tx in transactions:
+                future = self._in_flight.get(tx.id)
+                if future is None and tx.id in queued:
+                    future = queued[tx.id][1]
+                if future is None:
+                    future = Future()
+                    queued[tx.id] = (tx, future)
+                    senders[tx.sender_address] = senders.get(tx.sender_address, 0) + 1
+                futures.append(future)
+
+            for sender, count in senders.items():
+                if self._senders.get(sender, 0) + count > self.max_pending_per_sender:
+                    raise IngestionOverloaded("Too many transactions of the sender in flight.", 429, self.retry_after)
+            if self._verify_queue.qsize() + len(queued) > self.queue_size:
+                raise IngestionOverloaded("The node is overloaded, try again later.", 503, self.retry_after)
+
+            for tx, future in queued.values():
+                self._in_flight[tx.id] = future # type: ignore
+                self._senders[tx.sender_address] = self._senders.get(tx.sender_address, 0) + 1 # type: ignore
+                # Only this method adds to the queue, under the lock, so there is room for the whole list
+                self._verify_queue.put_nowait((tx, future))
+        return futures
+
+    def ingest(self, transactions: List) -> List[Optional[str]]:
+        """
+        Run a list of transactions through the pipeline and wait for their results:
+        None for every admitted transaction, or the reason it was rejected.
+        Raises IngestionOverloaded if they were refused or not processed within timeout.
+        """
+        futures = self.submit(transactions)
+        try:
+            return [future.result(self.timeout) for future in futures]
+        except FutureTimeoutError:
+            raise IngestionOverloaded("The node is overloaded, the transactions are still being processed.", 503, self.retry_after)
+
+    def _resolve(self, tx, result: Optional[str]) -> None:
+        with self._lock:
+            future = self._in_flight.pop(tx.id)
+            count = self._senders.get(tx.sender_address, 1) - 1
+            if count:
+                self._senders[tx.sender_address] = count
+            else:
+                self._senders.pop(tx.sender_address, None)
+        future.set_result(result)
+
+    @staticmethod
+    def _take(source: queue.Queue, limit: int) -> List:
+        """
+        Wait for an item of a queue and take up to limit items. A None item (stop) ends the list.
+        """
+        items = [source.get()]
+        while items[-1] is not None and len(items) < limit:
+            try:
+                items.append(source.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    # Stages
+
+    def _verify_stage(self) -> None:
+        while True:
+            items = self._take(self._verify_queue, self.batch_size)
+            stop = items[-1] is None
+            batch = [item for item in items if item is not None]
+            if batch:
+                for (tx, future), result in zip(batch, verify_transactions([tx for tx, _ in batch])):
+                    if result is None:
+                        # Blocks while the admission stage is behind, which fills this stage and refuses new work
+                        self._admit_queue.put((tx, future))
+                    else:
+                        self._resolve(tx, result)
+            if stop:
+                self._admit_queue.put(None)
+                return
+
+    def _admit_stage(self) -> None:
+        while True:
+            items = self._take(self._admit_queue, self.batch_size)
+            stop = items[-1] is None
+            batch = [tx for tx, _ in (item for item in items if item is not None)]
+            if batch:
+                try:
+                    results = self.admit(batch)
+                except Exception as e:
+                    logger.error(f"Ingestion: could not admit {len(batch)} transactions: {e}")
+                    results = ["The transaction could not be admitted."] * len(batch)
+                for tx, result in zip(batch, results):
+                    self._resolve(tx, result)
+            if stop:
+                return
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """
+        Start the verification and admission threads.
+        """
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(target=self._verify_stage, name="ingestion-verifier", daemon=True),
+            threading.Thread(target=self._admit_stage, name="ingestion-admission", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the threads once the queued transactions are done.
+        """
+        if not self._threads:
+            return
+        self._verify_queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
@@ -0,0 +1,112 @@
+# methods/keys.py
+
+import os
+import sqlite3
+import threading
+
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from app.api.methods.wallets import decode_public_key, encode, key_id
+
+class KeyRegistry:
+    """
+    Store of the full public keys by address, each key kept once.
+
+    Accounts, nonces and stored blocks refer to wallets by their address (sha256 of the
+    public key), and the full keys, only needed to verify signatures, are looked up here.
+    The most recently used keys are kept in memory in an LRU of cache_size entries, and
+    intern() makes every transaction share the same string for the same key. The database
+    is opened by open(), or on first use, and can be opened again after close().
+
+    Args:
+    - path: str
+    - cache_size: int
+    """
+
+    def __init__(self, path: str, cache_size: int = 10000) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict() # address -> public key
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS keys (address TEXT PRIMARY KEY, public_key BLOB NOT NULL)")
+        return self._db
+
+    def _remember(self, key_address: str, public_key: str) -> None:
+        self._cache[key_address] = public_key
+        self._cache.move_to_end(key_address)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def intern(self, public_key: str) -> str:
+        """
+        Get the shared string of a public key, without storing it.
+        Keys that are not valid Base64 are returned as they are.
+        """
+        try:
+            key_address = key_id(public_key)
+        except ValueError:
+            return public_key
+        with self._lock:
+            interned = self._cache.get(key_address)
+            if interned is None:
+                interned = public_key
+            self._remember(key_address, interned)
+            return interned
+
+    def register(self, public_keys: Iterable[str]) -> None:
+        """
+        Durably store public keys not stored yet, in one transaction.
+        """
+        rows = {key_id(public_key): decode_public_key(public_key) for public_key in public_keys}
+        if not rows:
+            return
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN")
+            try:
+                db.executemany("INSERT OR IGNORE INTO keys (address, public_key) VALUES (?, ?)", rows.items())
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def get(self, key_address: str) -> Optional[str]:
+        """
+        Get the public key of an address, or None if it was never registered.
+        """
+        with self._lock:
+            public_key = self._cache.get(key_address)
+            if public_key is None:
+                row = self._connection().execute("SELECT public_key FROM keys WHERE address = ?", (key_address,)).fetchone()
+                if row is None:
+                    return None
+                public_key = encode(row[0])
+            self._remember(key_address, public_key)
+            return public_key
+
+    def open(self) -> None:
+        """
+        Open the database, if it is not open yet.
+        """
+        with self._lock:
+            self._connection()
+
+    def close(self) -> None:
+        """
+        Close the database. The cached keys are kept.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
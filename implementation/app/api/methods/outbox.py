@@ -0,0 +1,199 @@
+# methods/outbox.py
+
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from app.api.config.logger import logger
+
+@dataclass
+class PeerState:
+    """
+    Delivery state of a neighbor.
+
+    Args:
+    - failures: int
+    - open_until: float
+    - in_flight: bool
+    """
+    failures: int = 0
+    open_until: float = 0.0
+    in_flight: bool = False
+
+class Outbox:
+    """
+    Durable, asynchronous outbox of deliveries to the neighbors.
+
+    Deliveries are stored in SQLite, so they survive restarts, and sent by a background
+    dispatcher with bounded concurrency. Each neighbor is a FIFO queue with at most one
+    delivery in flight, so blocks arrive in the order they were enqueued. Failed deliveries
+    are retried with exponential backoff, and a neighbor failing circuit_failures times in a
+    row is skipped (circuit open) for circuit_cooldown seconds before being tried again.
+
+    Args:
+    - path: str
+    - send: Callable[[str, str, bytes, float], Response]
+    - concurrency: int
+    - timeout: float
+    - max_backoff: float
+    - circuit_failures: int
+    - circuit_cooldown: float
+    - max_pending_per_peer: int
+    """
+
+    def __init__(self, path: str, send: Callable, concurrency: int = 8, timeout: float = 5, max_backoff: float = 300,
+                 circuit_failures: int = 5, circuit_cooldown: float = 60, max_pending_per_peer: int = 10000) -> None:
+        self.send = send
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.circuit_failures = circuit_failures
+        self.circuit_cooldown = circuit_cooldown
+        self.max_pending_per_peer = max_pending_per_peer
+
+        self.peers: Dict[str, PeerState] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, not syncing every commit can only lose the last deliveries on a power loss, never corrupt the queue
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                peer TEXT NOT NULL,
+                path TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_peer ON outbox (peer, id)")
+
+    # Queue
+
+    def enqueue(self, peer: str, path: str, payload: bytes) -> None:
+        """
+        Enqueue a delivery of a payload to a neighbor path. Returns immediately.
+        """
+        with self._lock:
+            self._db.execute("INSERT INTO outbox (peer, path, payload) VALUES (?, ?, ?)", (peer, path, payload))
+            overflow = self._db.execute("SELECT COUNT(*) FROM outbox WHERE peer = ?", (peer,)).fetchone()[0] - self.max_pending_per_peer
+            if overflow > 0:
+                self._db.execute("DELETE FROM outbox WHERE id IN (SELECT id FROM outbox WHERE peer = ? ORDER BY id LIMIT ?)", (peer, overflow))
+                logger.warning(f"Outbox: dropped {overflow} old deliveries to {peer}.")
+        self._wake.set()
+
+    def pending(self, peer: Optional[str] = None) -> int:
+        """
+        Get the number of pending deliveries, for a neighbor or in total.
+        """
+        with self._lock:
+            if peer is None:
+                return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE peer = ?", (peer,)).fetchone()[0]
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """
+        Start the dispatcher thread.
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="outbox")
+        self._thread = threading.Thread(target=self._dispatch, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the dispatcher. Pending deliveries stay stored for the next start.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # Dispatching
+
+    def _dispatch(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                delay = self._dispatch_due()
+            except Exception as e:
+                logger.error(f"Outbox: dispatch failed: {e}")
+                delay = 1.0
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _dispatch_due(self) -> float:
+        """
+        Start the due head delivery of every idle neighbor, returning how long to wait for the next one.
+        """
+        now = time.time()
+        with self._lock:
+            heads = self._db.execute("""
+                SELECT id, peer, path, payload, attempts, next_attempt FROM outbox
+                WHERE id IN (SELECT MIN(id) FROM outbox GROUP BY peer)
+            """).fetchall()
+
+        delay = 1.0
+        in_flight = sum(1 for state in self.peers.values() if state.in_flight)
+        for job_id, peer, path, payload, attempts, next_attempt in heads:
+            state = self.peers.setdefault(peer, PeerState())
+            ready_at = max(next_attempt, state.open_until)
+            if state.in_flight:
+                continue
+            if ready_at > now:
+                delay = min(delay, ready_at - now)
+                continue
+            if in_flight >= self.concurrency:
+                break
+            state.in_flight = True
+            in_flight += 1
+            self._executor.submit(self._deliver, job_id, peer, path, payload, attempts) # type: ignore
+        return delay
+
+    def _deliver(self, job_id: int, peer: str, path: str, payload: bytes, attempts: int) -> None:
+        state = self.peers[peer]
+        try:
+            response = self.send(peer, path, payload, self.timeout)
+            # Rejections (4xx) are final, server errors and rate limits are retried
+            delivered = response.status_code < 500 and response.status_code != 429
+            error = f"status {response.status_code}"
+        except Exception as e:
+            # Timeouts, connection errors and anything else raised while sending are retried
+            delivered, error = False, str(e)
+
+        with self._lock:
+            if delivered:
+                self._db.execute("DELETE FROM outbox WHERE id = ?", (job_id,))
+                state.failures = 0
+            else:
+                backoff = min(self.max_backoff, 2 ** attempts) * random.uniform(0.5, 1.0)
+                self._db.execute("UPDATE outbox SET attempts = ?, next_attempt = ? WHERE id = ?", (attempts + 1, time.time() + backoff, job_id))
+                state.failures += 1
+                if state.failures >= self.circuit_failures:
+                    # Dead peer: stop trying it for a while. After the cooldown a single delivery probes it
+                    state.open_until = time.time() + self.circuit_cooldown
+                    logger.warning(f"Outbox: circuit open for {peer} after {state.failures} failures ({error}).")
+            state.in_flight = False
+        self._wake.set()
@@ -0,0 +1,70 @@
+# methods/seen.py
+
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Iterable, List
+
+class SeenCache:
+    """
+    Time bounded, thread safe set of the ids (transactions or blocks) a node already saw.
+
+    Ids are forgotten ttl seconds after they were first seen, or earlier, oldest first,
+    when more than maxsize ids are kept.
+
+    Args:
+    - maxsize: int
+    - ttl: float
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return key in self._data
+
+    def add(self, key: str) -> bool:
+        """
+        Mark an id as seen. Returns False if it was already seen.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._data:
+                return False
+            self._data[key] = now
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def discard(self, key: str) -> None:
+        """
+        Forget an id, so it is processed again the next time it is received.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def unseen(self, keys: Iterable[str]) -> List[str]:
+        """
+        Filter the ids that were not seen yet, keeping their order.
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            return [key for key in keys if key not in self._data]
+
+    def _expire(self, now: float) -> None:
+        # Insertion order is also expiry order, so only the head has to be checked
+        while self._data:
+            key, seen_at = next(iter(self._data.items()))
+            if now - seen_at < self.ttl:
+                return
+            del self._data[key]
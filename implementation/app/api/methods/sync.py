@@ -0,0 +1,92 @@
+# methods/sync.py
+
+import random
+import requests
+
+from typing import List, Set
+
+from app.api.methods.bloom import BloomFilter
+from app.api.methods.codec import BINARY_MEDIA_TYPE, decode_block_batch
+from app.api.methods.wallets import encode
+
+from app.api.models.blockchain import DAG
+from app.api.models.records import BlockRecord
+from app.api.methods.engine import DAGEngine
+
+from app.api.config.env import API_NAME
+from app.api.config.logger import logger
+
+"""
+Incremental synchronization with a neighbor:
+
+1. The node sends its tips and a bloom filter of the hashes of the blocks it knows.
+2. The neighbor answers with the hashes of the blocks the node lacks, in topological order.
+3. The node fetches those blocks in pages and adds them to its DAG, one by one.
+
+A bloom false positive makes the neighbor believe the node knows a block it lacks; such
+blocks are fetched by hash when a block referencing them arrives, or, for tips, from the
+list of tips the neighbor sends along. Every sync uses a new seed, so the false positives
+of a sync do not repeat in the next one.
+"""
+
+def fetch_blocks(neighbor: str, hashes: List[str], timeout: float) -> List[BlockRecord]:
+    """
+    Fetch blocks by hash from a neighbor. Blocks the neighbor does not have are left out.
+    """
+    response = requests.post(f"{neighbor}api/v1/{API_NAME}/nodes/sync/blocks/",
+                             json={"hashes": hashes},
+                             headers={"Accept": BINARY_MEDIA_TYPE},
+                             timeout=timeout)
+    response.raise_for_status()
+    return [BlockRecord.from_bytes(payload) for payload in decode_block_batch(response.content)]
+
+def sync_with_neighbor(engine: DAGEngine, neighbor: str, page_size: int, error_rate: float, timeout: float) -> int:
+    """
+    Fetch the blocks a neighbor has and the node lacks, and add them to the DAG through the engine.
+    Returns the number of blocks added.
+    """
+    snapshot = engine.snapshot
+    known = (block.hash for _, block, _ in snapshot.iter_blocks())
+    bloom = BloomFilter.from_items(known, snapshot.next_topological_position, error_rate, seed=random.getrandbits(32))
+    response = requests.post(f"{neighbor}api/v1/{API_NAME}/nodes/sync/",
+                             json={"tips": list(snapshot.tips), "bloom": encode(bloom.to_bytes())},
+                             timeout=timeout)
+    response.raise_for_status()
+    summary = response.json()["data"]
+    logger.info(f"Sync: {len(summary['missing'])} blocks missing from {neighbor}.")
+
+    added = 0
+    requested: Set[str] = set(summary["missing"])
+    for start in range(0, len(summary["missing"]), page_size):
+        for block in fetch_blocks(neighbor, summary["missing"][start:start + page_size], timeout):
+            added += _add_synced_block(engine, neighbor, block, requested, timeout)
+
+    # Tips hidden by a false positive, with the blocks below them that are still missing
+    lacking_tips = [tip for tip in summary["tips"] if tip not in engine.snapshot and tip not in requested]
+    requested.update(lacking_tips)
+    for start in range(0, len(lacking_tips), page_size):
+        for block in fetch_blocks(neighbor, lacking_tips[start:start + page_size], timeout):
+            added += _add_synced_block(engine, neighbor, block, requested, timeout)
+    return added
+
+def _add_synced_block(engine: DAGEngine, neighbor: str, block: BlockRecord, requested: Set[str], timeout: float) -> int:
+    """
+    Add a fetched block, fetching first the children it references that the node lacks.
+    """
+    added = 0
+    pending = [block]
+    while pending:
+        block = pending[-1]
+        lacking = [child_hash for child_hash in block.children_hashes if child_hash not in engine.snapshot]
+        if lacking:
+            if requested.intersection(lacking):
+                # Already fetched once and still missing: the neighbor can not complete this path
+                logger.warning(f"Sync: block {block.hash} references blocks {neighbor} could not provide.")
+                return added
+            requested.update(lacking)
+            pending.extend(fetch_blocks(neighbor, lacking, timeout))
+            continue
+        pending.pop()
+        if block.hash not in engine.snapshot and engine.execute(DAG.add_synced_block, block):
+            added += 1
+    return added
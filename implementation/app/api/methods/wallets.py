@@ -2,6 +2,96 @@
 
 import oqs # type: ignore
 import base64
+import binascii
+import multiprocessing
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from hashlib import sha256
+from queue import Empty, SimpleQueue
+from typing import List, Optional, Sequence, Tuple, Union
+
+from app.api.config.env import SIGNATURE_CACHE_SIZE, PUBLIC_KEY_CACHE_SIZE, SIGNATURE_WORKERS, SIGNATURE_BATCH_THRESHOLD
+
+SIGNATURE_ALGORITHM = "Dilithium2"
+ADDRESS_LENGTH = 64 # Hexadecimal sha256 of the raw public key
+_HEXADECIMAL = frozenset("0123456789abcdef")
+
+class LRUCache:
+    """
+    Bounded, thread safe least recently used cache.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# Verification results keyed by (message digest, signature digest, key id)
+verification_cache = LRUCache(SIGNATURE_CACHE_SIZE)
+
+# Verifier contexts are reused instead of opening one per verification
+_verifiers: SimpleQueue = SimpleQueue()
+
+# Worker processes for batch verification, created with the API (or on first use, outside of it).
+# They are spawned, not forked: the node already runs threads and holds SQLite connections,
+# whose locks and state a forked child would inherit in whatever state they were in
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+def start_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the batch verification process pool, creating it if it does not exist yet.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=SIGNATURE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+def shutdown_process_pool() -> None:
+    """
+    Stop the batch verification worker processes.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+
+@contextmanager
+def _verifier():
+    """
+    Borrow a verifier context from the pool, creating one if none is free.
+    """
+    try:
+        verifier = _verifiers.get_nowait()
+    except Empty:
+        verifier = oqs.Signature(SIGNATURE_ALGORITHM)
+    try:
+        yield verifier
+    finally:
+        _verifiers.put(verifier)
 
 def encode(data):
     """
@@ -15,12 +105,37 @@ def decode(data):
     """
     return base64.b64decode(data)
 
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def decode_public_key(public_key: str) -> bytes:
+    """
+    Decode a Base64 public key, caching the result.
+    """
+    return decode(public_key)
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def key_id(public_key: str) -> str:
+    """
+    Get the id of a Base64 public key (sha256 of the raw key bytes).
+    """
+    return sha256(decode_public_key(public_key)).hexdigest()
+
+def is_address(value: str) -> bool:
+    """
+    Tell a wallet address (hexadecimal key id) apart from a Base64 public key.
+    """
+    return len(value) == ADDRESS_LENGTH and all(char in _HEXADECIMAL for char in value)
+
+def address(public_key: str) -> str:
+    """
+    Get the address of a wallet (its key id) from its public key. Addresses are returned as they are.
+    """
+    return public_key if is_address(public_key) else key_id(public_key)
+
 def generate_keypair():
     """
     Generate a new post-quantum public-private key pair.
     """
-    sigalg = "Dilithium2"
-    with oqs.Signature(sigalg) as signer:
+    with oqs.Signature(SIGNATURE_ALGORITHM) as signer:
         public_key = signer.generate_keypair()
         secret_key = signer.export_secret_key()
         return encode(secret_key), encode(public_key)
@@ -29,30 +144,74 @@ def sign_transaction(transaction_hash, secret_key):
     """
     Sign a transaction with a post-quantum private key.
     """
-    sigalg = "Dilithium2"
-    signature = None
     secret_key = decode(secret_key)
     
-    with oqs.Signature(sigalg) as signer:
-        with oqs.Signature(sigalg) as verifier:
-            signer = oqs.Signature(sigalg, secret_key)
-
-            # signer signs the message
-            signature = signer.sign(transaction_hash.encode())
+    with oqs.Signature(SIGNATURE_ALGORITHM, secret_key) as signer:
+        # signer signs the message
+        signature = signer.sign(transaction_hash.encode())
 
     return encode(signature)
     
-def verify_signature(transaction_hash, signature, public_key):
+def raw_signature(signature) -> bytes:
     """
-    Verify the signature of a transaction with a post-quantum public key.
+    Get the raw bytes of a signature given as raw bytes (ledger records) or Base64 (API models).
     """
-    sigalg = "Dilithium2"
-    is_valid = False
-    public_key = decode(public_key)
-    signature = decode(signature)
-    with oqs.Signature(sigalg) as signer:
-        with oqs.Signature(sigalg) as verifier:
-            # verifier verifies the signature
-            is_valid = verifier.verify(transaction_hash, signature, public_key)
+    return signature if isinstance(signature, bytes) else decode(signature)
+
+def _verify_item(verifier, message: bytes, signature: bytes, public_key: bytes) -> bool:
+    """
+    Verify one item, which is invalid if the verifier refuses it (e.g. a key or signature of the wrong length).
+    """
+    try:
+        return verifier.verify(message, signature, public_key)
+    except (ValueError, RuntimeError):
+        return False
+
+def _verify_chunk(items: Sequence[Tuple[bytes, bytes, bytes]]) -> List[bool]:
+    """
+    Verify a chunk of (message, raw signature, raw public key) items with a single verifier.
+    Runs inside the worker processes, so it only takes picklable bytes.
+    """
+    with _verifier() as verifier:
+        return [_verify_item(verifier, message, signature, public_key) for message, signature, public_key in items]
+
+def verify_signatures(items: Sequence[Tuple[bytes, Union[bytes, str], str]]) -> List[bool]:
+    """
+    Verify a batch of (message, signature, public key) items, returning one result per item.
+    Signatures are raw bytes or Base64.
+
+    Cached results are answered directly; the rest are fanned out to the worker processes
+    when the batch is large enough to be worth it, and verified in process otherwise.
+    """
+    results: List[Optional[bool]] = [None] * len(items)
+    pending: dict = {} # cache key -> (raw item, indexes)
+    for index, (transaction_hash, signature, public_key) in enumerate(items):
+        try:
+            signature = raw_signature(signature)
+            cache_key = (sha256(transaction_hash).digest(), sha256(signature).digest(), key_id(public_key))
+        except (binascii.Error, ValueError):
+            results[index] = False # Malformed signature or public key
+            continue
+        is_valid = verification_cache.get(cache_key)
+        if is_valid is not None:
+            results[index] = is_valid
+        elif cache_key in pending:
+            pending[cache_key][1].append(index)
+        else:
+            pending[cache_key] = ((transaction_hash, signature, decode_public_key(public_key)), [index])
+
+    if pending:
+        cache_keys = list(pending)
+        raw_items = [pending[cache_key][0] for cache_key in cache_keys]
+        if len(raw_items) < SIGNATURE_BATCH_THRESHOLD or SIGNATURE_WORKERS <= 1:
+            verified = _verify_chunk(raw_items)
+        else:
+            chunk_size = -(-len(raw_items) // (SIGNATURE_WORKERS * 4))
+            chunks = [raw_items[i:i + chunk_size] for i in range(0, len(raw_items), chunk_size)]
+            verified = [is_valid for chunk in start_process_pool().map(_verify_chunk, chunks) for is_valid in chunk]
+        for cache_key, is_valid in zip(cache_keys, verified):
+            verification_cache.put(cache_key, is_valid)
+            for index in pending[cache_key][1]:
+                results[index] = is_valid
 
-    return is_valid
+    return results # type: ignore
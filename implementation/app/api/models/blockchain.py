@@ -5,55 +5,89 @@ import os
 import sys
 
 import requests
-from pympler import asizeof # type: ignore
-import networkx as nx # type: ignore
+import networkx as nx # type: ignore # Only to read the legacy JSON file
 
 from random import choice
 from datetime import datetime
 from hashlib import sha256
-from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 
-from app.api.methods.wallets import verify_signature
+from app.api.methods.wallets import address, verify_signatures
+from app.api.methods.accounts import AccountState, open_account_state
+from app.api.methods.block_log import BlockLog
+from app.api.methods.checkpoints import save_checkpoint, load_latest_checkpoint
+from app.api.methods.codec import encode_block_digest
+from app.api.methods.codec import is_binary, payload_kind, KIND_COMPACT_BLOCK
 
 from app.api.models.transaction import Transaction
+from app.api.models.records import BlockRecord, TransactionRecord
+from app.api.models.dag_store import BlockState, DAGStore
+from app.api.models.mempool import Mempool, PendingTransactions
+from app.api.models.tips import TipIndex
 
 from app.api.config.env import API_NAME, GENESIS_PUBLIC_KEY, SEBASTIAN_PUBLIC_KEY, LOCALHOST_SERVER_URL, PRODUCTION_SERVER_URL, IS_PRODUCTION
+from app.api.config.env import BLOCK_LOG_PATH, BLOCK_LOG_SEGMENT_MB, BLOCK_LOG_GROUP_COMMIT_MS, BLOCK_LOG_COMPACTION_INTERVAL_S
+from app.api.config.env import CHECKPOINT_PATH, CHECKPOINT_INTERVAL_BLOCKS, CHECKPOINT_RETAIN
+from app.api.config.env import ACCOUNT_STATE_BACKEND, ACCOUNT_STATE_PATH, ACCOUNT_CACHE_SIZE
+from app.api.config.env import PENDING_MAX_PER_SENDER, PENDING_MAX_TRANSACTIONS, PENDING_TTL_S
+from app.api.config.outbox import outbox
+from app.api.config.keys import key_registry
 
 class Block(BaseModel):
     """
     Block Model
 
+    A block is sealed once it is built or received: its canonical bytes and its hash
+    are computed a single time on construction, and any later mutation is rejected.
+
     Args:
     - index: int
-    - transactions: List[Transaction]
+    - transactions: Tuple[Transaction, ...]
     - nonce: int
-    - children_hashes: List[str]
+    - children_hashes: Tuple[str, ...]
     - timestamp: datetime
     """
     index: int = Field(default=..., description="The index of the block")
-    transactions: List[Transaction] = Field(default=..., description="The list of transactions in the block")
+    transactions: Tuple[Transaction, ...] = Field(default=..., description="The list of transactions in the block")
     nonce: int = Field(default=0, description="The nonce of the block")
-    children_hashes: List[str] = Field(default=[], description="The list of children hashes of the block")
+    children_hashes: Tuple[str, ...] = Field(default=(), description="The list of children hashes of the block")
     timestamp: datetime = Field(default=datetime.now(), description="The timestamp of the block")
 
+    # Sealed content, computed once in __init__
+    _canonical_bytes: bytes = PrivateAttr()
+    _hash: str = PrivateAttr()
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # The hash covers the block header and the ids of its transactions
+        self._canonical_bytes = encode_block_digest(self)
+        self._hash = sha256(self._canonical_bytes).hexdigest()
+
+    @property
+    def canonical_bytes(self) -> bytes:
+        """
+        The canonical (hashed) representation of the block.
+        """
+        return self._canonical_bytes
+
     @property
     def hash(self) -> str:
-        block_content = json.dumps({
-            "index": self.index,
-            "transactions": [tx.to_dict() for tx in self.transactions],
-            "nonce": self.nonce,
-            "children_hashes": self.children_hashes,
-            "timestamp": self.timestamp.isoformat()
-        }, sort_keys=True).encode('utf-8')
-        return sha256(block_content).hexdigest()
+        return self._hash
+
+    def to_record(self) -> BlockRecord:
+        """
+        The compact record of the block held by the ledger, reusing the computed hash and ids.
+        """
+        transactions = (tx.to_record() for tx in self.transactions)
+        return BlockRecord(self.index, transactions, self.nonce, self.children_hashes, self.timestamp, self._hash)
     
     def to_dict(self):
         return {
             "index": self.index,
             "transactions": [tx.to_dict() for tx in self.transactions],
             "nonce": self.nonce,
-            "children_hashes": self.children_hashes,
+            "children_hashes": list(self.children_hashes),
             "timestamp": self.timestamp.isoformat()
         }
 
@@ -63,8 +97,10 @@ class Block(BaseModel):
 
         Args:
         - arbitrary_types_allowed: bool
+        - allow_mutation: bool
         """
         arbitrary_types_allowed = True
+        allow_mutation = False
         schema_extra = {
             "example": {
                 "index": 0,
@@ -88,52 +124,71 @@ class DAG(BaseModel):
     Directed Acyclic Graph (DAG) Model
 
     Args:
-    - graph: nx.DiGraph
-    - balances: Dict[str, float]
-    - nonces: Dict[str, int]
-    - unconfirmed_transactions: List[Transaction]
+    - graph: DAGStore
+    - tips: TipIndex
+    - accounts: AccountState
+    - unconfirmed_transactions: Mempool
+    - pending_transactions: PendingTransactions
+    - block_log: Optional[BlockLog]
+    - unapplied_blocks: Set[str]
+    - touched_accounts: Set[str]
+    - confirmations_since_checkpoint: int
     - json_file_path: str
+    - block_log_path: str
+    - checkpoint_path: str
+    - checkpoint_interval: int
     - block_mb_size_limit: int
     - minimal_degree: int
+    - tip_selection_limit: int
+    - tip_selection_policy: str
     - decimal_places: int
     """
     # State
-    graph: nx.DiGraph = Field(default_factory=nx.DiGraph, description="The Directed Acyclic Graph (DAG)")
-    balances: Dict[str, int] = Field(default={
-        GENESIS_PUBLIC_KEY: 100000 # That's 1000.00 in the decimal_places
-    }, description="The balances of the wallets")
-    nonces: Dict[str, int] = Field(default_factory=dict, description="The nonces of the wallets")
+    graph: DAGStore = Field(default_factory=DAGStore, description="The Directed Acyclic Graph (DAG), with its blocks in a topological order")
+    tips: TipIndex = Field(default_factory=TipIndex, description="The index of blocks referenced less than minimal_degree times")
+    accounts: AccountState = Field(default_factory=lambda: open_account_state(ACCOUNT_STATE_BACKEND, ACCOUNT_STATE_PATH, ACCOUNT_CACHE_SIZE),
+                                   description="The balances and nonces of the wallets")
 
     # Temporary state
-    unconfirmed_transactions: List[Transaction] = Field(default_factory=list, description="The list of unconfirmed transactions")
+    unconfirmed_transactions: Mempool = Field(default_factory=Mempool, description="The pool of unconfirmed transactions")
+    pending_transactions: PendingTransactions = Field(default_factory=lambda: PendingTransactions(PENDING_MAX_PER_SENDER, PENDING_MAX_TRANSACTIONS, PENDING_TTL_S),
+                                                      description="The transactions waiting for the ones filling their nonce gap")
+
+    # Storage
+    block_log: Optional[BlockLog] = Field(None, description="The append-only log where the blocks are stored")
+    unapplied_blocks: Set[str] = Field(default_factory=set, description="The confirmed blocks whose transactions could not be applied")
+    touched_accounts: Set[str] = Field(default_factory=set, description="The accounts whose balance or nonce changed since the last snapshot")
+    confirmations_since_checkpoint: int = Field(0, description="The number of blocks confirmed since the last checkpoint")
 
     # Configurations
-    json_file_path: str = Field(default='app/api/shared/blockchain.json', description="The path to the JSON file")
+    json_file_path: str = Field(default='app/api/shared/blockchain.json', description="The path to the legacy JSON file, migrated to the block log")
+    block_log_path: str = Field(default=BLOCK_LOG_PATH, description="The directory of the block log")
+    checkpoint_path: str = Field(default=CHECKPOINT_PATH, description="The directory of the state checkpoints")
+    checkpoint_interval: int = Field(CHECKPOINT_INTERVAL_BLOCKS, description="The number of confirmed blocks between checkpoints")
     block_mb_size_limit: int = Field(1, description="The size limit of a block in MB")
     minimal_degree: int = Field(3, description="The minimal degree of a block")
+    tip_selection_limit: int = Field(8, description="The maximum number of children referenced by a new block")
+    tip_selection_policy: str = Field(TipIndex.OLDEST, description="The tip selection policy (oldest or least_confirmed)")
     decimal_places: int = Field(2, description="The number of decimal places for the balances")
 
     # Neighbors
     neighbors: List[str] = Field(default=[PRODUCTION_SERVER_URL if int(IS_PRODUCTION) else LOCALHOST_SERVER_URL], description="The list of neighbors URLs") # type: ignore
 
-    def create_block(self) -> Optional[Block]:
+    def create_block(self) -> Optional[BlockRecord]:
         """
         Create a new block from unconfirmed transactions if the limit is reached.
         """
-        actual_block_size = asizeof.asizeof(self.unconfirmed_transactions)
-        # Convertir bytes a megabytes
-        #tamanio_total_mb = actual_block_size / (1024 * 1024)
-        #print(f'Tamaño total en megabytes: {tamanio_total_mb:.20f} MB')
-        if actual_block_size < self.block_mb_size_limit * 1024 * 1024:
+        # The running total is kept up to date by the mempool, so this check is O(1)
+        if self.unconfirmed_transactions.size_bytes < self.block_mb_size_limit * 1024 * 1024:
             return None
 
-        # Select children blocks - simplest case, select randomly from blocks without children
-        children_hashes = [node for node, degree in self.graph.out_degree() if degree < self.minimal_degree]
+        # Select children blocks from the under-confirmed tips, bounded by the selection policy
+        children_hashes = self.tips.select(self.tip_selection_limit, self.tip_selection_policy)
 
         # Create the new block
-        new_block = Block(
+        new_block = BlockRecord(
             index=len(self.graph),
-            transactions=self.unconfirmed_transactions,
+            transactions=tuple(self.unconfirmed_transactions),
             nonce=0, # This could be adjusted based on specific use-case
             children_hashes=children_hashes,
             timestamp=datetime.now()
@@ -142,14 +197,19 @@ class DAG(BaseModel):
         # Add the block to the graph
         if self.add_block(new_block):
             # Remove confirmed transactions
-            # TODO: This could be optimized by using a set instead of a list
-            self.unconfirmed_transactions = [tx for tx in self.unconfirmed_transactions if tx not in new_block.transactions]
+            self.unconfirmed_transactions.remove_many(tx.id for tx in new_block.transactions)
             return new_block
         return None
 
-    def add_block(self, block: Block):
+    def add_block(self, block: BlockRecord, replay: bool = False, sequence: Optional[int] = None, relay: bool = True):
         """
         Add a new block to the DAG, ensuring no cycles are created.
+
+        The block is checked before anything is inserted, and rolled back completely
+        (node, edges and topological position) if one of its edges is refused.
+        Accepted blocks are appended to the block log, unless they are being replayed from it
+        (sequence is then their position in the log). The blocks it confirms are shared with
+        the neighbors if relay.
         """
         # Check if block already exists in the graph
         if block.hash in self.graph:
@@ -157,193 +217,395 @@ class DAG(BaseModel):
             print(f"Block with hash {block.hash} already exists.")
             return False  # or handle differently based on your application needs
 
-        self.graph.add_node(block.hash, block=block)
-        for child_hash in block.children_hashes:
-            if child_hash not in self.graph:
-                return False
-            self.graph.add_edge(child_hash, block.hash)
-            # Validate the child Block
-            child_block = self.graph.nodes[child_hash]['block']
-            if not self.validate_block(child_block):
-                return False
-            # If the child is valid and has been confirmed at least minimal_degree times, process its transactions
-            if self.graph.in_degree(child_hash) == self.minimal_degree:
-                #print("Children hashes:", child_block.children_hashes)
-                self.process_transactions(child_block.transactions)
-                #print(f"Block confirmed: {child_hash}")
-                # Save the block to JSON file
-                self.save_graph_to_json_file(self.json_file_path)
-
-                # Share the block with neighbors
-                for neighbor in self.neighbors:
-                    requests.post(f"{neighbor}api/v1/{API_NAME}/nodes/block/", json=child_block.to_dict())
-        if not nx.is_directed_acyclic_graph(self.graph):
-            self.graph.remove_node(block.hash)
+        children_hashes = list(dict.fromkeys(block.children_hashes))
+        if any(child_hash not in self.graph for child_hash in children_hashes):
             return False
+
+        # Validate the block once, on arrival. Its children were validated on their own arrival
+        if not self.validate_block(block):
+            return False
+
+        self.insert_node(block, BlockState.VALIDATED)
+        for child_hash in children_hashes:
+            if not self.insert_edge(child_hash, block.hash):
+                self.remove_node(block.hash)
+                return False
+        self.update_tips(block.hash, children_hashes)
+        # The nonces of the block are used from now on, as if its transactions had been admitted here
+        self.advance_nonces(block.transactions)
+        if self.pending_transactions:
+            for sender in {tx.sender_address for tx in block.transactions}:
+                self.promote_transactions(sender)
+        if not replay and self.block_log is not None:
+            # The public keys are stored once, in the key registry, before the blocks referring to them
+            key_registry.register({key for tx in block.transactions for key in (tx.sender, tx.recipient)})
+            sequence = self.block_log.append(block.to_compact_bytes())
+
+        confirmed = 0
+        for child_hash in children_hashes:
+            # Confirmation is a counter check on the blocks referencing the child, with no new cryptographic work
+            if self.get_block_state(child_hash) == BlockState.VALIDATED and self.graph.out_degree(child_hash) >= self.minimal_degree:
+                self.confirm_block(child_hash, replay, relay)
+                confirmed += 1
+        if confirmed and sequence is not None:
+            # The writes of all the blocks this one confirmed are committed as one batch
+            self.accounts.commit(sequence, self.unapplied_blocks)
+        if confirmed and not replay:
+            # Only once every block this one confirmed was processed: a checkpoint taken in between
+            # would record the others as applied (they already left the tips) without their transfers
+            self.confirmations_since_checkpoint += confirmed
+            if self.confirmations_since_checkpoint >= self.checkpoint_interval:
+                self.save_checkpoint()
         return True
+
+    def add_synced_block(self, block: BlockRecord) -> bool:
+        """
+        Add a block fetched from a neighbor while syncing. The neighbors already have it,
+        so neither it nor the blocks it confirms are shared with them.
+        """
+        return self.add_block(block, relay=False)
+
+    def confirm_block(self, block_hash: str, replay: bool = False, relay: bool = True) -> None:
+        """
+        Confirm a validated block, apply its transactions and enqueue it for the neighbors if relay.
+        """
+        self.graph.set_state(block_hash, BlockState.CONFIRMED)
+        block = self.graph.block(block_hash)
+        #print("Children hashes:", block.children_hashes)
+        if self.process_transactions(block.transactions): # type: ignore
+            self.graph.set_state(block_hash, BlockState.APPLIED)
+        else:
+            self.unapplied_blocks.add(block_hash)
+        #print(f"Block confirmed: {block_hash}")
+        if replay or not relay:
+            return
+
+        # Share the block with neighbors, delivered in the background by the outbox
+        payload = block.to_bytes()
+        for neighbor in self.neighbors:
+            outbox.enqueue(neighbor, "nodes/block/", payload)
+
+    def get_block_state(self, block_hash: str) -> Optional[BlockState]:
+        """
+        Get the lifecycle state of a block, or None if the block is unknown.
+        """
+        return self.graph.state(block_hash)
+
+    @property
+    def next_topological_position(self) -> int:
+        """
+        The topological position given to the next block added to the DAG.
+        """
+        return self.graph.next_position
+
+    def insert_node(self, block: BlockRecord, state: BlockState = BlockState.RECEIVED) -> None:
+        """
+        Insert a block node at the end of the topological order.
+        """
+        self.graph.add(block, state)
+
+    def update_tips(self, block_hash: str, children_hashes: List[str]) -> None:
+        """
+        Register a fully inserted block as a tip and count its references to its children.
+        """
+        self.tips.add(block_hash)
+        for child_hash in children_hashes:
+            self.tips.increment(child_hash, self.minimal_degree)
+
+    def remove_node(self, block_hash: str) -> None:
+        """
+        Remove the last inserted block node, its edges and its topological position.
+        """
+        self.graph.remove_last(block_hash)
+
+    def insert_edge(self, source: str, target: str) -> bool:
+        """
+        Insert an edge from a block to a block inserted after it.
+        Returns False, without inserting the edge, if it could create a cycle.
+        """
+        return self.graph.add_edge(source, target)
     
-    def validate_block(self, block: Block) -> bool:
+    def validate_block(self, block: BlockRecord) -> bool:
         """
         Validate a block by checking its hash and the transactions it contains.
         """
-        for tx in block.transactions:
-            # Verify the transaction signature
-            if not verify_signature(f"{tx.sender}{tx.recipient}{tx.amount}{tx.nonce}".encode(), tx.signature, tx.sender):
-                return False
+        # Verify all the transaction signatures as one batch
+        if not all(verify_signatures([(tx.message, tx.signature, tx.sender) for tx in block.transactions])):
+            return False
         # Verify the block hash
         return block.hash == block.hash
 
-    def add_transaction(self, transaction: Transaction) -> bool:
+    def admit_transactions(self, transactions: List[TransactionRecord]) -> List[Optional[str]]:
         """
-        Add a new transaction to the unconfirmed transactions list.
+        Admit a batch of transactions with verified signatures, in order (see methods/ingestion.py).
+
+        Every transaction is checked against the nonces and balances and added to the mempool,
+        and a block is created at most once for the batch.
+        Returns, for each transaction, None if it was accepted or the reason it was rejected.
         """
-        # Check if the nonce is correct (if is the next one in the sequence)
-        if transaction.sender in self.nonces and transaction.nonce != self.nonces[transaction.sender] + 1:
-            return False
+        results = [self.admit_transaction(tx) for tx in transactions]
+
+        if any(result is None for result in results):
+            created_block = self.create_block()
+            if created_block:
+                print(f"Block created: {created_block.hash}")
+
+        return results
+
+    def admit_transaction(self, transaction: TransactionRecord) -> Optional[str]:
+        """
+        Check a transaction against the nonces and balances and add it to the mempool,
+        or queue it if its nonce is ahead of the next one of its sender.
+        The queued transactions of the sender that become next in sequence are promoted.
+        Returns None if it was admitted or queued, or the reason it was rejected.
+        """
+        result = self.admit_next_transaction(transaction)
+        if result is None:
+            self.promote_transactions(transaction.sender_address)
+        return result
+
+    def admit_next_transaction(self, transaction: TransactionRecord) -> Optional[str]:
+        """
+        Check a transaction against the nonces and balances and add it to the mempool,
+        without promoting the queued transactions of its sender.
+        Returns None if it was admitted or queued, or the reason it was rejected.
+        """
+        # Check if the nonce is correct (if is the next one in the sequence, a later one waits for the gap to fill)
+        sender = transaction.sender_address
+        nonce = self.accounts.nonce(sender)
+        if nonce is not None and transaction.nonce <= nonce:
+            return "Invalid nonce."
         # Check if the sender has enough balance
-        if transaction.sender not in self.balances:
-            return False
-        if self.balances[transaction.sender] < transaction.amount:
-            return False
+        balance = self.accounts.balance(sender)
+        if balance is None:
+            return "Unknown sender."
+        if balance < transaction.amount:
+            return "Insufficient balance."
+        if nonce is not None and transaction.nonce > nonce + 1:
+            return self.pending_transactions.add(transaction, nonce + 1)
         
-        self.unconfirmed_transactions.append(transaction)
+        if not self.unconfirmed_transactions.add(transaction):
+            return "Duplicated transaction."
         
-        # Update the nonces
-        self.nonces[transaction.sender] = self.nonces.get(transaction.sender, 0) + 1
-
-        created_block = self.create_block()
-        if created_block:
-            print(f"Block created: {created_block.hash}")
+        # Update the nonces, the same way applying a confirmed block does
+        self.accounts.advance_nonce(sender, transaction.nonce)
+        self.touched_accounts.add(sender)
+        return None
 
-        return True
+    def promote_transactions(self, sender: str) -> None:
+        """
+        Admit the queued transactions of a sender (by address) that are next in sequence, in nonce order.
+        A promoted transaction that is rejected (e.g. insufficient balance by now) is dropped.
+        """
+        nonce = self.accounts.nonce(sender)
+        if nonce is None or sender not in self.pending_transactions.senders:
+            return
+        self.pending_transactions.discard_used(sender, nonce)
+        while True:
+            transaction = self.pending_transactions.pop(sender, nonce + 1)
+            if transaction is None or self.admit_next_transaction(transaction) is not None:
+                return
+            nonce += 1
 
-    def process_transactions(self, transactions: List[Transaction]) -> bool:
+    def advance_nonces(self, transactions: Iterable[TransactionRecord]) -> None:
         """
-        Process a list of transactions, updating the balances accordingly.
+        Advance the nonces of the senders of a list of transactions.
         """
-        temp_balances = self.balances.copy()
         for tx in transactions:
-            if temp_balances.get(tx.sender, 0) < tx.amount:
-                return False  # Insufficient funds
-            temp_balances[tx.sender] -= tx.amount
-            temp_balances[tx.recipient] = temp_balances.get(tx.recipient, 0) + tx.amount
-        self.balances = temp_balances
+            self.accounts.advance_nonce(tx.sender_address, tx.nonce)
+            self.touched_accounts.add(tx.sender_address)
+
+    def process_transactions(self, transactions: List[TransactionRecord]) -> bool:
+        """
+        Process a list of transactions, updating the balances and nonces accordingly, all or nothing.
+        """
+        if not self.accounts.apply_transactions(transactions):
+            return False  # Insufficient funds
+        self.touched_accounts.update(account for tx in transactions for account in (tx.sender_address, tx.recipient_address))
         return True
     
     # Blockchain route methods
-    def get_unconfirmed_blocks(self) -> List[Block]:
+    def get_unconfirmed_blocks(self) -> List[dict]:
         """
         Get blocks (nodes) with less than umbral confirmations (node fathers).
         """
-        return [self.graph.nodes[node] for node in self.graph.nodes if self.graph.in_degree(node) < 2]
+        return [self.graph.node(node) for node in self.tips.degrees]
     
-    def get_block_by_hash(self, block_hash: str) -> Optional[Block]:
+    def get_block_by_hash(self, block_hash: str) -> Optional[dict]:
         """
-        Get a block by its hash.
+        Get a block (node: block and state) by its hash.
         """
-        return self.graph.nodes.get(block_hash, None)
-    
-    def get_wallet_balance(self, public_key: str) -> Optional[int]:
+        return self.graph.node(block_hash)
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Tuple[int, BlockRecord, BlockState]]:
         """
-        Get the balance of a wallet.
+        Iterate (position, block, state) in topological order, from the position start on.
+
+        Positions are walked one by one, so the memory used does not depend on the size of
+        the DAG and blocks added meanwhile are included. A position can be used as a cursor
+        to resume the iteration after it.
         """
-        return self.balances.get(public_key, 0) / (10 ** self.decimal_places)
+        return self.graph.iter_positions(start)
 
-    def save_graph_to_json_file(self, file_path) -> None:
+    def get_wallet_balance(self, wallet: str) -> Optional[int]:
         """
-        Save the blockchain to a JSON file.
+        Get the balance of a wallet, by public key or address.
         """
-        # Get the data from the graph
-        data = nx.node_link_data(self.graph)
-        # Convert all Block objects to dictionaries
-        for node in data['nodes']:
-            if 'block' in node:
-                node['block'] = node['block'].to_dict()
-        # Write the data to the file
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
+        return (self.accounts.balance(address(wallet)) or 0) / (10 ** self.decimal_places)
 
     def load_graph_from_json_file(self, file_path) -> None:
         """
-        Load the blockchain from a JSON file and reevaluate all transactions.
-        """
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-            graph = nx.node_link_graph(data)
-            
-            # Initialize the blockchain state
-            self.graph = nx.DiGraph()
-            self.balances = {
-                GENESIS_PUBLIC_KEY: 100000 # type: ignore
-            } # Reset the balances
-            self.nonces = {}
-            
-            self.recreate_blockchain_from_graph(graph)
+        Load the blockchain from the block log and reevaluate all transactions.
+
+        A legacy JSON file found at file_path is migrated into the block log on first start.
+        """
+        # Initialize the blockchain state
+        self.graph = DAGStore()
+        self.tips = TipIndex()
+        self.unapplied_blocks = set()
+
+        if self.block_log is None:
+            self.block_log = BlockLog(self.block_log_path,
+                                      segment_size=BLOCK_LOG_SEGMENT_MB * 1024 * 1024,
+                                      group_commit_interval=BLOCK_LOG_GROUP_COMMIT_MS / 1000,
+                                      compaction_interval=BLOCK_LOG_COMPACTION_INTERVAL_S)
+        if self.block_log.is_empty() and os.path.exists(file_path):
+            self.migrate_json_file(file_path)
+
+        # Blocks up to the restored state are inserted without validation, the rest are replayed
+        restore_sequence, frontier = -1, {}
+        from_accounts = self.accounts.persistent and 0 <= self.accounts.sequence < self.block_log.next_sequence
+        if from_accounts:
+            # A persistent account state is its own checkpoint, at the position of its last commit
+            restore_sequence = self.accounts.sequence
+            frontier = dict.fromkeys(self.accounts.unapplied_blocks, BlockState.CONFIRMED)
+            print(f"Restoring the blockchain from the account state at block log position {restore_sequence}.")
         else:
-            # If the file does not exist, initialize a new blockchain
-            self.graph = nx.DiGraph()
-            print("No existing blockchain found. A new blockchain has been initialized.")
+            if self.accounts.sequence >= self.block_log.next_sequence:
+                print("The account state is ahead of the block log, rebuilding it.")
+            checkpoint = None if self.block_log.is_empty() else load_latest_checkpoint(self.checkpoint_path, self.block_log.next_sequence - 1)
+            if checkpoint is not None:
+                restore_sequence, frontier = checkpoint["sequence"], checkpoint["frontier"]
+                self.accounts.reset(*self.checkpoint_accounts(checkpoint), restore_sequence)
+                print(f"Restoring the blockchain from the checkpoint at block log position {restore_sequence}.")
+            else:
+                self.accounts.reset({
+                    address(GENESIS_PUBLIC_KEY): 100000 # type: ignore # That's 1000.00 in the decimal_places
+                }, {}) # Reset the balances
 
-    def recreate_blockchain_from_graph(self, graph: nx.DiGraph) -> None:
-        # Order the nodes in topological order
-        try:
-            nodes_in_order = list(nx.topological_sort(graph))
-        except nx.NetworkXUnfeasible:
-            print("Cyclic dependencies detected in the blockchain graph.")
+        if self.block_log.is_empty():
+            print("No existing blockchain found. A new blockchain has been initialized.")
             return
-        
-        # Process the blocks in order
-        for node in nodes_in_order:
-            block_data = graph.nodes[node]['block']
-            block = Block(**block_data)
-            print(f"Processing block {block.index} with hash {block.hash}")
-            self.process_block(block)
-            self.graph.add_node(block.hash, block=block)
-            for child_hash in block.children_hashes:
-                if child_hash in self.graph:
-                    self.graph.add_edge(block.hash, child_hash)
-                    
-        print("Blockchain successfully reconstructed from the file.")
-
-    def process_block(self, block: Block) -> None:
-        """
-        Process a single block, verifying transactions and updating state.
-        """
-        for tx in block.transactions:
-            # Verify the transaction
-            if self.validate_transaction(tx):
-                self.apply_transaction(tx)
+
+        legacy_hashes: Dict[str, str] = {}
+        for sequence, payload in self.block_log.read():
+            if sequence > restore_sequence:
+                break
+            block = self.decode_logged_block(payload, legacy_hashes)
+            self.restore_block(block, BlockState(frontier.get(block.hash, BlockState.APPLIED)))
+        if from_accounts:
+            # Blocks still referenced less than minimal_degree times were not confirmed when the state was committed
+            for block_hash in self.tips.degrees:
+                self.graph.set_state(block_hash, BlockState.VALIDATED)
+                self.advance_nonces(self.graph.block(block_hash).transactions) # type: ignore
+
+        replayed = 0
+        for sequence, payload in self.block_log.read(restore_sequence + 1):
+            block = self.decode_logged_block(payload, legacy_hashes)
+            if self.add_block(block, replay=True, sequence=sequence):
+                replayed += 1
             else:
-                #print(f"Transaction in block {block.index} is invalid: {tx}")
-                return
+                print(f"Block {block.index} with hash {block.hash} could not be replayed.")
+        print(f"Blockchain successfully reconstructed from the block log ({replayed} blocks replayed).")
+
+    @staticmethod
+    def decode_logged_block(payload: bytes, legacy_hashes: Dict[str, str]) -> BlockRecord:
+        """
+        Decode a block log record.
 
-    def validate_transaction(self, tx: Transaction) -> bool:
+        Records are compact blocks, or full binary blocks when written before the key registry.
+        Records written before the binary codec hold the JSON of the block, whose hash was the sha256
+        of that JSON. Their children hashes are translated through legacy_hashes (filled as the records
+        are read, in order) so they reference the blocks by their current hash.
         """
-        Validate a transaction's signature and check balances and nonces.
+        if payload_kind(payload) == KIND_COMPACT_BLOCK:
+            return BlockRecord.from_compact_bytes(payload)
+        if is_binary(payload):
+            return BlockRecord.from_bytes(payload)
+        return BlockRecord.from_legacy_dict(json.loads(payload), sha256(payload).hexdigest(), legacy_hashes)
+
+    @staticmethod
+    def checkpoint_accounts(checkpoint: dict) -> Tuple[Dict[str, int], Dict[str, int]]:
         """
-        # Verify the signature
-        if not verify_signature(f"{tx.sender}{tx.recipient}{tx.amount}{tx.nonce}".encode(), tx.signature, tx.sender):
-            #print("\nInvalid signature")
-            return False
-        # Verify the nonce
-        if tx.sender in self.nonces and tx.nonce != self.nonces[tx.sender] + 1:
-            #print("\nInvalid nonce")
-            #print(f"Expected nonce: {self.nonces[tx.sender] + 1}, got: {tx.nonce}")
-            return False
-        # Verify the balance
-        if self.balances.get(tx.sender, 0) < tx.amount:
-            #print("\nInsufficient funds")
-            return False
-        return True
+        Get the balances and nonces of a checkpoint by address. Version 2 checkpoints are keyed by public key.
+        """
+        if checkpoint["version"] == 2:
+            return ({address(key): balance for key, balance in checkpoint["balances"].items()},
+                    {address(key): nonce for key, nonce in checkpoint["nonces"].items()})
+        return checkpoint["balances"], checkpoint["nonces"]
 
-    def apply_transaction(self, tx: Transaction) -> None:
+    def restore_block(self, block: BlockRecord, state: BlockState) -> None:
         """
-        Apply a transaction to the blockchain state.
+        Insert a block covered by a checkpoint, with its recorded state and without validating it again.
+        The nonces of a block not applied yet are advanced as on its arrival (they are not checkpointed).
         """
-        self.balances[tx.sender] -= tx.amount
-        self.balances[tx.recipient] = self.balances.get(tx.recipient, 0) + tx.amount
-        self.nonces[tx.sender] = tx.nonce
+        self.insert_node(block, state)
+        if state == BlockState.CONFIRMED:
+            self.unapplied_blocks.add(block.hash)
+        if state != BlockState.APPLIED:
+            self.advance_nonces(block.transactions)
+        children_hashes = [child_hash for child_hash in dict.fromkeys(block.children_hashes) if child_hash in self.graph]
+        for child_hash in children_hashes:
+            self.insert_edge(child_hash, block.hash)
+        self.update_tips(block.hash, children_hashes)
+
+    def save_checkpoint(self) -> None:
+        """
+        Checkpoint the balances, nonces and DAG frontier at the current block log position.
+
+        The frontier is the state of every block not applied yet (the tips and the confirmed blocks
+        that could not be applied); all the other blocks are applied.
+        """
+        if self.block_log is None or self.block_log.is_empty():
+            return
+        if self.accounts.persistent:
+            # The account state is committed with every confirming block, and restored from itself
+            self.confirmations_since_checkpoint = 0
+            return
+        # The checkpoint must never reference blocks that are not durable yet
+        self.block_log.sync()
+        frontier = {block_hash: BlockState.CONFIRMED for block_hash in self.unapplied_blocks}
+        for block_hash in self.tips.degrees:
+            state = self.graph.state(block_hash)
+            if state != BlockState.APPLIED:
+                frontier[block_hash] = state
+        balances, nonces = self.accounts.export()
+        save_checkpoint(self.checkpoint_path, self.block_log.next_sequence - 1, {
+            "balances": balances,
+            "nonces": nonces,
+            "frontier": frontier
+        }, retain=CHECKPOINT_RETAIN)
+        self.confirmations_since_checkpoint = 0
+
+    def migrate_json_file(self, file_path) -> None:
+        """
+        Append the blocks of a legacy JSON file to the block log, in topological order.
+        """
+        with open(file_path, 'r') as file:
+            graph = nx.node_link_graph(json.load(file))
+        try:
+            nodes_in_order = list(nx.topological_sort(graph))
+        except nx.NetworkXUnfeasible:
+            print("Cyclic dependencies detected in the blockchain graph.")
+            return
+
+        legacy_hashes: Dict[str, str] = {}
+        for node in nodes_in_order:
+            block = BlockRecord.from_legacy_dict(graph.nodes[node]['block'], node, legacy_hashes)
+            self.block_log.append(block.to_bytes()) # type: ignore
+        self.block_log.sync() # type: ignore
+        os.replace(file_path, f"{file_path}.migrated")
+        print(f"Migrated {len(nodes_in_order)} blocks from {file_path} to the block log.")
 
     def get_neighbors(self) -> List[str]:
         """
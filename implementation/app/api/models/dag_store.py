@@ -0,0 +1,283 @@
+# models/dag_store.py
+
+import numpy as np
+
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.api.models.records import BlockRecord
+
+"""
+Array backed storage of the DAG.
+
+Blocks get consecutive integer ids in insertion order. The per block data (state, degrees,
+topological position) lives in NumPy arrays indexed by id, grown by doubling, and a single
+dict maps the block hashes to their ids. Edges are kept in both directions as CSR arrays
+(offsets + int32 targets) for the edges up to the last compaction, plus small append buffers
+for the newer ones, merged into the CSR arrays once they grow past a fraction of them.
+
+Edges follow the direction of the references: an edge goes from a block to every block
+that references it, so the out degree of a block is the number of blocks confirming it.
+"""
+
+INITIAL_CAPACITY = 1024
+# Buffered edges are merged into the CSR arrays past this fraction of the stored edges
+COMPACTION_RATIO = 8
+COMPACTION_MIN_EDGES = 4096
+
+class BlockState(str, Enum):
+    """
+    Lifecycle of a block in the DAG.
+
+    - received: the block arrived but was not validated yet.
+    - validated: signatures and structure were checked, once, on arrival.
+    - confirmed: the block is referenced by at least minimal_degree blocks.
+    - applied: the block transactions were applied to the balances.
+    """
+    RECEIVED = "received"
+    VALIDATED = "validated"
+    CONFIRMED = "confirmed"
+    APPLIED = "applied"
+
+# States are stored as one byte per block, their index in this tuple
+STATES: Tuple[BlockState, ...] = tuple(BlockState)
+STATE_CODES: Dict[BlockState, int] = {state: code for code, state in enumerate(STATES)}
+
+def _grow(array: np.ndarray, size: int, fill: int = 0) -> np.ndarray:
+    """
+    Get an array able to hold size items, doubling its capacity if needed.
+    """
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class _Adjacency:
+    """
+    Adjacency lists of one direction: CSR arrays for the compacted edges and an append buffer.
+
+    Args:
+    - offsets: np.ndarray (int64, the lists of the nodes before the last compaction)
+    - targets: np.ndarray (int32)
+    - buffer: Dict[int, List[int]] (edges added since the last compaction)
+    """
+    __slots__ = ('offsets', 'targets', 'buffer', 'buffered')
+
+    def __init__(self) -> None:
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.buffer: Dict[int, List[int]] = {}
+        self.buffered = 0
+
+    def neighbors(self, node: int) -> List[int]:
+        compacted: List[int] = []
+        if node + 1 < len(self.offsets):
+            compacted = self.targets[self.offsets[node]:self.offsets[node + 1]].tolist()
+        return compacted + self.buffer.get(node, [])
+
+    def add(self, source: int, target: int) -> None:
+        self.buffer.setdefault(source, []).append(target)
+        self.buffered += 1
+
+    def remove(self, source: int, target: int) -> None:
+        """
+        Remove an edge still in the buffer.
+        """
+        targets = self.buffer[source]
+        targets.remove(target)
+        if not targets:
+            del self.buffer[source]
+        self.buffered -= 1
+
+    def needs_compaction(self) -> bool:
+        return self.buffered > max(COMPACTION_MIN_EDGES, len(self.targets) // COMPACTION_RATIO)
+
+    def compact(self, nodes: int) -> None:
+        """
+        Merge the buffered edges into the CSR arrays, for nodes nodes.
+        """
+        counts = np.zeros(nodes, dtype=np.int64)
+        compacted_counts = np.diff(self.offsets)
+        counts[:len(compacted_counts)] = compacted_counts
+        for source, targets in self.buffer.items():
+            counts[source] += len(targets)
+        offsets = np.zeros(nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        targets = np.empty(offsets[-1], dtype=np.int32)
+        # Compacted lists move as slices, buffered edges are appended after them
+        if len(compacted_counts):
+            sources = np.repeat(np.arange(len(compacted_counts)), compacted_counts)
+            ranks = np.arange(len(self.targets)) - np.repeat(self.offsets[:-1], compacted_counts)
+            targets[offsets[sources] + ranks] = self.targets
+        for source, buffered in self.buffer.items():
+            end = offsets[source + 1]
+            targets[end - len(buffered):end] = buffered
+
+        self.offsets, self.targets = offsets, targets
+        self.buffer = {}
+        self.buffered = 0
+
+class DAGStore:
+    """
+    Compact store of the blocks of the DAG and of their edges, in a topological order.
+
+    Provides the operations the DAG uses: insertion of blocks and edges, lookup by hash,
+    states, degrees, neighbors and iteration in topological order. Blocks are inserted after
+    the blocks they reference, so the insertion order is a topological order. Only the last
+    inserted block can be removed, which is what the DAG needs to roll back a block whose
+    edges are refused.
+
+    Args:
+    - next_position: int (the topological position given to the next block)
+    - previous_states: Optional[Dict[int, int]] (when set, the state code of every block before its
+      first change since it was set, by id, for the snapshots taken before the change)
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._blocks: List[BlockRecord] = []
+        self._states = np.zeros(INITIAL_CAPACITY, dtype=np.uint8)
+        self._in_degrees = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._out_degrees = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._positions = np.zeros(INITIAL_CAPACITY, dtype=np.int64) # id -> position
+        self._at_position = np.full(INITIAL_CAPACITY, -1, dtype=np.int64) # position -> id, -1 if none
+        self._successors = _Adjacency()
+        self._predecessors = _Adjacency()
+        self.next_position = 0
+        self.previous_states: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, block_hash: object) -> bool:
+        return block_hash in self._ids
+
+    # Blocks
+
+    def add(self, block: BlockRecord, state: BlockState) -> int:
+        """
+        Insert a block, without edges, at the end of the topological order. Returns its id.
+        """
+        node = len(self._blocks)
+        for adjacency in (self._successors, self._predecessors):
+            if adjacency.needs_compaction():
+                adjacency.compact(node)
+        self._states = _grow(self._states, node + 1)
+        self._in_degrees = _grow(self._in_degrees, node + 1)
+        self._out_degrees = _grow(self._out_degrees, node + 1)
+        self._positions = _grow(self._positions, node + 1)
+        self._at_position = _grow(self._at_position, self.next_position + 1, -1)
+
+        self._states[node] = STATE_CODES[state]
+        self._in_degrees[node] = self._out_degrees[node] = 0
+        self._positions[node] = self.next_position
+        self._at_position[self.next_position] = node
+        self.next_position += 1
+        self._blocks.append(block)
+        self._ids[block.hash] = node
+        return node
+
+    def remove_last(self, block_hash: str) -> None:
+        """
+        Remove the last inserted block, its edges and its topological position.
+        """
+        node = self._ids[block_hash]
+        if node != len(self._blocks) - 1:
+            raise ValueError("Only the last inserted block can be removed.")
+        for source in self._predecessors.buffer.get(node, [])[:]:
+            self._successors.remove(source, node)
+            self._predecessors.remove(node, source)
+            self._out_degrees[source] -= 1
+        for target in self._successors.buffer.get(node, [])[:]:
+            self._predecessors.remove(target, node)
+            self._successors.remove(node, target)
+            self._in_degrees[target] -= 1
+        self._at_position[self._positions[node]] = -1
+        del self._ids[block_hash]
+        self._blocks.pop()
+
+    def id(self, block_hash: str) -> Optional[int]:
+        return self._ids.get(block_hash)
+
+    def block(self, block_hash: str) -> Optional[BlockRecord]:
+        node = self._ids.get(block_hash)
+        return self._blocks[node] if node is not None else None
+
+    def state(self, block_hash: str) -> Optional[BlockState]:
+        node = self._ids.get(block_hash)
+        return STATES[self._states[node]] if node is not None else None
+
+    def set_state(self, block_hash: str, state: BlockState) -> None:
+        node = self._ids[block_hash]
+        if self.previous_states is not None:
+            # Recorded before the change, so a snapshot reader never sees the new state unrecorded
+            self.previous_states.setdefault(node, int(self._states[node]))
+        self._states[node] = STATE_CODES[state]
+
+    def node(self, block_hash: str) -> Optional[dict]:
+        """
+        Get the node (block and state) of a block, or None if the block is unknown.
+        """
+        node = self._ids.get(block_hash)
+        return {"block": self._blocks[node], "state": STATES[self._states[node]]} if node is not None else None
+
+    def position(self, block_hash: str) -> Optional[int]:
+        """
+        Get the topological position of a block, or None if the block is unknown.
+        """
+        node = self._ids.get(block_hash)
+        return int(self._positions[node]) if node is not None else None
+
+    def in_degree(self, block_hash: str) -> int:
+        return int(self._in_degrees[self._ids[block_hash]])
+
+    def out_degree(self, block_hash: str) -> int:
+        """
+        Get the number of blocks referencing a block.
+        """
+        return int(self._out_degrees[self._ids[block_hash]])
+
+    def successors(self, block_hash: str) -> List[str]:
+        """
+        Get the hashes of the blocks referencing a block.
+        """
+        return [self._blocks[node].hash for node in self._successors.neighbors(self._ids[block_hash])]
+
+    def predecessors(self, block_hash: str) -> List[str]:
+        """
+        Get the hashes of the blocks referenced by a block.
+        """
+        return [self._blocks[node].hash for node in self._predecessors.neighbors(self._ids[block_hash])]
+
+    def iter_positions(self, start: int = 0) -> Iterator[Tuple[int, BlockRecord, BlockState]]:
+        """
+        Iterate (position, block, state) in topological order, from the position start on.
+        Blocks added meanwhile are included.
+        """
+        position = start
+        while position < self.next_position:
+            node = int(self._at_position[position])
+            if node >= 0:
+                yield position, self._blocks[node], STATES[self._states[node]]
+            position += 1
+
+    # Edges
+
+    def add_edge(self, source: str, target: str) -> bool:
+        """
+        Insert an edge from a block to a block after it in the topological order.
+
+        A block can only reference blocks inserted before it, so the order never needs to change.
+        Returns False, without inserting the edge, if target is not after source (the edge could
+        then create a cycle).
+        """
+        source_node, target_node = self._ids[source], self._ids[target]
+        if self._positions[target_node] <= self._positions[source_node]:
+            return False
+        self._successors.add(source_node, target_node)
+        self._predecessors.add(target_node, source_node)
+        self._out_degrees[source_node] += 1
+        self._in_degrees[target_node] += 1
+        return True
@@ -0,0 +1,28 @@
+# models/inventory.py
+
+from typing import List
+from pydantic import BaseModel, Field
+
+class Inventory(BaseModel):
+    """
+    Inventory Model
+
+    Ids announced by a neighbor before it sends the bodies, or requested back from it.
+
+    Args:
+    - transactions: List[str]
+    - blocks: List[str]
+    """
+    transactions: List[str] = Field(default=[], description="The ids of the transactions")
+    blocks: List[str] = Field(default=[], description="The hashes of the blocks")
+
+    class Config:
+        """
+        Pydantic Config
+        """
+        schema_extra = {
+            "example": {
+                "transactions": ["..."],
+                "blocks": ["..."]
+            }
+        }
@@ -0,0 +1,213 @@
+# models/mempool.py
+
+import time
+
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from app.api.models.records import TransactionRecord
+
+class Mempool:
+    """
+    Indexed pool of unconfirmed transactions.
+
+    Transactions are keyed by their content address (TransactionRecord.id) in an insertion ordered dict,
+    so insert, remove and lookup by id are O(1) and iteration follows arrival order. A secondary
+    index maps each sender (by address) to its pending transactions by nonce.
+
+    Args:
+    - transactions: Dict[str, TransactionRecord]
+    - senders: Dict[str, Dict[int, str]]
+    - size_bytes: int
+    - version: int (incremented on every change)
+    - changed: Set[str] (ids of the transactions added or removed since the last snapshot)
+    - changed_senders: Set[str] (senders of those transactions)
+    """
+
+    def __init__(self) -> None:
+        self.transactions: Dict[str, TransactionRecord] = {}
+        self.senders: Dict[str, Dict[int, str]] = {}
+        self.size_bytes = 0
+        self.version = 0
+        self.changed: Set[str] = set()
+        self.changed_senders: Set[str] = set()
+
+    def copy(self) -> 'Mempool':
+        """
+        Copy the pool, with its own indexes, which later changes of this one do not reach.
+        """
+        mempool = Mempool()
+        mempool.transactions = dict(self.transactions)
+        mempool.senders = {sender: dict(nonces) for sender, nonces in self.senders.items()}
+        mempool.size_bytes = self.size_bytes
+        mempool.version = self.version
+        return mempool
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def __iter__(self) -> Iterator[TransactionRecord]:
+        return iter(self.transactions.values())
+
+    def __contains__(self, tx_id: object) -> bool:
+        return tx_id in self.transactions
+
+    def add(self, transaction: TransactionRecord) -> bool:
+        """
+        Add a transaction to the pool. Returns False if it is already pending
+        or the sender already has a pending transaction with the same nonce.
+        """
+        if transaction.id in self.transactions:
+            return False
+        sender_transactions = self.senders.setdefault(transaction.sender_address, {})
+        if transaction.nonce in sender_transactions:
+            return False
+
+        self.transactions[transaction.id] = transaction
+        sender_transactions[transaction.nonce] = transaction.id
+        self.size_bytes += transaction.size
+        self.version += 1
+        self.changed.add(transaction.id)
+        self.changed_senders.add(transaction.sender_address)
+        return True
+
+    def remove(self, tx_id: str) -> Optional[TransactionRecord]:
+        """
+        Remove a transaction by id, returning it if it was pending.
+        """
+        transaction = self.transactions.pop(tx_id, None)
+        if transaction is None:
+            return None
+
+        sender_transactions = self.senders[transaction.sender_address]
+        del sender_transactions[transaction.nonce]
+        if not sender_transactions:
+            del self.senders[transaction.sender_address]
+        self.size_bytes -= transaction.size
+        self.version += 1
+        self.changed.add(tx_id)
+        self.changed_senders.add(transaction.sender_address)
+        return transaction
+
+    def remove_many(self, tx_ids: Iterable[str]) -> int:
+        """
+        Remove several transactions by id, returning how many were pending.
+        """
+        return sum(1 for tx_id in tx_ids if self.remove(tx_id) is not None)
+
+    def get(self, tx_id: str) -> Optional[TransactionRecord]:
+        """
+        Get a pending transaction by id.
+        """
+        return self.transactions.get(tx_id)
+
+    def get_by_sender_nonce(self, sender: str, nonce: int) -> Optional[TransactionRecord]:
+        """
+        Get the pending transaction of a sender (by address) with the given nonce.
+        """
+        tx_id = self.senders.get(sender, {}).get(nonce)
+        return self.transactions[tx_id] if tx_id is not None else None
+
+    def by_sender(self, sender: str) -> List[TransactionRecord]:
+        """
+        Get the pending transactions of a sender (by address) ordered by nonce.
+        """
+        sender_transactions = self.senders.get(sender, {})
+        return [self.transactions[sender_transactions[nonce]] for nonce in sorted(sender_transactions)]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[TransactionRecord]:
+        """
+        Get a slice of the pending transactions in arrival order.
+        """
+        stop = None if limit is None else offset + limit
+        return list(islice(self.transactions.values(), offset, stop))
+
+class PendingTransactions:
+    """
+    Bounded queue of the transactions whose nonce is ahead of their sender's next nonce.
+
+    A transaction that arrives before the ones filling its nonce gap (reordered across
+    connections or gossip paths) waits here instead of being rejected, and is promoted to
+    the mempool once its sender's nonce reaches it. Transactions are forgotten ttl seconds
+    after they were queued, or earlier, oldest first, when more than max_transactions are
+    queued. Each sender keeps at most max_per_sender transactions, the nearest nonces first.
+
+    Args:
+    - max_per_sender: int (also the largest nonce gap accepted)
+    - max_transactions: int
+    - ttl: float
+    """
+
+    def __init__(self, max_per_sender: int, max_transactions: int, ttl: float) -> None:
+        self.max_per_sender = max_per_sender
+        self.max_transactions = max_transactions
+        self.ttl = ttl
+        self.transactions: OrderedDict = OrderedDict() # transaction id -> (transaction, queued at)
+        self.senders: Dict[str, Dict[int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def __contains__(self, tx_id: object) -> bool:
+        return tx_id in self.transactions
+
+    def add(self, transaction: TransactionRecord, next_nonce: int) -> Optional[str]:
+        """
+        Queue a transaction until the nonce of its sender, now expecting next_nonce, reaches it.
+        Returns None if it was queued, or the reason it was rejected.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        if transaction.nonce - next_nonce > self.max_per_sender:
+            return "Invalid nonce."
+        sender_transactions = self.senders.get(transaction.sender_address, {})
+        if transaction.id in self.transactions or transaction.nonce in sender_transactions:
+            return "Duplicated transaction."
+
+        if len(sender_transactions) >= self.max_per_sender:
+            # The nearest nonces are kept, they are the ones that can be promoted first
+            farthest = max(sender_transactions)
+            if transaction.nonce > farthest:
+                return "Too many queued transactions of the sender."
+            self._remove(sender_transactions[farthest])
+        if len(self.transactions) >= self.max_transactions:
+            self._remove(next(iter(self.transactions)))
+
+        self.transactions[transaction.id] = (transaction, now)
+        self.senders.setdefault(transaction.sender_address, {})[transaction.nonce] = transaction.id
+        return None
+
+    def pop(self, sender: str, nonce: int) -> Optional[TransactionRecord]:
+        """
+        Take the queued transaction of a sender (by address) with the given nonce, if any.
+        """
+        self._expire(time.monotonic())
+        tx_id = self.senders.get(sender, {}).get(nonce)
+        return self._remove(tx_id) if tx_id is not None else None
+
+    def discard_used(self, sender: str, nonce: int) -> int:
+        """
+        Drop the queued transactions of a sender (by address) whose nonce was already used,
+        returning how many were dropped.
+        """
+        used = [tx_id for tx_nonce, tx_id in self.senders.get(sender, {}).items() if tx_nonce <= nonce]
+        for tx_id in used:
+            self._remove(tx_id)
+        return len(used)
+
+    def _remove(self, tx_id: str) -> TransactionRecord:
+        transaction, _ = self.transactions.pop(tx_id)
+        sender_transactions = self.senders[transaction.sender_address]
+        del sender_transactions[transaction.nonce]
+        if not sender_transactions:
+            del self.senders[transaction.sender_address]
+        return transaction
+
+    def _expire(self, now: float) -> None:
+        # Insertion order is also expiry order, so only the head has to be checked
+        while self.transactions:
+            tx_id, (_, queued_at) = next(iter(self.transactions.items()))
+            if now - queued_at < self.ttl:
+                return
+            self._remove(tx_id)
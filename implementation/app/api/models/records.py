@@ -0,0 +1,176 @@
+# models/records.py
+
+from hashlib import sha256
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from app.api.methods.codec import encode_transaction, decode_transaction, encode_block, decode_block
+from app.api.methods.codec import encode_block_digest, encode_compact_block, decode_compact_block
+from app.api.methods.wallets import decode, encode, key_id
+
+from app.api.config.keys import key_registry
+
+"""
+Compact records of the transactions and blocks held by the ledger.
+
+The pydantic models (models/transaction.py, models/blockchain.py) validate what crosses the
+HTTP boundary, and are converted into these records, reusing their already computed ids,
+hashes and interned keys. Records have no per instance dict: the public keys are shared
+(interned) strings, the signature is kept as raw bytes instead of Base64 text, and the
+canonical bytes are encoded on demand instead of being kept for the life of the ledger.
+Records are treated as immutable once built.
+"""
+
+class TransactionRecord:
+    """
+    Transaction held by the ledger (mempool and blocks).
+
+    Args:
+    - sender: str
+    - recipient: str
+    - amount: int
+    - nonce: int
+    - signature: bytes (raw)
+    - timestamp: datetime
+    - id: Optional[str] (computed if not given, with size)
+    - size: Optional[int]
+    """
+    __slots__ = ('sender', 'recipient', 'amount', 'nonce', 'signature', 'timestamp', 'id', 'size', 'sender_address', 'recipient_address')
+
+    def __init__(self, sender: str, recipient: str, amount: int, nonce: int, signature: bytes, timestamp: datetime,
+                 id: Optional[str] = None, size: Optional[int] = None) -> None:
+        self.sender = key_registry.intern(sender)
+        self.recipient = key_registry.intern(recipient)
+        self.amount = amount
+        self.nonce = nonce
+        self.signature = signature
+        self.timestamp = timestamp
+        self.sender_address = key_id(self.sender)
+        self.recipient_address = key_id(self.recipient)
+        if id is None or size is None:
+            canonical_bytes = encode_transaction(self)
+            id, size = sha256(canonical_bytes).hexdigest(), len(canonical_bytes)
+        self.id = id
+        self.size = size
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> 'TransactionRecord':
+        """
+        Build a record from decoded fields (Base64 signature).
+        """
+        return cls(fields["sender"], fields["recipient"], fields["amount"], fields["nonce"], decode(fields["signature"]), fields["timestamp"])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TransactionRecord':
+        """
+        Build a record from its binary encoding.
+        """
+        return cls.from_fields(decode_transaction(data))
+
+    def to_bytes(self) -> bytes:
+        """
+        The binary encoding of the transaction, used on the wire.
+        """
+        return encode_transaction(self)
+
+    @property
+    def message(self) -> bytes:
+        """
+        The message covered by the transaction signature.
+        """
+        return f"{self.sender}{self.recipient}{self.amount}{self.nonce}".encode()
+
+    @property
+    def encoded_signature(self) -> str:
+        """
+        The signature in Base64, as sent by the clients.
+        """
+        return encode(self.signature)
+
+    def to_dict(self) -> dict:
+        return {
+            "sender": self.sender,
+            "recipient": self.recipient,
+            "amount": self.amount,
+            "nonce": self.nonce,
+            "signature": self.encoded_signature,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+class BlockRecord:
+    """
+    Block held by the ledger. The hash covers the block header and the ids of its transactions.
+
+    Args:
+    - index: int
+    - transactions: Tuple[TransactionRecord, ...]
+    - nonce: int
+    - children_hashes: Tuple[str, ...]
+    - timestamp: datetime
+    - hash: Optional[str] (computed if not given)
+    """
+    __slots__ = ('index', 'transactions', 'nonce', 'children_hashes', 'timestamp', 'hash')
+
+    def __init__(self, index: int, transactions: Iterable[TransactionRecord], nonce: int, children_hashes: Iterable[str],
+                 timestamp: datetime, hash: Optional[str] = None) -> None:
+        self.index = index
+        self.transactions = tuple(transactions)
+        self.nonce = nonce
+        self.children_hashes = tuple(children_hashes)
+        self.timestamp = timestamp
+        self.hash = hash if hash is not None else sha256(encode_block_digest(self)).hexdigest()
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> 'BlockRecord':
+        """
+        Build a record from decoded fields.
+        """
+        transactions = (TransactionRecord.from_fields(tx) for tx in fields["transactions"])
+        return cls(fields["index"], transactions, fields["nonce"], fields["children_hashes"], fields["timestamp"])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BlockRecord':
+        """
+        Build a record from its binary encoding.
+        """
+        return cls.from_fields(decode_block(data))
+
+    @classmethod
+    def from_compact_bytes(cls, data: bytes, resolve: Callable[[str], Optional[str]] = key_registry.get) -> 'BlockRecord':
+        """
+        Build a record from its compact (stored) encoding, looking its public keys up with resolve.
+        """
+        return cls.from_fields(decode_compact_block(data, resolve))
+
+    @classmethod
+    def from_legacy_dict(cls, data: dict, legacy_hash: str, legacy_hashes: Dict[str, str]) -> 'BlockRecord':
+        """
+        Build a block stored before the binary codec, identified by its legacy (JSON) hash.
+        Its children hashes are translated with legacy_hashes, which is updated with the block.
+        """
+        from app.api.models.blockchain import Block # The legacy JSON is validated by the API model
+        data = {**data, "children_hashes": [legacy_hashes.get(child_hash, child_hash) for child_hash in data.get("children_hashes", [])]}
+        block = Block(**data).to_record()
+        legacy_hashes[legacy_hash] = block.hash
+        return block
+
+    def to_bytes(self) -> bytes:
+        """
+        The binary encoding of the block, used on the wire.
+        """
+        return encode_block(self)
+
+    def to_compact_bytes(self) -> bytes:
+        """
+        The compact encoding of the block, with wallet addresses instead of public keys, used in the block log.
+        """
+        return encode_compact_block(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "transactions": [tx.to_dict() for tx in self.transactions],
+            "nonce": self.nonce,
+            "children_hashes": list(self.children_hashes),
+            "timestamp": self.timestamp.isoformat()
+        }
@@ -0,0 +1,395 @@
+# models/snapshot.py
+
+import uuid
+
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from app.api.models.blockchain import BlockState, DAG
+from app.api.models.dag_store import STATES, DAGStore
+from app.api.models.records import BlockRecord, TransactionRecord
+from app.api.models.mempool import Mempool
+
+from app.api.methods.wallets import address
+
+# Layer value of a key removed in that version
+_DELETED = object()
+
+class VersionedMap(Mapping):
+    """
+    Immutable mapping made of a frozen base dict and a short chain of delta layers.
+
+    A new version only stores the keys that changed (or were removed), so publishing it
+    costs O(changes). When the chain reaches max_layers the layers are folded into a new
+    base. A base that is not a dict is a live view of a store too large to copy (already
+    holding the changes of the layers), and the layers are dropped instead.
+
+    Args:
+    - base: Mapping
+    - layers: Tuple[Dict, ...]
+    """
+    __slots__ = ('_base', '_layers', '_merged_cache')
+
+    def __init__(self, base: Mapping, layers: Tuple[Dict, ...] = ()) -> None:
+        self._base = base
+        self._layers = layers
+        self._merged_cache: Optional[Dict] = None
+
+    def _lookup(self, key):
+        for layer in reversed(self._layers):
+            if key in layer:
+                return layer[key]
+        try:
+            return self._base[key]
+        except KeyError:
+            return _DELETED
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) is not _DELETED
+
+    def __iter__(self):
+        return iter(self._merged())
+
+    def __len__(self) -> int:
+        return len(self._merged())
+
+    def values(self):
+        return self._merged().values()
+
+    def items(self):
+        return self._merged().items()
+
+    @property
+    def depth(self) -> int:
+        return len(self._layers)
+
+    def _merged(self) -> Mapping:
+        if not self._layers:
+            return self._base
+        if self._merged_cache is not None:
+            return self._merged_cache
+        merged = _fold(dict(self._base), self._layers)
+        if isinstance(self._base, dict):
+            # A version never changes, so its merge is computed once
+            self._merged_cache = merged
+        return merged
+
+    def with_changes(self, changes: Dict, max_layers: int = 64) -> 'VersionedMap':
+        """
+        Get a new version with the changes applied (_DELETED removes a key). This version is left untouched.
+        """
+        if not changes:
+            return self
+        if len(self._layers) + 1 >= max_layers:
+            if not isinstance(self._base, dict):
+                return VersionedMap(self._base)
+            return VersionedMap(_fold(dict(self._base), self._layers + (changes,)))
+        return VersionedMap(self._base, self._layers + (dict(changes),))
+
+def _fold(merged: Dict, layers: Iterable[Dict]) -> Dict:
+    """
+    Apply delta layers, in order, to a dict.
+    """
+    for layer in layers:
+        for key, value in layer.items():
+            if value is _DELETED:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+    return merged
+
+class MempoolSnapshot:
+    """
+    Immutable, versioned view of the mempool, with the reads of Mempool.
+
+    Each version only stores the transactions added or removed since the previous one (and
+    the nonce index of their senders), so publishing it costs O(changes) instead of a copy
+    of the pool.
+
+    Args:
+    - transactions: VersionedMap (transaction id -> transaction, in arrival order)
+    - senders: VersionedMap (sender address -> transaction ids ordered by nonce)
+    - size_bytes: int
+    - version: int (version of the mempool)
+    """
+    __slots__ = ('transactions', 'senders', 'size_bytes', 'version')
+
+    def __init__(self, transactions: VersionedMap, senders: VersionedMap, size_bytes: int, version: int) -> None:
+        self.transactions = transactions
+        self.senders = senders
+        self.size_bytes = size_bytes
+        self.version = version
+
+    @classmethod
+    def capture(cls, mempool: Mempool) -> 'MempoolSnapshot':
+        """
+        Take a full snapshot of the mempool. Must be called by the writer.
+        """
+        mempool.changed.clear()
+        mempool.changed_senders.clear()
+        senders = {sender: _by_nonce(nonces) for sender, nonces in mempool.senders.items()}
+        return cls(VersionedMap(dict(mempool.transactions)), VersionedMap(senders), mempool.size_bytes, mempool.version)
+
+    def advance(self, mempool: Mempool, max_layers: int = 64) -> 'MempoolSnapshot':
+        """
+        Take the next snapshot, storing only the changes since this one. Must be called by the writer.
+        """
+        if mempool.version == self.version:
+            return self
+        transactions = self.transactions.with_changes({tx_id: mempool.transactions.get(tx_id, _DELETED) for tx_id in mempool.changed}, max_layers)
+        senders = self.senders.with_changes({
+            sender: _by_nonce(mempool.senders[sender]) if sender in mempool.senders else _DELETED
+            for sender in mempool.changed_senders
+        }, max_layers)
+        mempool.changed.clear()
+        mempool.changed_senders.clear()
+        return MempoolSnapshot(transactions, senders, mempool.size_bytes, mempool.version)
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def __iter__(self) -> Iterator[TransactionRecord]:
+        return iter(self.transactions.values())
+
+    def __contains__(self, tx_id: object) -> bool:
+        return tx_id in self.transactions
+
+    def get(self, tx_id: str) -> Optional[TransactionRecord]:
+        return self.transactions.get(tx_id)
+
+    def by_sender(self, sender: str) -> List[TransactionRecord]:
+        """
+        Get the pending transactions of a sender (by address) ordered by nonce.
+        """
+        return [self.transactions[tx_id] for tx_id in self.senders.get(sender, ())]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[TransactionRecord]:
+        """
+        Get a slice of the pending transactions in arrival order.
+        """
+        stop = None if limit is None else offset + limit
+        return list(islice(self.transactions.values(), offset, stop))
+
+def _by_nonce(nonces: Dict[int, str]) -> Tuple[str, ...]:
+    return tuple(nonces[nonce] for nonce in sorted(nonces))
+
+class _StateChanges:
+    """
+    States of the blocks before their first change in a group of commands (state codes by
+    block id), linked to the changes of the next group.
+    """
+    __slots__ = ('states', 'next')
+
+    def __init__(self) -> None:
+        self.states: Dict[int, int] = {}
+        self.next: Optional['_StateChanges'] = None
+
+    def follow(self, graph: DAGStore) -> '_StateChanges':
+        """
+        Start the changes of the next group, journaled by the graph from now on.
+        """
+        changes = _StateChanges()
+        graph.previous_states = changes.states
+        self.next = changes
+        return changes
+
+class DAGSnapshot:
+    """
+    Immutable, versioned view of the DAG for readers.
+
+    Snapshots are published by the writer after every group of commands, and readers keep
+    using the one they got, so reads never wait for writes. Balances, nonces and the mempool
+    are versioned maps that only store the changes of each version, and the tips and the
+    neighbors are frozen copies. Blocks are immutable and shared with the DAG, and only the
+    blocks inserted before the snapshot (by topological position) are visible through it.
+    Their states are read from the DAG, except for the blocks whose state changed after the
+    snapshot: the graph journals their previous states, which the snapshot reads instead.
+
+    With a persistent account state the balances and nonces are live views of the committed
+    store (read through connections of the reading threads, without waiting for the writer)
+    under the changes of the recent versions, so an account untouched by those versions can
+    show a newer value: the snapshot is not consistent, and the versions of the changes are
+    not tracked (conditional reads are not supported).
+
+    Args:
+    - epoch: str (changes when the node restarts, as versions start over)
+    - version: int
+    - balances: VersionedMap
+    - nonces: VersionedMap
+    - changed_at: VersionedMap (address -> version of its last change, only if consistent)
+    - consistent: bool (the balances and nonces all belong to this version)
+    - unconfirmed_transactions: MempoolSnapshot
+    - tips: Tuple[str, ...]
+    - neighbors: Tuple[str, ...]
+    - next_topological_position: int
+    - decimal_places: int
+    """
+    __slots__ = ('epoch', 'version', 'balances', 'nonces', 'changed_at', 'consistent', 'unconfirmed_transactions', 'tips',
+                 'neighbors', 'next_topological_position', 'decimal_places', '_dag', '_state_changes')
+
+    def __init__(self, dag: DAG, epoch: str, version: int, balances: VersionedMap, nonces: VersionedMap, changed_at: VersionedMap,
+                 unconfirmed_transactions: MempoolSnapshot, tips: Tuple[str, ...], neighbors: Tuple[str, ...],
+                 state_changes: _StateChanges) -> None:
+        self._dag = dag
+        self._state_changes = state_changes
+        self.epoch = epoch
+        self.version = version
+        self.balances = balances
+        self.nonces = nonces
+        self.changed_at = changed_at
+        self.consistent = not dag.accounts.persistent
+        self.unconfirmed_transactions = unconfirmed_transactions
+        self.tips = tips
+        self.neighbors = neighbors
+        self.next_topological_position = dag.next_topological_position
+        self.decimal_places = dag.decimal_places
+
+    @classmethod
+    def capture(cls, dag: DAG, version: int = 0, previous: Optional['DAGSnapshot'] = None) -> 'DAGSnapshot':
+        """
+        Take a full snapshot of the DAG. Must be called by the writer.
+        The block state changes are still journaled for the previous snapshot, if any.
+        """
+        dag.touched_accounts.clear()
+        state_changes = previous._state_changes.follow(dag.graph) if previous is not None else _StateChanges().follow(dag.graph)
+        return cls(dag, uuid.uuid4().hex, version,
+                   VersionedMap(dag.accounts.view_balances()),
+                   VersionedMap(dag.accounts.view_nonces()),
+                   VersionedMap({}),
+                   MempoolSnapshot.capture(dag.unconfirmed_transactions),
+                   tuple(dag.tips.degrees),
+                   tuple(dag.neighbors),
+                   state_changes)
+
+    def advance(self, dag: DAG, max_layers: int = 64) -> 'DAGSnapshot':
+        """
+        Take the next snapshot, storing only what changed since this one. Must be called by the writer.
+        """
+        version = self.version + 1
+        touched = dag.touched_accounts
+        accounts = dag.accounts
+        balances: Dict[str, int] = {}
+        nonces: Dict[str, int] = {}
+        for account in touched:
+            balance, nonce = accounts.balance(account), accounts.nonce(account)
+            if balance is not None:
+                balances[account] = balance
+            if nonce is not None:
+                nonces[account] = nonce
+        changed_at = self.changed_at
+        if self.consistent:
+            changed_at = changed_at.with_changes(dict.fromkeys(touched, version), max_layers)
+        touched.clear()
+
+        tips = self.tips
+        if self.next_topological_position != dag.next_topological_position:
+            tips = tuple(dag.tips.degrees)
+        neighbors = self.neighbors if len(self.neighbors) == len(dag.neighbors) else tuple(dag.neighbors)
+        return DAGSnapshot(dag, self.epoch, version,
+                           self.balances.with_changes(balances, max_layers),
+                           self.nonces.with_changes(nonces, max_layers),
+                           changed_at,
+                           self.unconfirmed_transactions.advance(dag.unconfirmed_transactions, max_layers),
+                           tips,
+                           neighbors,
+                           self._state_changes.follow(dag.graph))
+
+    # Accounts
+
+    def get_nonce(self, wallet: str) -> int:
+        """
+        Get the nonce of a wallet, by public key or address.
+        """
+        return self.nonces.get(_account(wallet), 0)
+
+    def get_wallet_balance(self, wallet: str) -> float:
+        """
+        Get the balance of a wallet, by public key or address, with the decimal places of the DAG.
+        """
+        return self.balances.get(_account(wallet), 0) / (10 ** self.decimal_places)
+
+    def changed_since(self, wallet: str, version: int) -> bool:
+        """
+        Tell whether the balance or nonce of a wallet (public key or address) changed after a version.
+        Only answered by consistent snapshots.
+        """
+        return self.changed_at.get(_account(wallet), 0) > version
+
+    # Blocks
+
+    def __contains__(self, block_hash: object) -> bool:
+        position = self._dag.graph.position(block_hash) # type: ignore
+        return position is not None and position < self.next_topological_position
+
+    def _state(self, block_hash: str, state: BlockState) -> BlockState:
+        """
+        Get the state a block had when the snapshot was taken, given its current state.
+        """
+        changes: Optional[_StateChanges] = self._state_changes
+        node = None
+        while changes is not None:
+            if changes.states:
+                if node is None:
+                    node = self._dag.graph.id(block_hash)
+                if node in changes.states:
+                    return STATES[changes.states[node]]
+            changes = changes.next
+        return state
+
+    def get_block_by_hash(self, block_hash: str) -> Optional[dict]:
+        """
+        Get the node (block and state) of a block by its hash.
+        """
+        if block_hash not in self:
+            return None
+        node = self._dag.graph.node(block_hash)
+        return {"block": node["block"], "state": self._state(block_hash, node["state"])} # type: ignore
+
+    def get_block(self, block_hash: str) -> Optional[BlockRecord]:
+        node = self.get_block_by_hash(block_hash)
+        return node['block'] if node is not None else None
+
+    def get_unconfirmed_blocks(self) -> List[dict]:
+        """
+        Get the nodes of the blocks with less than minimal_degree confirmations.
+        """
+        nodes = (self.get_block_by_hash(block_hash) for block_hash in self.tips)
+        return [node for node in nodes if node is not None]
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Tuple[int, BlockRecord, BlockState]]:
+        """
+        Iterate (position, block, state) in topological order, from the position start on.
+        """
+        for position, block, state in self._dag.iter_blocks(start):
+            if position >= self.next_topological_position:
+                return
+            yield position, block, self._state(block.hash, state)
+
+    def get_missing_blocks(self, known: Callable[[str], bool]) -> List[str]:
+        """
+        Get the hashes of the blocks a neighbor lacks, in topological order.
+
+        Walks back from the tips through the children hashes of the (immutable) blocks and
+        stops at the first known block of every path, so the cost grows with the number of
+        missing blocks, not with the size of the ledger.
+        """
+        stack = [tip for tip in self.tips if not known(tip)]
+        missing = set(stack)
+        while stack:
+            for child_hash in self.get_block(stack.pop()).children_hashes: # type: ignore
+                if child_hash not in missing and not known(child_hash):
+                    missing.add(child_hash)
+                    stack.append(child_hash)
+        return sorted(missing, key=self._dag.graph.position)
+
+def _account(wallet: str) -> str:
+    try:
+        return address(wallet)
+    except ValueError:
+        return wallet # Not a Base64 key: an unknown account
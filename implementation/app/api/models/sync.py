@@ -0,0 +1,47 @@
+# models/sync.py
+
+from typing import List
+from pydantic import BaseModel, Field
+
+class SyncRequest(BaseModel):
+    """
+    Sync Request Model
+
+    Summary of the blocks a node knows, sent to a neighbor to learn which blocks it lacks.
+
+    Args:
+    - tips: List[str]
+    - bloom: str
+    """
+    tips: List[str] = Field(default=[], description="The hashes of the tips of the node")
+    bloom: str = Field(default=..., description="Base64 encoded bloom filter of the hashes of the blocks the node knows")
+
+    class Config:
+        """
+        Pydantic Config
+        """
+        schema_extra = {
+            "example": {
+                "tips": ["..."],
+                "bloom": "..."
+            }
+        }
+
+class BlocksRequest(BaseModel):
+    """
+    Blocks Request Model
+
+    Args:
+    - hashes: List[str]
+    """
+    hashes: List[str] = Field(default=..., description="The hashes of the requested blocks")
+
+    class Config:
+        """
+        Pydantic Config
+        """
+        schema_extra = {
+            "example": {
+                "hashes": ["..."]
+            }
+        }
@@ -0,0 +1,78 @@
+# models/tips.py
+
+from itertools import islice
+from typing import Dict, List
+
+class TipIndex:
+    """
+    Index of the under-confirmed blocks (tips) of the DAG.
+
+    A block stays in the index while fewer than minimal_degree blocks reference it. Tips are
+    kept in age order and bucketed by their current degree, so both are updated in O(1) when
+    an edge is added and selecting k tips costs O(k) instead of scanning the whole ledger.
+
+    Args:
+    - degrees: Dict[str, int]
+    - buckets: Dict[int, Dict[str, None]]
+    """
+    OLDEST = "oldest"
+    LEAST_CONFIRMED = "least_confirmed"
+
+    def __init__(self) -> None:
+        # Insertion ordered, so iteration goes from the oldest to the newest tip
+        self.degrees: Dict[str, int] = {}
+        self.buckets: Dict[int, Dict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self.degrees)
+
+    def __contains__(self, block_hash: object) -> bool:
+        return block_hash in self.degrees
+
+    def add(self, block_hash: str) -> None:
+        """
+        Add a new block, not yet referenced by any other block.
+        """
+        self.degrees[block_hash] = 0
+        self.buckets.setdefault(0, {})[block_hash] = None
+
+    def increment(self, block_hash: str, minimal_degree: int) -> int:
+        """
+        Record a new reference to a block, returning its new degree.
+        The block leaves the index once its degree reaches minimal_degree.
+        """
+        degree = self.degrees.get(block_hash)
+        if degree is None:
+            return minimal_degree # Already confirmed enough times
+
+        self._discard_from_bucket(block_hash, degree)
+        degree += 1
+        if degree >= minimal_degree:
+            del self.degrees[block_hash]
+        else:
+            self.degrees[block_hash] = degree
+            self.buckets.setdefault(degree, {})[block_hash] = None
+        return degree
+
+    def select(self, limit: int, policy: str = OLDEST) -> List[str]:
+        """
+        Select at most limit tips to be referenced by a new block.
+
+        Policies:
+        - oldest: the oldest under-confirmed tips.
+        - least_confirmed: the tips with the lowest degree, oldest first inside each degree.
+        """
+        if policy == self.LEAST_CONFIRMED:
+            selected: List[str] = []
+            for degree in sorted(self.buckets):
+                selected.extend(islice(self.buckets[degree], limit - len(selected)))
+                if len(selected) >= limit:
+                    break
+            return selected
+        return list(islice(self.degrees, limit))
+
+    def _discard_from_bucket(self, block_hash: str, degree: int) -> None:
+        bucket = self.buckets[degree]
+        del bucket[block_hash]
+        if not bucket:
+            del self.buckets[degree]
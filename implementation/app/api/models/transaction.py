@@ -1,7 +1,13 @@
 # models/transaction.py
 
+from hashlib import sha256
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.api.methods.codec import encode_transaction, decode_transaction
+from app.api.methods.wallets import decode
+
+from app.api.models.records import TransactionRecord
 
 from app.api.config.env import GENESIS_PUBLIC_KEY, SEBASTIAN_PUBLIC_KEY
 
@@ -48,11 +54,71 @@ class Transaction(TransactionCreate):
     """
     Transaction Model
 
+    Transactions are immutable once created, since they are part of the sealed content of a block.
+    The ledger holds them as compact records (models/records.py), see to_record().
+
     Args:
     - timestamp: datetime
     """
     timestamp: datetime = Field(default=datetime.now(), description="The timestamp of the transaction")
 
+    # Serialized content and content address, computed once in __init__
+    _canonical_bytes: bytes = PrivateAttr()
+    _id: str = PrivateAttr()
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._canonical_bytes = encode_transaction(self)
+        self._id = sha256(self._canonical_bytes).hexdigest()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Transaction':
+        """
+        Build a transaction from its binary encoding.
+        """
+        return cls(**decode_transaction(data))
+
+    def to_bytes(self) -> bytes:
+        """
+        The binary encoding of the transaction, used on disk and on the wire.
+        """
+        return self._canonical_bytes
+
+    @property
+    def id(self) -> str:
+        """
+        The content address of the transaction (sha256 of its canonical bytes).
+        """
+        return self._id
+
+    @property
+    def message(self) -> bytes:
+        """
+        The message covered by the transaction signature.
+        """
+        return f"{self.sender}{self.recipient}{self.amount}{self.nonce}".encode()
+
+    @property
+    def canonical_bytes(self) -> bytes:
+        """
+        The canonical serialized (binary) representation of the transaction.
+        """
+        return self._canonical_bytes
+
+    @property
+    def size(self) -> int:
+        """
+        The size in bytes of the serialized transaction, as stored and sent over the wire.
+        """
+        return len(self._canonical_bytes)
+
+    def to_record(self) -> TransactionRecord:
+        """
+        The compact record of the transaction held by the ledger, reusing the computed id.
+        """
+        return TransactionRecord(self.sender, self.recipient, self.amount, self.nonce, decode(self.signature), self.timestamp,
+                                 self._id, len(self._canonical_bytes))
+
     def to_dict(self):
         return {
             "sender": self.sender,
@@ -69,9 +135,11 @@ class Transaction(TransactionCreate):
         
         Args:
         - arbitrary_types_allowed: bool
+        - allow_mutation: bool
         - json_encoders: dict
         """
         arbitrary_types_allowed = True
+        allow_mutation = False
         json_encoders = {
             datetime: lambda v: v.isoformat(),
         }
@@ -1,6 +1,7 @@
 # models/transaction.py
 
 from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 from app.api.config.env import GENESIS_PUBLIC_KEY, SEBASTIAN_PUBLIC_KEY
@@ -30,4 +31,37 @@ class PublicKey(BaseModel):
             "example": {
                 "public_key": GENESIS_PUBLIC_KEY
             }
-        }
\ No newline at end of file
+        }
+
+class WalletsQuery(BaseModel):
+    """
+    Wallets Query Model
+
+    Accounts of a bulk balance or nonce query, by public key or by address (sha256 of the raw
+    public key). With since_version (and the epoch it was read in), only the accounts that
+    changed after that version are returned. Nodes with a persistent account state do not
+    support since_version.
+
+    Args:
+    - public_keys: List[str]
+    - addresses: List[str]
+    - since_version: Optional[int]
+    - epoch: Optional[str]
+    """
+    public_keys: List[str] = Field(default=[], description="The public keys of the wallets")
+    addresses: List[str] = Field(default=[], description="The addresses of the wallets")
+    since_version: Optional[int] = Field(default=None, description="Only return the wallets changed after this state version")
+    epoch: Optional[str] = Field(default=None, description="The epoch since_version belongs to")
+
+    class Config:
+        """
+        Pydantic Config
+        """
+        schema_extra = {
+            "example": {
+                "public_keys": [GENESIS_PUBLIC_KEY],
+                "addresses": [],
+                "since_version": None,
+                "epoch": None
+            }
+        }
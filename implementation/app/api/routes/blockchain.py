@@ -1,22 +1,43 @@
 # routes/blockchain.py
 
-from typing import List
-from networkx.readwrite import json_graph
+import json
+
+from datetime import datetime
+from typing import Iterator, List, Optional
 from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response as RawResponse, StreamingResponse
 from slowapi.errors import RateLimitExceeded
 
 # Import the DAG instance
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
-from app.api.config.dag import dag
+from app.api.config.dag import engine
 
-from app.api.models.blockchain import Block
 from app.api.models.responses import Response, ResponseError
 
 from app.api.methods.errors import handle_error
+from app.api.methods.codec import BINARY_MEDIA_TYPE, U32
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Records written to the export stream at once
+EXPORT_CHUNK_RECORDS = 256
+
+def local_time(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Convert a timezone aware query parameter to the naive local time used by the blocks.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+def node_dict(node: dict) -> dict:
+    """
+    Get the JSON representation of a DAG node (block record and state).
+    """
+    return {"block": node['block'].to_dict(), "state": node['state']}
+
 """
 API Endpoints:
 
@@ -24,6 +45,7 @@ Blockchain:
 - Get unconfirmed blocks
 - Get block by hash
 - Get DAG
+- Export DAG
 
 Nodes (TODO):
 - Get neighbors
@@ -54,7 +76,7 @@ def get_unconfirmed_blocks(request: Request):
     """
     try:
         # Get the unconfirmed blocks
-        unconfirmed_blocks = dag.get_unconfirmed_blocks()
+        unconfirmed_blocks = [node_dict(node) for node in engine.snapshot.get_unconfirmed_blocks()]
         return Response(data=unconfirmed_blocks, message=f"{len(unconfirmed_blocks)} Unconfirmed blocks.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
@@ -88,10 +110,13 @@ def get_block_by_hash(request: Request, block_hash: str):
     """
     try:
         # Get the block by hash
-        block = dag.get_block_by_hash(block_hash)
+        block = engine.snapshot.get_block_by_hash(block_hash)
         if block is None:
             raise HTTPException(status_code=404, detail="Block not found.")
-        return Response(data=block, message="Block.")
+        # Peers asking for the binary codec get the encoded block only
+        if BINARY_MEDIA_TYPE in request.headers.get('accept', ''):
+            return RawResponse(content=block['block'].to_bytes(), media_type=BINARY_MEDIA_TYPE)
+        return Response(data=node_dict(block), message="Block.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -122,8 +147,12 @@ def get_dag(request: Request):
     - Response[dict]: DAG.
     """
     try:
-        # Get the DAG
-        graph_data = json_graph.node_link_data(dag.graph)
+        # Get the DAG, in the node-link format, from a consistent snapshot
+        nodes, links = [], []
+        for _, block, state in engine.snapshot.iter_blocks():
+            nodes.append({"block": block.to_dict(), "state": state, "id": block.hash})
+            links.extend({"source": child_hash, "target": block.hash} for child_hash in dict.fromkeys(block.children_hashes))
+        graph_data = {"directed": True, "multigraph": False, "graph": {}, "nodes": nodes, "links": links}
         return Response(data=graph_data, message="DAG.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
@@ -131,4 +160,90 @@ def get_dag(request: Request):
         # This is to ensure HTTPException is not caught in the generic Exception
         raise
     except Exception as e:
-        handle_error(e, logger)
\ No newline at end of file
+        handle_error(e, logger)
+
+# Export DAG
+@router.get('/dag/export/', 
+            status_code=status.HTTP_200_OK, 
+            tags=["BLOCKCHAIN"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                429: {"model": ResponseError, "description": "Too many requests."},
+                400: {"model": ResponseError, "description": "Invalid export parameters."},
+                200: {"content": {NDJSON_MEDIA_TYPE: {}, BINARY_MEDIA_TYPE: {}}, "description": "Stream of blocks in topological order."}
+            })
+#@limiter.limit("5/minute")
+def export_dag(request: Request,
+               cursor: int = 0,
+               limit: Optional[int] = None,
+               min_index: Optional[int] = None,
+               max_index: Optional[int] = None,
+               since: Optional[datetime] = None,
+               until: Optional[datetime] = None):
+    """
+    Stream the blocks of the DAG in topological order, with constant memory.
+
+    Every NDJSON line is {"position", "hash", "state", "block"}; children hashes of the block
+    give its links. Peers asking for the binary codec get the encoded blocks instead, each one
+    prefixed by its length (u32). To get the next page, pass the last position + 1 as cursor;
+    a page shorter than limit is the last one.
+    
+    Args:
+    - request: Request
+    - cursor: int
+    - limit: Optional[int]
+    - min_index: Optional[int]
+    - max_index: Optional[int]
+    - since: Optional[datetime]
+    - until: Optional[datetime]
+    
+    Returns:
+    - StreamingResponse: Blocks in topological order.
+    """
+    try:
+        if cursor < 0 or (limit is not None and limit <= 0):
+            raise HTTPException(status_code=400, detail="The cursor must be positive and the limit greater than zero.")
+        # The whole export reads one snapshot, so it is consistent even while blocks are added
+        snapshot = engine.snapshot
+        binary = BINARY_MEDIA_TYPE in request.headers.get('accept', '')
+        since, until = local_time(since), local_time(until)
+
+        def selected_blocks() -> Iterator[tuple]:
+            count = 0
+            for position, block, state in snapshot.iter_blocks(cursor):
+                if limit is not None and count >= limit:
+                    return
+                if min_index is not None and block.index < min_index:
+                    continue
+                if max_index is not None and block.index > max_index:
+                    continue
+                if since is not None and block.timestamp < since:
+                    continue
+                if until is not None and block.timestamp > until:
+                    continue
+                count += 1
+                yield position, block, state
+
+        def stream() -> Iterator[bytes]:
+            chunk: List[bytes] = []
+            for position, block, state in selected_blocks():
+                if binary:
+                    payload = block.to_bytes()
+                    chunk.append(U32.pack(len(payload)) + payload)
+                else:
+                    record = {"position": position, "hash": block.hash, "state": state, "block": block.to_dict()}
+                    chunk.append(json.dumps(record).encode() + b'\n')
+                if len(chunk) >= EXPORT_CHUNK_RECORDS:
+                    yield b''.join(chunk)
+                    chunk = []
+            if chunk:
+                yield b''.join(chunk)
+
+        return StreamingResponse(stream(), media_type=BINARY_MEDIA_TYPE if binary else NDJSON_MEDIA_TYPE)
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
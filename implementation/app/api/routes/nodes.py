@@ -1,22 +1,36 @@
 # routes/nodes.py
 
+import json
+
 from typing import List
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response as RawResponse
 import requests
 from slowapi.errors import RateLimitExceeded
 
 # Import the DAG instance
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
-from app.api.config.dag import dag
+from app.api.config.dag import engine
+from app.api.config.seen import seen_transactions, seen_blocks
+from app.api.config.ingestion import ingestion
 from app.api.config.env import IS_PRODUCTION, LOCALHOST_SERVER_URL, PRODUCTION_SERVER_URL, API_NAME
+from app.api.config.env import SYNC_PAGE_SIZE, SYNC_BLOOM_ERROR_RATE, SYNC_TIMEOUT_S, SYNC_BLOOM_MAX_KB
 
-from app.api.models.blockchain import Block
+from app.api.models.blockchain import Block, DAG
 from app.api.models.transaction import Transaction
+from app.api.models.records import BlockRecord, TransactionRecord
 from app.api.models.neighbor import Neighbor
+from app.api.models.inventory import Inventory
+from app.api.models.sync import SyncRequest, BlocksRequest
 from app.api.models.responses import Response, ResponseError
 
 from app.api.methods.errors import handle_error
+from app.api.methods.ingestion import IngestionOverloaded
+from app.api.methods.codec import BINARY_MEDIA_TYPE, CodecError, decode_transaction_batch, encode_block_batch
+from app.api.methods.bloom import BloomFilter
+from app.api.methods.sync import sync_with_neighbor
+from app.api.methods.wallets import decode
 
 router = APIRouter()
 
@@ -26,10 +40,71 @@ API Endpoints:
 Nodes:
 - Get neighbors
 - Connect to neighbor
+- Get missing blocks (sync)
+- Get blocks by hash (sync)
+- Receive neighbor inventory
 - Receive neighbor transaction
+- Receive neighbor transaction batch
 - Receive neighbor block
 """
 
+async def read_body(request: Request, model, record):
+    """
+    Read a transaction or block from the request body, in the binary codec or in JSON
+    depending on its content type. JSON is validated by the API model, then converted.
+    
+    Args:
+    - request: Request
+    - model: Transaction or Block
+    - record: TransactionRecord or BlockRecord
+    
+    Returns:
+    - The record instance.
+    
+    Raises:
+    - HTTPException: 415 for unsupported content types, 422 for invalid payloads.
+    """
+    content_type = request.headers.get('content-type', 'application/json')
+    body = await request.body()
+    try:
+        if content_type.startswith(BINARY_MEDIA_TYPE):
+            return record.from_bytes(body)
+        if content_type.startswith('application/json'):
+            return model(**json.loads(body)).to_record()
+    except (CodecError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    raise HTTPException(status_code=415, detail=f"Unsupported content type {content_type}.")
+
+async def read_transaction(request: Request) -> TransactionRecord:
+    return await read_body(request, Transaction, TransactionRecord)
+
+async def read_block(request: Request) -> BlockRecord:
+    return await read_body(request, Block, BlockRecord)
+
+async def read_transaction_batch(request: Request) -> List[TransactionRecord]:
+    """
+    Read a batch of transactions from the request body: a binary batch, or a JSON list.
+    
+    Args:
+    - request: Request
+    
+    Returns:
+    - List[TransactionRecord]: The transactions, in order.
+    
+    Raises:
+    - HTTPException: 415 for unsupported content types, 422 for invalid payloads.
+    """
+    content_type = request.headers.get('content-type', 'application/json')
+    body = await request.body()
+    try:
+        if content_type.startswith(BINARY_MEDIA_TYPE):
+            return [TransactionRecord.from_bytes(payload) for payload in decode_transaction_batch(body)]
+        if content_type.startswith('application/json'):
+            return [Transaction(**fields).to_record() for fields in json.loads(body)]
+    except (CodecError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    raise HTTPException(status_code=415, detail=f"Unsupported content type {content_type}.")
+
 # Get neighbors
 @router.get('/neighbors/', 
             response_model=Response[List[str]], 
@@ -53,7 +128,7 @@ def get_neighbors(request: Request):
     """
     try:
         # Get the neighbors
-        neighbors = dag.get_neighbors()
+        neighbors = list(engine.snapshot.neighbors)
         return Response(data=neighbors, message=f"{len(neighbors)} Neighbors.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
@@ -93,16 +168,9 @@ def connect_to_neighbor(request: Request,
         if not address_url.startswith("http"):
             raise HTTPException(status_code=400, detail="Invalid neighbor URL.")
 
-        # Get the neighbor's DAG
-        neighbor_dag = requests.get(f"{address_url}api/v1/{API_NAME}/dag/").json()
-        neighbor_dag_nodes = neighbor_dag["data"]["nodes"]
-
-        # Compare which DAG is bigger
-        print("Neighbor DAG nodes:", len(neighbor_dag_nodes))
-        print("Current DAG nodes:", len(dag.graph.nodes))
-        if len(neighbor_dag_nodes) > len(dag.graph.nodes):
-            # Load the neighbor's DAG
-            dag.recreate_blockchain_from_graph(neighbor_dag)
+        # Fetch only the blocks the node lacks from the neighbor and merge them into the DAG
+        added_blocks = sync_with_neighbor(engine, address_url, SYNC_PAGE_SIZE, SYNC_BLOOM_ERROR_RATE, SYNC_TIMEOUT_S)
+        print(f"Synchronized {added_blocks} blocks from {address_url}.")
 
         # Get the neighbor neighbors
         neighbor_neighbors = requests.get(f"{address_url}api/v1/{API_NAME}/nodes/neighbors/").json()
@@ -110,10 +178,9 @@ def connect_to_neighbor(request: Request,
 
         # Merge the neighbors of the neighbor with the current node
         for neighbor_neighbor in neighbor_neighbors:
-            if neighbor_neighbor not in dag.get_neighbors():
-                dag.add_neighbor(neighbor_neighbor)
+            engine.execute(DAG.add_neighbor, neighbor_neighbor)
 
-        if address_url not in dag.get_neighbors():
+        if address_url not in engine.snapshot.neighbors:
             # Send the petition to connect to the neighbor
             if int(IS_PRODUCTION): # type: ignore
                 requests.post(f"{address_url}api/v1/{API_NAME}/nodes/connect/", json=Neighbor(address_url=PRODUCTION_SERVER_URL).dict()) # type: ignore
@@ -121,7 +188,7 @@ def connect_to_neighbor(request: Request,
                 requests.post(f"{address_url}api/v1/{API_NAME}/nodes/connect/", json=Neighbor(address_url=LOCALHOST_SERVER_URL).dict()) # type: ignore
 
             # Add the neighbor
-            dag.add_neighbor(address_url) # type: ignore
+            engine.execute(DAG.add_neighbor, address_url)
 
         return Response(data=address_url, message=f"Connected to neighbor {address_url}.")
     except RateLimitExceeded:
@@ -132,33 +199,213 @@ def connect_to_neighbor(request: Request,
     except Exception as e:
         handle_error(e, logger)
 
+# Get missing blocks (sync)
+@router.post('/sync/', 
+             response_model=Response[dict], 
+             status_code=status.HTTP_200_OK, 
+             tags=["NODES"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Invalid or too large bloom filter."},
+                 200: {"model": Response[dict], "description": "Hashes of the blocks the neighbor lacks and tips of the node."}
+             })
+#@limiter.limit("5/minute")
+def get_missing_blocks(request: Request,
+                       sync_request: SyncRequest):
+    """
+    Get the hashes of the blocks a neighbor lacks, in topological order, from the summary
+    (tips and bloom filter) of the blocks it knows. The tips of the node are sent along, so
+    the neighbor can fetch the ones hidden by a bloom false positive.
+    
+    Args:
+    - request: Request
+    - sync_request: SyncRequest
+    
+    Returns:
+    - Response[dict]: Hashes of the blocks the neighbor lacks (missing) and tips of the node (tips).
+    """
+    try:
+        try:
+            bloom = BloomFilter.from_bytes(decode(sync_request.bloom), SYNC_BLOOM_MAX_KB * 1024 * 8)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid bloom filter: {e}")
+        tips = set(sync_request.tips)
+        snapshot = engine.snapshot
+        missing = snapshot.get_missing_blocks(lambda block_hash: block_hash in tips or block_hash in bloom)
+        return Response(data={"missing": missing, "tips": list(snapshot.tips)}, message=f"{len(missing)} missing blocks.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Get blocks by hash (sync)
+@router.post('/sync/blocks/', 
+             response_model=Response[list], 
+             status_code=status.HTTP_200_OK, 
+             tags=["NODES"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Too many blocks requested."},
+                 200: {"model": Response[list], "description": "Requested blocks."}
+             })
+#@limiter.limit("5/minute")
+def get_sync_blocks(request: Request,
+                    blocks_request: BlocksRequest):
+    """
+    Get a page of blocks by hash, in the requested order. Unknown hashes are left out.
+    Peers asking for the binary codec get a binary block batch.
+    
+    Args:
+    - request: Request
+    - blocks_request: BlocksRequest
+    
+    Returns:
+    - Response[list]: Requested blocks.
+    """
+    try:
+        if len(blocks_request.hashes) > SYNC_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"At most {SYNC_PAGE_SIZE} blocks can be requested at once.")
+        snapshot = engine.snapshot
+        blocks = [block for block in map(snapshot.get_block, blocks_request.hashes) if block is not None]
+        if BINARY_MEDIA_TYPE in request.headers.get('accept', ''):
+            return RawResponse(content=encode_block_batch([block.to_bytes() for block in blocks]), media_type=BINARY_MEDIA_TYPE)
+        return Response(data=[block.to_dict() for block in blocks], message=f"{len(blocks)} blocks.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Receive neighbor inventory
+@router.post('/inventory/', 
+             response_model=Response[Inventory], 
+             status_code=status.HTTP_200_OK, 
+             tags=["NODES"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 200: {"model": Response[Inventory], "description": "Announced ids the node lacks."}
+             })
+#@limiter.limit("5/minute")
+def receive_neighbor_inventory(request: Request,
+                               inventory: Inventory):
+    """
+    Receive the ids a neighbor is about to send, and answer with the ones this node lacks,
+    so the neighbor only sends those bodies.
+    
+    Args:
+    - request: Request
+    - inventory: Inventory
+    
+    Returns:
+    - Response[Inventory]: Announced ids the node lacks.
+    """
+    try:
+        snapshot = engine.snapshot
+        wanted = Inventory(
+            transactions=[tx_id for tx_id in seen_transactions.unseen(inventory.transactions) if tx_id not in snapshot.unconfirmed_transactions],
+            blocks=[block_hash for block_hash in seen_blocks.unseen(inventory.blocks) if block_hash not in snapshot]
+        )
+        return Response(data=wanted, message=f"{len(wanted.transactions)} transactions and {len(wanted.blocks)} blocks wanted.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
 # Receive neighbor transaction
 @router.post('/transaction/', 
-             response_model=Response[Transaction], 
+             response_model=Response[dict], 
              status_code=status.HTTP_200_OK, 
              tags=["NODES"],
              responses={
                  500: {"model": ResponseError, "description": "Internal server error."},
+                 503: {"model": ResponseError, "description": "Node overloaded."},
                  429: {"model": ResponseError, "description": "Too many requests."},
                  200: {"model": Response[str], "description": "Received neighbor transaction."}
              })
 #@limiter.limit("5/minute")
 def receive_neighbor_transaction(request: Request,
-                                 transaction: Transaction):
+                                 transaction: TransactionRecord = Depends(read_transaction)):
     """
     Receive a transaction from a neighbor.
     
     Args:
     - request: Request
-    - transaction: Transaction
+    - transaction: TransactionRecord
     
     Returns:
     - Response[dict]: Received neighbor transaction.
     """
     try:
-        # Add the transaction to the DAG
-        dag.add_transaction(transaction)
-        return Response(data=transaction, message="Received neighbor transaction.")
+        # Skip the transactions already received from another neighbor
+        if not seen_transactions.add(transaction.id):
+            return Response(data=transaction.to_dict(), message="Neighbor transaction already seen.")
+        # Add the transaction to the DAG through the ingestion pipeline
+        ingestion.ingest([transaction])
+        return Response(data=transaction.to_dict(), message="Received neighbor transaction.")
+    except IngestionOverloaded as e:
+        # Not processed: forgotten, so the neighbor (or another one) can deliver it again
+        seen_transactions.discard(transaction.id)
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Receive neighbor transaction batch
+@router.post('/transactions/batch/', 
+             response_model=Response[List[dict]], 
+             status_code=status.HTTP_200_OK, 
+             tags=["NODES"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 503: {"model": ResponseError, "description": "Node overloaded."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 200: {"model": Response[List[dict]], "description": "Result of each transaction of the batch."}
+             })
+#@limiter.limit("5/minute")
+def receive_neighbor_transaction_batch(request: Request,
+                                       transactions: List[TransactionRecord] = Depends(read_transaction_batch)):
+    """
+    Receive a batch of transactions from a neighbor.
+    
+    Args:
+    - request: Request
+    - transactions: List[TransactionRecord]
+    
+    Returns:
+    - Response[List[dict]]: Result of each transaction, in the order of the batch.
+    """
+    try:
+        # Skip the transactions already received from another neighbor
+        unseen = [tx for tx in transactions if seen_transactions.add(tx.id)]
+        # Add the transactions to the DAG through the ingestion pipeline, validating the batch in one pass
+        added = dict(zip((tx.id for tx in unseen), ingestion.ingest(unseen)))
+        rejections = [added[tx.id] if tx.id in added else "Already seen." for tx in transactions]
+        results = [
+            {"id": tx.id, "accepted": rejection is None, "detail": rejection}
+            for tx, rejection in zip(transactions, rejections)
+        ]
+        accepted = sum(1 for result in results if result["accepted"])
+        return Response(data=results, message=f"Received {len(results)} neighbor transactions, {accepted} accepted.")
+    except IngestionOverloaded as e:
+        # Not processed: forgotten, so the neighbor (or another one) can deliver them again
+        for tx in unseen:
+            seen_transactions.discard(tx.id)
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -169,7 +416,7 @@ def receive_neighbor_transaction(request: Request,
 
 # Receive neighbor block
 @router.post('/block/', 
-             response_model=Response[Block], 
+             response_model=Response[dict], 
              status_code=status.HTTP_200_OK, 
              tags=["NODES"],
              responses={
@@ -179,21 +426,32 @@ def receive_neighbor_transaction(request: Request,
              })
 #@limiter.limit("5/minute")
 def receive_neighbor_block(request: Request,
-                           block: Block):
+                           block: BlockRecord = Depends(read_block)):
     """
     Receive a block from a neighbor.
     
     Args:
     - request: Request
-    - block: Block
+    - block: BlockRecord
     
     Returns:
     - Response[dict]: Received neighbor block.
     """
     try:
+        # Skip the blocks already received from another neighbor
+        if not seen_blocks.add(block.hash):
+            return Response(data=block.to_dict(), message="Neighbor block already seen.")
         # Add the block to the DAG
-        dag.add_block(block)
-        return Response(data=block, message="Received neighbor block.")
+        try:
+            added = engine.execute(DAG.add_block, block)
+        except Exception:
+            seen_blocks.discard(block.hash)
+            raise
+        if not added:
+            # Rejected (unknown children, invalid signatures...): forgotten, so it is processed again if delivered again
+            seen_blocks.discard(block.hash)
+            return Response(data=block.to_dict(), message="Neighbor block rejected.")
+        return Response(data=block.to_dict(), message="Received neighbor block.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -1,21 +1,26 @@
 # routes/transactions.py
 
 from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Request, status
-import requests
 from slowapi.errors import RateLimitExceeded
 
 # Import the DAG instance
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
-from app.api.config.dag import dag
-from app.api.config.env import API_NAME
+from app.api.config.dag import engine
+from app.api.config.outbox import transaction_batcher
+from app.api.config.seen import seen_transactions
+from app.api.config.ingestion import ingestion
 
 from app.api.models.wallet import PublicKey
 from app.api.models.transaction import TransactionCreate, Transaction
 from app.api.models.responses import Response, ResponseError
 
+from app.api.methods.codec import CodecError
 from app.api.methods.errors import handle_error
+from app.api.methods.ingestion import IngestionOverloaded
+from app.api.methods.wallets import address
 
 router = APIRouter()
 
@@ -24,6 +29,8 @@ API Endpoints:
 
 Transactions:
 - Get unconfirmed transactions
+- Get unconfirmed transactions by sender
+- Get unconfirmed transaction by id
 - Post transaction
 """
 
@@ -35,21 +42,28 @@ Transactions:
             responses={
                 500: {"model": ResponseError, "description": "Internal server error."},
                 429: {"model": ResponseError, "description": "Too many requests."},
+                400: {"model": ResponseError, "description": "Invalid offset or limit."},
                 200: {"model": Response[list], "description": "Unconfirmed transactions."}
             })
-def get_unconfirmed_transactions(request: Request):
+def get_unconfirmed_transactions(request: Request,
+                                 offset: int = 0,
+                                 limit: Optional[int] = None):
     """
     Get unconfirmed transactions.
     
     Args:
     - request: Request
+    - offset: int
+    - limit: Optional[int]
     
     Returns:
     - Response[list]: Unconfirmed transactions.
     """
     try:
-        # Get the unconfirmed transactions
-        unconfirmed_transactions = [tx.to_dict() for tx in dag.unconfirmed_transactions]
+        if offset < 0 or (limit is not None and limit < 0):
+            raise HTTPException(status_code=400, detail="Invalid offset or limit.")
+        # Get the unconfirmed transactions, in arrival order
+        unconfirmed_transactions = [tx.to_dict() for tx in engine.snapshot.unconfirmed_transactions.page(offset, limit)]
         # Return the unconfirmed transactions
         return Response(data=unconfirmed_transactions, message=f"{len(unconfirmed_transactions)} Unconfirmed transactions.")
     except RateLimitExceeded:
@@ -60,6 +74,79 @@ def get_unconfirmed_transactions(request: Request):
     except Exception as e:
         handle_error(e, logger)
 
+# Get unconfirmed transactions by sender
+@router.post('/unconfirmed/sender/', 
+             response_model=Response[list], 
+             status_code=status.HTTP_200_OK, 
+             tags=["TRANSACTIONS"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Invalid public key."},
+                 200: {"model": Response[list], "description": "Unconfirmed transactions of the sender."}
+             })
+def get_unconfirmed_transactions_by_sender(wallet: PublicKey,
+                                           request: Request):
+    """
+    Get the unconfirmed transactions of a sender, ordered by nonce.
+    
+    Args:
+    - wallet: PublicKey
+    - request: Request
+    
+    Returns:
+    - Response[list]: Unconfirmed transactions of the sender.
+    """
+    try:
+        try:
+            sender = address(wallet.public_key)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid public key.")
+        unconfirmed_transactions = [tx.to_dict() for tx in engine.snapshot.unconfirmed_transactions.by_sender(sender)]
+        return Response(data=unconfirmed_transactions, message=f"{len(unconfirmed_transactions)} Unconfirmed transactions.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Get unconfirmed transaction by id
+@router.get('/unconfirmed/{tx_id}/', 
+            response_model=Response[dict], 
+            status_code=status.HTTP_200_OK, 
+            tags=["TRANSACTIONS"],
+            responses={
+                500: {"model": ResponseError, "description": "Internal server error."},
+                429: {"model": ResponseError, "description": "Too many requests."},
+                404: {"model": ResponseError, "description": "Transaction not found."},
+                200: {"model": Response[dict], "description": "Unconfirmed transaction."}
+            })
+def get_unconfirmed_transaction(request: Request, tx_id: str):
+    """
+    Get an unconfirmed transaction by its id.
+    
+    Args:
+    - request: Request
+    - tx_id: str
+    
+    Returns:
+    - Response[dict]: Unconfirmed transaction.
+    """
+    try:
+        transaction = engine.snapshot.unconfirmed_transactions.get(tx_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found.")
+        return Response(data=transaction.to_dict(), message="Unconfirmed transaction.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
 # Post transaction
 @router.post('/post/', 
              response_model=Response[dict], 
@@ -67,7 +154,9 @@ def get_unconfirmed_transactions(request: Request):
              tags=["TRANSACTIONS"],
              responses={
                  500: {"model": ResponseError, "description": "Internal server error."},
+                 503: {"model": ResponseError, "description": "Node overloaded."},
                  429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Invalid transaction encoding, or transaction could not be added."},
                  200: {"model": Response[dict], "description": "Transaction posted."}
              })
 #@limiter.limit("5/minute")
@@ -84,17 +173,26 @@ def post_transaction(transaction: TransactionCreate,
     - Response[dict]: Transaction posted.
     """
     try:
-        # Create the transaction
-        transaction = Transaction(**transaction.dict(),
-                                  timestamp=datetime.now())
-        # Add the transaction
-        transaction_added = dag.add_transaction(transaction)
-        if not transaction_added:
-            raise HTTPException(status_code=400, detail="Transaction could not be added.")
-        # Share the transaction with neighbors
-        for neighbor in dag.neighbors:
-            requests.post(f"{neighbor}api/v1/{API_NAME}/nodes/transaction/", json=transaction.to_dict())
+        # Create the transaction (its keys and signature must be valid Base64)
+        try:
+            transaction = Transaction(**transaction.dict(),
+                                      timestamp=datetime.now())
+        except (CodecError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid transaction encoding.")
+        # Add the transaction through the ingestion pipeline (signature verification, then admission),
+        # held by the ledger as a compact record
+        rejection, = ingestion.ingest([transaction.to_record()])
+        if rejection is not None:
+            raise HTTPException(status_code=400, detail=f"Transaction could not be added. {rejection}")
+        # Share the transaction with neighbors, coalesced into per neighbor batches,
+        # and remember it so its echoes are dropped
+        seen_transactions.add(transaction.id)
+        payload = transaction.to_bytes()
+        for neighbor in engine.snapshot.neighbors:
+            transaction_batcher.add(neighbor, payload)
         return Response(data=transaction, message="Transaction posted.")
+    except IngestionOverloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -1,15 +1,18 @@
 # routes/transactions.py
 
 from datetime import datetime
+from typing import Callable
 from fastapi import APIRouter, HTTPException, Request, status
 from slowapi.errors import RateLimitExceeded
 
 # Import the DAG instance
 from app.api.config.limiter import limiter
 from app.api.config.logger import logger
-from app.api.config.dag import dag
+from app.api.config.dag import engine
+from app.api.config.env import WALLETS_BULK_LIMIT
 
-from app.api.models.wallet import PublicKey
+from app.api.models.wallet import PublicKey, WalletsQuery
+from app.api.models.snapshot import DAGSnapshot
 from app.api.models.transaction import TransactionCreate, Transaction
 from app.api.models.responses import Response, ResponseError
 
@@ -23,8 +26,40 @@ API Endpoints:
 Wallet:
 - Get wallet nonce
 - Get wallet balance
+- Get wallets nonces
+- Get wallets balances
 """
 
+def query_wallets(query: WalletsQuery, value: Callable[[DAGSnapshot, str], float]) -> dict:
+    """
+    Answer a bulk wallet query from one snapshot, so all the values belong to the same state version.
+    
+    Args:
+    - query: WalletsQuery
+    - value: Callable[[DAGSnapshot, str], float]
+    
+    Returns:
+    - dict: epoch, version and the values keyed as requested (public key or address).
+    
+    Raises:
+    - HTTPException: 400 if too many wallets are requested, or since_version is given to a node
+      whose snapshots are not consistent (persistent account state).
+    """
+    identifiers = query.public_keys + query.addresses
+    if len(identifiers) > WALLETS_BULK_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {WALLETS_BULK_LIMIT} wallets can be queried at once.")
+    snapshot = engine.snapshot
+    if query.since_version is not None and not snapshot.consistent:
+        raise HTTPException(status_code=400, detail="This node does not support since_version (persistent account state).")
+    # A version from another epoch (before a restart) can not be compared, so everything is returned
+    since_version = query.since_version if query.epoch == snapshot.epoch else None
+
+    values = {}
+    for identifier in identifiers:
+        if since_version is None or snapshot.changed_since(identifier, since_version):
+            values[identifier] = value(snapshot, identifier)
+    return {"epoch": snapshot.epoch, "version": snapshot.version, "wallets": values}
+
 # Get wallet nonce
 @router.post('/nonce/', 
              response_model=Response[int], 
@@ -50,7 +85,7 @@ def get_wallet_nonce(wallet: PublicKey,
     """
     try:
         # Get the wallet nonce
-        nonce = dag.nonces.get(wallet.public_key, 0)
+        nonce = engine.snapshot.get_nonce(wallet.public_key)
         return Response(data=nonce, message="Wallet nonce.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
@@ -85,7 +120,77 @@ def get_wallet_balance(wallet: PublicKey,
     """
     try:
         # Get the wallet balance with the decimals defined in the DAG instance
-        return Response(data=dag.get_wallet_balance(wallet.public_key), message="Wallet balance.")
+        return Response(data=engine.snapshot.get_wallet_balance(wallet.public_key), message="Wallet balance.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Get wallets nonces
+@router.post('/nonces/', 
+             response_model=Response[dict], 
+             status_code=status.HTTP_200_OK, 
+             tags=["WALLETS"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Too many wallets or since_version not supported."},
+                 200: {"model": Response[dict], "description": "Wallets nonces."}
+             })
+#@limiter.limit("5/minute")
+def get_wallets_nonces(query: WalletsQuery,
+                       request: Request):
+    """
+    Get the nonces of several wallets, from one state version.
+    
+    Args:
+    - query: WalletsQuery
+    - request: Request
+    
+    Returns:
+    - Response[dict]: Epoch, version and nonces of the wallets (only the changed ones if since_version is given).
+    """
+    try:
+        data = query_wallets(query, DAGSnapshot.get_nonce)
+        return Response(data=data, message=f"{len(data['wallets'])} Wallets nonces.")
+    except RateLimitExceeded:
+        raise HTTPException(status_code=429, detail="Too many requests.")
+    except HTTPException:
+        # This is to ensure HTTPException is not caught in the generic Exception
+        raise
+    except Exception as e:
+        handle_error(e, logger)
+
+# Get wallets balances
+@router.post('/balances/', 
+             response_model=Response[dict], 
+             status_code=status.HTTP_200_OK, 
+             tags=["WALLETS"],
+             responses={
+                 500: {"model": ResponseError, "description": "Internal server error."},
+                 429: {"model": ResponseError, "description": "Too many requests."},
+                 400: {"model": ResponseError, "description": "Too many wallets or since_version not supported."},
+                 200: {"model": Response[dict], "description": "Wallets balances."}
+             })
+#@limiter.limit("5/minute")
+def get_wallets_balances(query: WalletsQuery,
+                         request: Request):
+    """
+    Get the balances of several wallets, from one state version.
+    
+    Args:
+    - query: WalletsQuery
+    - request: Request
+    
+    Returns:
+    - Response[dict]: Epoch, version and balances of the wallets (only the changed ones if since_version is given).
+    """
+    try:
+        data = query_wallets(query, DAGSnapshot.get_wallet_balance)
+        return Response(data=data, message=f"{len(data['wallets'])} Wallets balances.")
     except RateLimitExceeded:
         raise HTTPException(status_code=429, detail="Too many requests.")
     except HTTPException:
@@ -8,7 +8,13 @@ from slowapi.middleware import SlowAPIMiddleware
 # Config modules import
 from app.api.config.env import API_NAME, PRODUCTION_SERVER_URL, DEVELOPMENT_SERVER_URL, LOCALHOST_SERVER_URL
 from app.api.config.limiter import limiter
-from app.api.config.dag import get_blockchain
+from app.api.config.dag import get_blockchain, get_engine
+from app.api.config.outbox import outbox, transaction_batcher
+from app.api.config.ingestion import ingestion
+from app.api.config.keys import key_registry
+
+# Methods import
+from app.api.methods.wallets import start_process_pool, shutdown_process_pool
 
 # Routes import
 from app.api.routes.nodes import router as nodes
@@ -82,7 +88,12 @@ app.add_middleware(
 
 @app.on_event('startup')
 async def on_startup():
+    start_process_pool()
+    key_registry.open()
     blockchain = get_blockchain()
+    outbox.start()
+    transaction_batcher.start()
+    ingestion.start()
 
     # Actions to be executed when the API starts.
     print('API started')
@@ -90,6 +101,18 @@ async def on_startup():
 @app.on_event('shutdown')
 async def on_shutdown():
     # Actions to be executed when the API shuts down.
+    # Finish the transactions being ingested before stopping the writer
+    ingestion.stop()
+    # Flush the pending transaction batches into the outbox before stopping it
+    transaction_batcher.stop()
+    outbox.stop()
+    get_engine().stop()
+    blockchain = get_blockchain()
+    if blockchain.block_log is not None:
+        blockchain.block_log.close()
+    blockchain.accounts.close()
+    key_registry.close()
+    shutdown_process_pool()
     print('API shut down')
 
 # Include the routes
@@ -0,0 +1,70 @@
+# benchmarks/codec.py
+#
+# Encode/decode throughput and size of the binary codec against the JSON representation.
+# Run from the implementation directory: python -m benchmarks.codec [transactions per block] [rounds]
+
+import json
+import os
+import sys
+import time
+
+from datetime import datetime
+
+os.environ.setdefault('IS_PRODUCTION', '0')
+os.makedirs('app/api/shared', exist_ok=True)
+
+from app.api.methods.codec import encode_block, decode_block
+from app.api.methods.wallets import encode
+from app.api.models.blockchain import Block
+from app.api.models.records import BlockRecord
+from app.api.models.transaction import Transaction
+
+# Dilithium2 sizes
+PUBLIC_KEY_SIZE = 1312
+SIGNATURE_SIZE = 2420
+
+def build_block(transactions: int) -> BlockRecord:
+    keys = [encode(os.urandom(PUBLIC_KEY_SIZE)) for _ in range(16)]
+    return Block(
+        index=0,
+        transactions=[
+            Transaction(sender=keys[i % 16], recipient=keys[(i + 1) % 16], amount=i, nonce=i,
+                        signature=encode(os.urandom(SIGNATURE_SIZE)), timestamp=datetime.now())
+            for i in range(transactions)
+        ],
+        children_hashes=[os.urandom(32).hex() for _ in range(8)],
+        timestamp=datetime.now()
+    ).to_record()
+
+def measure(function, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) / rounds
+
+def main() -> None:
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    # Records keep no encoded bytes, so every round encodes the block from scratch
+    block = build_block(transactions)
+
+    json_bytes = json.dumps(block.to_dict()).encode('utf-8')
+    binary_bytes = encode_block(block)
+
+    results = [
+        ("json encode", measure(lambda: json.dumps(block.to_dict()).encode('utf-8'), rounds), len(json_bytes)),
+        ("binary encode", measure(lambda: encode_block(block), rounds), len(binary_bytes)),
+        ("json decode (raw)", measure(lambda: json.loads(json_bytes), rounds), len(json_bytes)),
+        ("binary decode (raw)", measure(lambda: decode_block(binary_bytes), rounds), len(binary_bytes)),
+        ("json decode (Block)", measure(lambda: Block(**json.loads(json_bytes)), rounds), len(json_bytes)),
+        ("binary decode (Block)", measure(lambda: BlockRecord.from_bytes(binary_bytes), rounds), len(binary_bytes)),
+    ]
+
+    print(f"Block with {transactions} transactions, {rounds} rounds")
+    print(f"JSON size:   {len(json_bytes):>10} bytes ({len(json_bytes) / transactions:.0f} per transaction)")
+    print(f"Binary size: {len(binary_bytes):>10} bytes ({len(binary_bytes) / transactions:.0f} per transaction, {len(binary_bytes) / len(json_bytes):.0%} of JSON)")
+    for name, seconds, size in results:
+        print(f"{name:<24} {seconds * 1000:>9.2f} ms/block {size / seconds / 1024 / 1024:>9.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/dag_store.py
+#
+# Memory held per block by the DAG structure: the networkx graph (with the topological
+# order dicts it needed) against the array backed DAGStore. The blocks themselves are
+# shared by both and not counted.
+# Run from the implementation directory: python -m benchmarks.dag_store [blocks] [children per block]
+
+import os
+import sys
+import tracemalloc
+
+from hashlib import sha256
+from types import SimpleNamespace
+
+os.environ.setdefault('IS_PRODUCTION', '0')
+os.makedirs('app/api/shared', exist_ok=True)
+
+import networkx as nx # type: ignore
+
+from app.api.models.dag_store import BlockState, DAGStore
+
+def build_blocks(blocks: int, children: int):
+    """
+    Build stand-in blocks, each referencing the previous children blocks (as the tip selection would).
+    """
+    hashes = [sha256(str(i).encode()).hexdigest() for i in range(blocks)]
+    return [SimpleNamespace(hash=hashes[i], children_hashes=hashes[max(0, i - children):i]) for i in range(blocks)]
+
+def build_networkx(blocks):
+    graph, topological_order, topological_blocks = nx.DiGraph(), {}, {}
+    for position, block in enumerate(blocks):
+        graph.add_node(block.hash, block=block, state=BlockState.VALIDATED)
+        topological_order[block.hash] = position
+        topological_blocks[position] = block.hash
+        for child_hash in block.children_hashes:
+            graph.add_edge(child_hash, block.hash)
+    return graph, topological_order, topological_blocks
+
+def build_store(blocks):
+    store = DAGStore()
+    for block in blocks:
+        store.add(block, BlockState.VALIDATED)
+        for child_hash in block.children_hashes:
+            store.add_edge(child_hash, block.hash)
+    return store
+
+def measure(build, blocks) -> int:
+    """
+    Bytes still allocated by build once its result is kept.
+    """
+    tracemalloc.start()
+    result = build(blocks)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    children = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    blocks = build_blocks(count, children)
+
+    networkx_size = measure(build_networkx, blocks)
+    store_size = measure(build_store, blocks)
+
+    print(f"{count} blocks, {children} children per block")
+    print(f"networkx DiGraph: {networkx_size:>12} bytes ({networkx_size / count:.0f} per block)")
+    print(f"DAGStore:         {store_size:>12} bytes ({store_size / count:.0f} per block, {store_size / networkx_size:.0%} of networkx)")
+    print(f"Estimate for 10M blocks: {store_size / count * 10_000_000 / 1024 ** 3:.1f} GB against {networkx_size / count * 10_000_000 / 1024 ** 3:.1f} GB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/records.py
+#
+# Memory held per transaction by the pydantic API models against the compact ledger records.
+# Run from the implementation directory: python -m benchmarks.records [transactions] [wallets]
+
+import os
+import sys
+import tracemalloc
+
+from datetime import datetime
+
+os.environ.setdefault('IS_PRODUCTION', '0')
+os.makedirs('app/api/shared', exist_ok=True)
+
+from app.api.methods.wallets import encode
+from app.api.models.transaction import Transaction
+
+# Dilithium2 sizes
+PUBLIC_KEY_SIZE = 1312
+SIGNATURE_SIZE = 2420
+
+def build_transactions(transactions: int, wallets: int):
+    """
+    Build the transactions as the API receives them: every request carries its own copy of the keys.
+    """
+    keys = [encode(os.urandom(PUBLIC_KEY_SIZE)) for _ in range(wallets)]
+    return [
+        Transaction(sender=keys[i % wallets].encode().decode(), recipient=keys[(i + 1) % wallets].encode().decode(),
+                    amount=i, nonce=i, signature=encode(os.urandom(SIGNATURE_SIZE)), timestamp=datetime.now())
+        for i in range(transactions)
+    ]
+
+def measure(build) -> int:
+    """
+    Bytes still allocated by build once its result is kept.
+    """
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def main() -> None:
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    wallets = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    models_size = measure(lambda: build_transactions(transactions, wallets))
+    records_size = measure(lambda: [tx.to_record() for tx in build_transactions(transactions, wallets)])
+
+    print(f"{transactions} transactions between {wallets} wallets")
+    print(f"API models (Transaction):     {models_size:>12} bytes ({models_size / transactions:.0f} per transaction)")
+    print(f"Records (TransactionRecord):  {records_size:>12} bytes ({records_size / transactions:.0f} per transaction, {records_size / models_size:.0%} of the models)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# tests/conftest.py
+#
+# Shared fixtures. Run from the implementation directory: python -m pytest -q tests
+#
+# The configuration is read from the environment when the app modules are imported, so it
+# is set here first: every store (block log, checkpoints, outbox, key registry, accounts)
+# goes to a temporary directory, and the genesis wallet is a key pair owned by the tests.
+
+import os
+import sys
+import tempfile
+
+from collections import namedtuple
+from datetime import datetime
+
+import oqs # type: ignore
+import pytest
+
+IMPLEMENTATION_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_PATH = tempfile.mkdtemp(prefix="dag-tests-")
+
+sys.path.insert(0, IMPLEMENTATION_PATH)
+os.chdir(IMPLEMENTATION_PATH)
+os.makedirs('app/api/shared', exist_ok=True) # The API log file
+
+def _generate_keypair():
+    from base64 import b64encode
+    with oqs.Signature("Dilithium2") as signer:
+        public_key = signer.generate_keypair()
+        return b64encode(signer.export_secret_key()).decode(), b64encode(public_key).decode()
+
+GENESIS_SECRET_KEY, GENESIS_PUBLIC_KEY = _generate_keypair()
+
+os.environ.update({
+    'API_NAME': 'dag_tests',
+    'IS_PRODUCTION': '0',
+    'LOCALHOST_SERVER_URL': 'http://localhost:8001/',
+    'GENESIS_PUBLIC_KEY': GENESIS_PUBLIC_KEY,
+    'SEBASTIAN_PUBLIC_KEY': GENESIS_PUBLIC_KEY,
+    'SIGNATURE_WORKERS': '1',
+    'BLOCK_LOG_PATH': os.path.join(SHARED_PATH, 'blocklog'),
+    'CHECKPOINT_PATH': os.path.join(SHARED_PATH, 'checkpoints'),
+    'OUTBOX_PATH': os.path.join(SHARED_PATH, 'outbox.sqlite3'),
+    'KEY_REGISTRY_PATH': os.path.join(SHARED_PATH, 'keys.sqlite3'),
+    'ACCOUNT_STATE_PATH': os.path.join(SHARED_PATH, 'accounts.sqlite3'),
+})
+
+Wallet = namedtuple('Wallet', ['secret_key', 'public_key', 'address'])
+
+@pytest.fixture
+def genesis() -> Wallet:
+    """
+    The wallet holding the initial balance (1000.00).
+    """
+    from app.api.methods.wallets import key_id
+    return Wallet(GENESIS_SECRET_KEY, GENESIS_PUBLIC_KEY, key_id(GENESIS_PUBLIC_KEY))
+
+@pytest.fixture
+def new_wallet():
+    """
+    Factory of new wallets.
+    """
+    from app.api.methods.wallets import key_id
+
+    def factory() -> Wallet:
+        secret_key, public_key = _generate_keypair()
+        return Wallet(secret_key, public_key, key_id(public_key))
+    return factory
+
+@pytest.fixture
+def make_transaction():
+    """
+    Factory of signed transaction records.
+    """
+    from app.api.methods.wallets import sign_transaction
+    from app.api.models.transaction import Transaction
+
+    def factory(sender: Wallet, recipient: Wallet, amount: int, nonce: int, valid: bool = True):
+        message = f"{sender.public_key}{recipient.public_key}{amount}{nonce}"
+        signature = sign_transaction(message if valid else message + "tampered", sender.secret_key)
+        return Transaction(sender=sender.public_key, recipient=recipient.public_key, amount=amount, nonce=nonce,
+                           signature=signature, timestamp=datetime.now()).to_record()
+    return factory
+
+@pytest.fixture
+def open_dag(tmp_path):
+    """
+    Factory of DAGs stored in a temporary directory. Opening it again (same path) restarts the node
+    from what it stored. The DAGs are closed at the end of the test.
+    """
+    from app.api.methods.accounts import open_account_state
+    from app.api.models.blockchain import DAG
+    opened = []
+
+    def factory(backend: str = "memory", **fields):
+        dag = DAG(accounts=open_account_state(backend, str(tmp_path / 'accounts.sqlite3'), 1000),
+                  block_log_path=str(tmp_path / 'blocklog'),
+                  checkpoint_path=str(tmp_path / 'checkpoints'),
+                  json_file_path=str(tmp_path / 'blockchain.json'),
+                  neighbors=[],
+                  **fields)
+        dag.load_graph_from_json_file(dag.json_file_path)
+        opened.append(dag)
+        return dag
+
+    yield factory
+    for dag in opened:
+        close_dag(dag)
+
+@pytest.fixture
+def restart(open_dag):
+    """
+    Restart the node of a DAG: close it and open it again from its stores.
+    """
+    def factory(dag, **fields):
+        close_dag(dag)
+        return open_dag("sqlite" if dag.accounts.persistent else "memory", **fields)
+    return factory
+
+@pytest.fixture
+def serve(open_dag, monkeypatch):
+    """
+    Serve a DAG to the routes: start a writer engine for it and use it in the given route modules
+    instead of the node engine. The engines are stopped at the end of the test, before the DAGs close.
+    """
+    from app.api.methods.engine import DAGEngine
+    engines = []
+
+    def factory(dag, *modules):
+        engine = DAGEngine(dag)
+        engines.append(engine)
+        for module in modules:
+            monkeypatch.setattr(module, "engine", engine)
+        return engine
+
+    yield factory
+    for engine in engines:
+        engine.stop()
+
+def close_dag(dag) -> None:
+    """
+    Stop a DAG as the node does on shutdown.
+    """
+    if dag.block_log is not None and not dag.block_log._closed.is_set():
+        dag.block_log.close()
+    dag.accounts.close()
@@ -0,0 +1,182 @@
+# tests/test_accounts.py
+
+import threading
+
+import pytest
+
+from collections import namedtuple
+
+from app.api.methods.accounts import AccountOverlay, AccountState, MemoryAccountState, SQLiteAccountState, open_account_state
+
+Transfer = namedtuple('Transfer', ['sender_address', 'recipient_address', 'amount', 'nonce'])
+
+@pytest.fixture(params=["memory", "sqlite"])
+def open_state(request, tmp_path):
+    opened = []
+
+    def open_state() -> AccountState:
+        state = open_account_state(request.param, str(tmp_path / 'accounts.sqlite3'), 2)
+        opened.append(state)
+        return state
+
+    yield open_state
+    for state in opened:
+        state.close()
+
+def test_account_state_is_abstract():
+    with pytest.raises(TypeError):
+        AccountState() # type: ignore
+    assert isinstance(MemoryAccountState(), AccountState)
+
+def test_unknown_backends_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        open_account_state("redis", str(tmp_path / 'accounts'), 10)
+
+def test_backends_answer_the_same_reads(open_state):
+    state = open_state()
+    state.reset({"a": 100, "b": 5}, {"a": 1})
+
+    assert (state.balance("a"), state.balance("c")) == (100, None)
+    assert (state.nonce("a"), state.nonce("b")) == (1, None)
+    assert dict(state.view_balances()) == {"a": 100, "b": 5}
+    assert dict(state.view_nonces()) == {"a": 1}
+    assert state.export() == ({"a": 100, "b": 5}, {"a": 1})
+
+def test_admitted_nonces_are_kept_apart_from_the_applied_ones(open_state):
+    state = open_state()
+    state.reset({"a": 100}, {"a": 1})
+
+    state.advance_nonce("a", 3)
+    state.advance_nonce("a", 2) # Nonces only move forward
+
+    assert state.nonce("a") == 3
+    assert state.applied_nonce("a") == 1
+    assert dict(state.view_nonces()) == {"a": 3}
+    assert state.export()[1] == {"a": 1}
+
+def test_applied_nonces_settle_the_admitted_ones(open_state):
+    state = open_state()
+    state.reset({"a": 100}, {})
+    state.advance_nonce("a", 2)
+
+    assert state.apply_transactions([Transfer("a", "b", 10, 1)])
+    assert (state.nonce("a"), state.admitted_nonces) == (2, {"a": 2})
+    assert state.apply_transactions([Transfer("a", "b", 10, 2)])
+    assert (state.nonce("a"), state.admitted_nonces) == (2, {})
+    assert (state.balance("a"), state.balance("b")) == (80, 20)
+
+def test_sqlite_persists_only_the_committed_applied_state(tmp_path):
+    path = str(tmp_path / 'accounts.sqlite3')
+    state = SQLiteAccountState(path, 2)
+    state.reset({"a": 100}, {})
+    state.set_balances({"a": 90, "b": 10})
+    state.set_nonce("a", 1)
+    state.commit(7, {"x"})
+    state.advance_nonce("a", 4) # Admitted to the mempool
+    state.set_balances({"a": 0}) # Staged after the last commit
+    state.close()
+
+    state = SQLiteAccountState(path, 2)
+    assert (state.sequence, state.unapplied_blocks) == (7, {"x"})
+    assert state.export() == ({"a": 90, "b": 10}, {"a": 1})
+    assert state.nonce("a") == 1
+    state.close()
+
+def test_sqlite_views_read_the_committed_state_without_the_lock(tmp_path):
+    state = SQLiteAccountState(str(tmp_path / 'accounts.sqlite3'), 2)
+    state.reset({"a": 100}, {"a": 1})
+    state.set_balances({"a": 90}) # Staged, not committed
+    state.advance_nonce("a", 2)
+    balances, nonces = state.view_balances(), state.view_nonces()
+    read = []
+
+    # A writer holding the state lock, e.g. during a commit, does not block the views
+    with state._lock:
+        reader = threading.Thread(target=lambda: read.append((dict(balances), dict(nonces))))
+        reader.start()
+        reader.join(timeout=5)
+
+    assert read == [({"a": 100}, {"a": 2})]
+    state.commit(0, set())
+    assert balances["a"] == 90
+    state.close()
+
+def test_sqlite_reads_go_through_a_bounded_cache(tmp_path):
+    state = SQLiteAccountState(str(tmp_path / 'accounts.sqlite3'), 2)
+    state.reset({account: i for i, account in enumerate("abcde")}, {})
+
+    assert [state.balance(account) for account in "abcde"] == [0, 1, 2, 3, 4]
+    assert len(state._cache) == 2
+    assert state.count() == 5
+    state.close()
+
+def test_mempool_nonces_are_not_kept_across_restarts(open_dag, restart, genesis, new_wallet, make_transaction):
+    dag = open_dag("sqlite", block_mb_size_limit=1)
+    transaction = make_transaction(genesis, new_wallet(), 1, 1)
+    assert dag.admit_transactions([transaction]) == [None]
+    assert dag.accounts.nonce(genesis.address) == 1
+
+    restarted = restart(dag, block_mb_size_limit=1)
+
+    assert restarted.accounts.nonce(genesis.address) is None
+    # The mempool was lost with the restart, so its transactions can be sent again
+    assert restarted.admit_transactions([transaction]) == [None]
+
+def test_overlay_reads_fall_through_to_the_state(open_state):
+    state = open_state()
+    state.reset({"a": 100, "b": 5}, {"a": 1})
+    overlay = AccountOverlay(state)
+
+    assert overlay.transfer("a", "c", 30)
+    overlay.advance_nonce("a", 2)
+
+    assert (overlay.balance("a"), overlay.balance("b"), overlay.balance("c")) == (70, 5, 30)
+    assert overlay.nonce("a") == 2
+    assert (state.balance("a"), state.balance("c"), state.nonce("a")) == (100, None, 1)
+
+def test_overlay_refuses_overdrafts_without_changes(open_state):
+    state = open_state()
+    state.reset({"a": 10}, {})
+    overlay = AccountOverlay(state)
+
+    assert not overlay.transfer("a", "b", 11)
+    assert not overlay.transfer("unknown", "b", 1)
+    assert (overlay.balances, overlay.nonces) == ({}, {})
+
+def test_overlay_commits_only_the_written_accounts():
+    state = MemoryAccountState({account: 100 for account in "abcdefgh"})
+    written = []
+    set_balances = state.set_balances
+    state.set_balances = lambda balances: written.append(dict(balances)) or set_balances(balances)
+    overlay = AccountOverlay(state)
+    overlay.transfer("a", "b", 40)
+    overlay.transfer("b", "c", 10)
+
+    overlay.commit()
+
+    assert written == [{"a": 60, "b": 130, "c": 110}]
+    assert (overlay.balances, overlay.nonces) == ({}, {})
+    assert state.balance("d") == 100
+
+def test_overlay_rollback_drops_the_changes(open_state):
+    state = open_state()
+    state.reset({"a": 10}, {})
+    overlay = AccountOverlay(state)
+    overlay.transfer("a", "b", 5)
+
+    overlay.rollback()
+    overlay.commit()
+
+    assert (state.balance("a"), state.balance("b")) == (10, None)
+
+def test_transactions_are_applied_all_or_nothing(open_state):
+    state = open_state()
+    state.reset({"a": 100}, {})
+
+    assert not state.apply_transactions([Transfer("a", "b", 60, 1), Transfer("b", "c", 10, 1), Transfer("a", "c", 50, 2)])
+    assert state.export()[0] == {"a": 100}
+    assert state.nonce("a") is None
+
+    assert state.apply_transactions([Transfer("a", "b", 60, 1), Transfer("b", "c", 10, 1), Transfer("a", "c", 40, 2)])
+    assert state.export()[0] == {"a": 0, "b": 50, "c": 50}
+    assert (state.nonce("a"), state.nonce("b")) == (2, 1)
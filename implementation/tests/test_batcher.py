@@ -0,0 +1,78 @@
+# tests/test_batcher.py
+
+import time
+
+import pytest
+
+from app.api.methods.batcher import TransactionBatcher
+from app.api.methods.ingestion import verify_and_admit, verify_transactions
+
+@pytest.fixture
+def flushed():
+    return []
+
+def build_batcher(flushed, **fields) -> TransactionBatcher:
+    fields = {"max_count": 3, "max_bytes": 1024, "window": 60, **fields}
+    return TransactionBatcher(lambda peer, payloads: flushed.append((peer, payloads)), **fields)
+
+def test_batch_is_flushed_when_full(flushed):
+    batcher = build_batcher(flushed)
+    for payload in (b"1", b"2", b"3", b"4"):
+        batcher.add("a", payload)
+
+    assert flushed == [("a", [b"1", b"2", b"3"])]
+    assert batcher.batches["a"].payloads == [b"4"]
+
+def test_batch_is_flushed_past_max_bytes(flushed):
+    batcher = build_batcher(flushed, max_bytes=10)
+    batcher.add("a", b"x" * 6)
+    batcher.add("b", b"x" * 6)
+    batcher.add("a", b"y" * 6)
+
+    assert flushed == [("a", [b"x" * 6, b"y" * 6])]
+
+def test_batch_is_flushed_once_its_window_elapses(flushed):
+    batcher = build_batcher(flushed, window=0.05)
+    batcher.add("a", b"1")
+
+    batcher.flush_due()
+    assert flushed == []
+    time.sleep(0.06)
+    batcher.flush_due()
+    assert flushed == [("a", [b"1"])]
+
+def test_stop_flushes_every_batch(flushed):
+    batcher = build_batcher(flushed)
+    batcher.start()
+    batcher.add("a", b"1")
+    batcher.add("b", b"2")
+    batcher.stop()
+
+    assert sorted(flushed) == [("a", [b"1"]), ("b", [b"2"])]
+    assert batcher.batches == {}
+
+def test_flush_errors_do_not_lose_the_next_batches(flushed):
+    def flush(peer, payloads):
+        if peer == "down":
+            raise ConnectionError(peer)
+        flushed.append((peer, payloads))
+    batcher = TransactionBatcher(flush, max_count=1)
+
+    batcher.add("down", b"1")
+    batcher.add("a", b"2")
+
+    assert flushed == [("a", [b"2"])]
+
+def test_verify_and_admit_only_admits_valid_signatures(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    transactions = [make_transaction(genesis, recipient, 1, 1), make_transaction(genesis, recipient, 1, 2, valid=False),
+                    make_transaction(genesis, recipient, 1, 3)]
+    admitted = []
+
+    def admit(batch):
+        admitted.extend(batch)
+        return [None, "Invalid nonce."]
+
+    assert verify_transactions(transactions) == [None, "Invalid signature.", None]
+    assert verify_and_admit(transactions, admit) == [None, "Invalid signature.", "Invalid nonce."]
+    assert admitted == [transactions[0], transactions[2]]
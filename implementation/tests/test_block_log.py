@@ -0,0 +1,118 @@
+# tests/test_block_log.py
+
+import os
+
+import pytest
+
+from app.api.methods.block_log import RECORD_HEADER, BlockLog
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'blocklog')
+
+def open_log(path: str, **options) -> BlockLog:
+    return BlockLog(path, group_commit_interval=0.01, compaction_interval=3600, **options)
+
+def last_segment(log: BlockLog) -> str:
+    return log._segment_path(log.segments()[-1])
+
+def test_records_are_read_back_in_order(log_path):
+    log = open_log(log_path)
+    sequences = [log.append(f"block {i}".encode()) for i in range(5)]
+    log.close()
+
+    log = open_log(log_path)
+    assert sequences == list(range(5))
+    assert list(log.read()) == [(i, f"block {i}".encode()) for i in range(5)]
+    assert [sequence for sequence, _ in log.read(3)] == [3, 4]
+    assert log.append(b"block 5") == 5
+    log.close()
+
+def test_a_torn_tail_is_truncated_on_open(log_path):
+    log = open_log(log_path)
+    for i in range(3):
+        log.append(f"block {i}".encode())
+    log.close()
+    path = last_segment(log)
+    valid_size = os.path.getsize(path)
+    with open(path, 'ab') as file:
+        # A crash in the middle of an append: a header promising more bytes than were written
+        file.write(RECORD_HEADER.pack(3, 100, 0) + b"partial")
+
+    log = open_log(log_path)
+    assert os.path.getsize(path) == valid_size
+    assert [sequence for sequence, _ in log.read()] == [0, 1, 2]
+    assert log.append(b"block 3") == 3
+    log.close()
+
+def test_a_corrupted_record_and_everything_after_it_are_truncated(log_path):
+    log = open_log(log_path)
+    for i in range(3):
+        log.append(f"block {i}".encode())
+    log.close()
+    path = last_segment(log)
+    record_size = RECORD_HEADER.size + len(b"block 0")
+    with open(path, 'r+b') as file:
+        file.seek(record_size + RECORD_HEADER.size)
+        file.write(b"X") # Flip the payload of the second record
+
+    log = open_log(log_path)
+    assert list(log.read()) == [(0, b"block 0")]
+    assert os.path.getsize(path) == record_size
+    assert log.next_sequence == 1
+    log.close()
+
+def test_each_process_and_full_segment_starts_a_new_segment(log_path):
+    log = open_log(log_path, segment_size=64)
+    for i in range(4):
+        log.append(b"x" * 40)
+    log.close()
+    log = open_log(log_path, segment_size=64)
+    log.append(b"y")
+
+    assert log.segments() == [0, 2, 4]
+    assert [sequence for sequence, _ in log.read()] == [0, 1, 2, 3, 4]
+    log.close()
+
+def test_compaction_merges_small_segments(log_path):
+    for i in range(4):
+        log = open_log(log_path)
+        log.append(f"block {i}".encode())
+        log.close()
+
+    log = open_log(log_path)
+    assert log.segments() == [0, 1, 2, 3, 4]
+    assert log.compact() == 3
+    assert log.segments() == [0, 4]
+    assert list(log.read()) == [(i, f"block {i}".encode()) for i in range(4)]
+    log.close()
+
+@pytest.mark.parametrize("consumed", [1, 2, 3, 5])
+def test_a_read_during_a_compaction_sees_every_record_once(log_path, consumed):
+    for i in range(6):
+        log = open_log(log_path)
+        log.append(f"block {2 * i}".encode())
+        log.append(f"block {2 * i + 1}".encode())
+        log.close()
+
+    log = open_log(log_path)
+    records = log.read()
+    read = [next(records) for _ in range(consumed)]
+    # The segment being read and the next ones are merged before the reader moves on
+    assert log.compact() == 5
+    read.extend(records)
+
+    assert read == [(i, f"block {i}".encode()) for i in range(12)]
+    log.close()
+
+def test_a_read_spans_the_segments_rolled_while_reading(log_path):
+    log = open_log(log_path, segment_size=64)
+    log.append(b"x" * 40)
+    records = log.read()
+    read = [next(records)]
+    for i in range(3):
+        log.append(b"y" * 40)
+    read.extend(records)
+
+    assert [sequence for sequence, _ in read] == [0, 1, 2, 3]
+    log.close()
@@ -0,0 +1,47 @@
+# tests/test_blocks.py
+
+from datetime import datetime
+from hashlib import sha256
+
+import pytest
+
+from app.api.models.blockchain import Block
+from app.api.models.records import BlockRecord
+from app.api.models.transaction import Transaction
+
+def build_block(transactions, children_hashes=(), timestamp=None) -> Block:
+    return Block(index=1, transactions=transactions, children_hashes=children_hashes, timestamp=timestamp or datetime(2024, 1, 1))
+
+@pytest.fixture
+def transactions(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    records = [make_transaction(genesis, recipient, amount, nonce) for nonce, amount in enumerate((10, 20), start=1)]
+    return [Transaction(**{**record.to_dict(), "timestamp": record.timestamp}) for record in records]
+
+def test_block_hash_is_the_sha256_of_its_canonical_bytes(transactions):
+    block = build_block(transactions)
+
+    assert block.hash == sha256(block.canonical_bytes).hexdigest()
+
+def test_block_hash_depends_only_on_the_content(transactions):
+    children_hashes = [sha256(b"child").hexdigest()]
+
+    assert build_block(transactions, children_hashes).hash == build_block(transactions, children_hashes).hash
+    assert build_block(transactions, children_hashes).hash != build_block(transactions).hash
+    assert build_block(transactions).hash != build_block(transactions[:1]).hash
+
+def test_block_is_sealed(transactions):
+    block = build_block(transactions)
+
+    with pytest.raises(TypeError):
+        block.nonce = 42
+    with pytest.raises(TypeError):
+        transactions[0].amount = 1000
+
+def test_block_record_keeps_the_block_hash(transactions):
+    block = build_block(transactions)
+    record = block.to_record()
+
+    assert record.hash == block.hash
+    assert BlockRecord(record.index, record.transactions, record.nonce, record.children_hashes, record.timestamp).hash == block.hash
+    assert [tx.id for tx in record.transactions] == [tx.id for tx in transactions]
@@ -0,0 +1,101 @@
+# tests/test_checkpoints.py
+
+import json
+import os
+
+from datetime import datetime
+
+import pytest
+
+from app.api.methods.checkpoints import list_checkpoints, load_latest_checkpoint, save_checkpoint
+from app.api.models.records import BlockRecord
+
+def new_block(dag, children_hashes=(), transactions=()) -> BlockRecord:
+    return BlockRecord(len(dag.graph), transactions, 0, children_hashes, datetime.now())
+
+def ledger_state(dag) -> tuple:
+    balances, nonces = dag.accounts.export()
+    states = {block.hash: state for _, block, state in dag.iter_blocks()}
+    return dict(balances), dict(nonces), dict(dag.accounts.view_nonces()), states, dict(dag.tips.degrees), set(dag.unapplied_blocks)
+
+def build_ledger(dag, genesis, recipients, make_transaction) -> None:
+    """
+    Add blocks confirming one or several blocks at a time, some confirmed blocks not applicable.
+    """
+    nonce = 0
+    def transfer(recipient, amount):
+        nonlocal nonce
+        nonce += 1
+        return make_transaction(genesis, recipient, amount, nonce)
+
+    blocks = []
+    for recipient, amount in zip(recipients, (100, 200, 300)):
+        block = new_block(dag, [blocks[-1].hash] if blocks else [], [transfer(recipient, amount)])
+        assert dag.add_block(block)
+        blocks.append(block)
+    # Confirms the two last blocks at once, then a block spending more than the genesis balance
+    overdraft = new_block(dag, transactions=[transfer(recipients[0], 10 ** 9)])
+    assert dag.add_block(overdraft)
+    assert dag.add_block(new_block(dag, [blocks[1].hash, blocks[2].hash, overdraft.hash], [transfer(recipients[1], 5)]))
+
+def test_checkpoints_are_written_atomically_and_rotated(tmp_path):
+    path = str(tmp_path)
+    for sequence in range(5):
+        save_checkpoint(path, sequence, {"balances": {"a": sequence}}, retain=2)
+
+    assert list_checkpoints(path) == [4, 3]
+    assert load_latest_checkpoint(path, 10)["balances"] == {"a": 4}
+    assert load_latest_checkpoint(path, 3)["balances"] == {"a": 3}
+    assert not [name for name in os.listdir(path) if name.endswith('.tmp')]
+
+def test_corrupted_checkpoints_are_skipped(tmp_path):
+    path = str(tmp_path)
+    save_checkpoint(path, 1, {"balances": {"a": 1}})
+    save_checkpoint(path, 2, {"balances": {"a": 2}})
+    checkpoint_path = os.path.join(path, "checkpoint-0000000000000002.json")
+    with open(checkpoint_path, 'rb') as file:
+        checksum, payload = file.read().split(b'\n', 1)
+    with open(checkpoint_path, 'wb') as file:
+        file.write(checksum + b'\n' + payload.replace(b'2}', b'3}'))
+
+    assert load_latest_checkpoint(path, 10)["balances"] == {"a": 1}
+
+@pytest.mark.parametrize("checkpoint_interval", [1, 2, 3, 1000])
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_restoring_a_checkpoint_and_replaying_the_log_rebuilds_the_same_state(open_dag, restart, genesis, new_wallet, make_transaction,
+                                                                             backend, checkpoint_interval):
+    dag = open_dag(backend, minimal_degree=1, checkpoint_interval=checkpoint_interval)
+    recipients = [new_wallet() for _ in range(3)]
+    build_ledger(dag, genesis, recipients, make_transaction)
+    expected = ledger_state(dag)
+
+    restored = restart(dag, minimal_degree=1, checkpoint_interval=checkpoint_interval)
+
+    assert ledger_state(restored) == expected
+    # The same state with both backends: the overdraft is not applied, the last block is not confirmed
+    balances, applied_nonces, nonces = expected[:3]
+    assert balances == {genesis.address: 99400, recipients[0].address: 100, recipients[1].address: 200, recipients[2].address: 300}
+    assert applied_nonces == {genesis.address: 3}
+    assert nonces == {genesis.address: 5}
+    if backend == "memory":
+        assert bool(list_checkpoints(restored.checkpoint_path)) == (checkpoint_interval < 1000)
+
+def test_a_block_confirming_several_blocks_is_checkpointed_once_they_are_all_applied(open_dag, restart, genesis, new_wallet,
+                                                                                    make_transaction):
+    dag = open_dag(minimal_degree=1, checkpoint_interval=2)
+    recipient = new_wallet()
+    first = new_block(dag, transactions=[make_transaction(genesis, recipient, 100, 1)])
+    assert dag.add_block(first)
+    tip = new_block(dag, [first.hash])
+    assert dag.add_block(tip)
+    second = new_block(dag, transactions=[make_transaction(genesis, recipient, 200, 2)])
+    assert dag.add_block(second)
+    # Confirms tip and second: the checkpoint interval is reached with the first of them
+    assert dag.add_block(new_block(dag, [tip.hash, second.hash]))
+    assert dag.accounts.balance(recipient.address) == 300
+    with open(os.path.join(dag.checkpoint_path, os.listdir(dag.checkpoint_path)[0]), 'rb') as file:
+        assert json.loads(file.read().split(b'\n', 1)[1])["balances"][recipient.address] == 300
+
+    restored = restart(dag, minimal_degree=1, checkpoint_interval=2)
+
+    assert restored.accounts.balance(recipient.address) == 300
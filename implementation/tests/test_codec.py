@@ -0,0 +1,78 @@
+# tests/test_codec.py
+
+from datetime import datetime
+from hashlib import sha256
+
+import pytest
+
+from app.api.methods.codec import CodecError, block_hash, decode_block_batch, decode_transaction_batch
+from app.api.methods.codec import encode_block_batch, encode_transaction_batch, payload_kind, KIND_BLOCK, KIND_COMPACT_BLOCK
+from app.api.models.blockchain import Block
+from app.api.models.records import BlockRecord, TransactionRecord
+from app.api.models.transaction import Transaction
+
+@pytest.fixture
+def transactions(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    return [make_transaction(genesis, recipient, amount, nonce) for nonce, amount in enumerate((10, 20, 30), start=1)]
+
+@pytest.fixture
+def block(transactions):
+    return BlockRecord(3, transactions, 7, [sha256(b"child").hexdigest()], datetime(2024, 1, 1, 12, 30))
+
+def fields(record):
+    return record.to_dict(), record.hash if isinstance(record, BlockRecord) else record.id
+
+def test_transaction_round_trip(transactions):
+    transaction = transactions[0]
+
+    decoded = TransactionRecord.from_bytes(transaction.to_bytes())
+
+    assert fields(decoded) == fields(transaction)
+    assert decoded.signature == transaction.signature
+    assert Transaction.from_bytes(transaction.to_bytes()).to_record().id == transaction.id
+
+def test_block_round_trip(block):
+    data = block.to_bytes()
+
+    assert payload_kind(data) == KIND_BLOCK
+    assert fields(BlockRecord.from_bytes(data)) == fields(block)
+    assert block_hash(data) == block.hash
+
+def test_block_round_trip_matches_the_api_model(block):
+    api_block = Block(**{**BlockRecord.from_bytes(block.to_bytes()).to_dict(), "timestamp": block.timestamp})
+
+    assert api_block.hash == block.hash
+
+def test_compact_block_round_trip(block):
+    data = block.to_compact_bytes()
+    keys = {tx.sender_address: tx.sender for tx in block.transactions}
+    keys.update({tx.recipient_address: tx.recipient for tx in block.transactions})
+
+    assert payload_kind(data) == KIND_COMPACT_BLOCK
+    assert len(data) < len(block.to_bytes())
+    assert fields(BlockRecord.from_compact_bytes(data, keys.get)) == fields(block)
+
+def test_compact_block_with_an_unknown_key_is_rejected(block):
+    with pytest.raises(CodecError):
+        BlockRecord.from_compact_bytes(block.to_compact_bytes(), lambda key_address: None)
+
+def test_batches_round_trip(block, transactions):
+    payloads = [tx.to_bytes() for tx in transactions]
+
+    assert decode_transaction_batch(encode_transaction_batch(payloads)) == payloads
+    assert decode_block_batch(encode_block_batch([block.to_bytes()])) == [block.to_bytes()]
+    assert decode_block_batch(encode_block_batch([])) == []
+
+def test_batch_of_another_kind_is_rejected(transactions):
+    with pytest.raises(CodecError):
+        decode_block_batch(encode_transaction_batch([tx.to_bytes() for tx in transactions]))
+
+@pytest.mark.parametrize("cut", [1, 2, 10, -1])
+def test_truncated_payloads_are_rejected(block, transactions, cut):
+    with pytest.raises(CodecError):
+        BlockRecord.from_bytes(block.to_bytes()[:cut])
+    with pytest.raises(CodecError):
+        TransactionRecord.from_bytes(transactions[0].to_bytes()[:cut])
+    with pytest.raises(CodecError):
+        decode_transaction_batch(encode_transaction_batch([tx.to_bytes() for tx in transactions])[:cut])
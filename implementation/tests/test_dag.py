@@ -0,0 +1,90 @@
+# tests/test_dag.py
+
+from datetime import datetime
+
+import pytest
+
+from app.api.models.dag_store import BlockState
+from app.api.models.records import BlockRecord
+
+def new_block(dag, children_hashes=(), transactions=()) -> BlockRecord:
+    return BlockRecord(len(dag.graph), transactions, 0, children_hashes, datetime.now())
+
+@pytest.fixture
+def dag(open_dag):
+    return open_dag()
+
+def test_blocks_are_kept_in_topological_order(dag):
+    first, second = new_block(dag), new_block(dag)
+    for block in (first, second):
+        assert dag.add_block(block)
+    third = new_block(dag, [second.hash, first.hash])
+    assert dag.add_block(third)
+    fourth = new_block(dag, [third.hash])
+    assert dag.add_block(fourth)
+
+    positions = {block.hash: position for position, block, _ in dag.iter_blocks()}
+    for block in (third, fourth):
+        assert all(positions[child_hash] < positions[block.hash] for child_hash in block.children_hashes)
+    assert dag.graph.predecessors(third.hash) == [second.hash, first.hash]
+    assert dag.graph.successors(first.hash) == [third.hash]
+
+def test_blocks_referencing_unknown_blocks_are_rejected(dag):
+    block = new_block(dag, ["ab" * 32])
+
+    assert not dag.add_block(block)
+    assert block.hash not in dag.graph
+    assert list(dag.iter_blocks()) == []
+
+def test_blocks_are_added_once(dag):
+    block = new_block(dag)
+
+    assert dag.add_block(block)
+    assert not dag.add_block(block)
+    assert len(dag.graph) == 1
+
+def test_blocks_go_through_their_lifecycle_states(open_dag, genesis, new_wallet, make_transaction):
+    dag = open_dag(minimal_degree=2)
+    recipient = new_wallet()
+    block = new_block(dag, transactions=[make_transaction(genesis, recipient, 250, 1)])
+    assert dag.add_block(block)
+    assert dag.get_block_state(block.hash) == BlockState.VALIDATED
+
+    assert dag.add_block(new_block(dag, [block.hash]))
+    assert dag.get_block_state(block.hash) == BlockState.VALIDATED
+    assert dag.add_block(new_block(dag, [block.hash]))
+
+    assert dag.get_block_state(block.hash) == BlockState.APPLIED
+    assert dag.accounts.balance(recipient.address) == 250
+    assert dag.get_block_state("unknown") is None
+
+def test_blocks_are_validated_once(open_dag, genesis, new_wallet, make_transaction, monkeypatch):
+    from app.api.models import blockchain
+    dag = open_dag(minimal_degree=1)
+    block = new_block(dag, transactions=[make_transaction(genesis, new_wallet(), 1, 1)])
+    verified = []
+    verify_signatures = blockchain.verify_signatures
+    monkeypatch.setattr(blockchain, "verify_signatures", lambda items: verified.extend(items) or verify_signatures(items))
+
+    assert dag.add_block(block)
+    assert dag.add_block(new_block(dag, [block.hash]))
+
+    assert dag.get_block_state(block.hash) == BlockState.APPLIED
+    assert len(verified) == 1
+
+def test_blocks_with_invalid_signatures_are_rejected(dag, genesis, new_wallet, make_transaction):
+    block = new_block(dag, transactions=[make_transaction(genesis, new_wallet(), 1, 1, valid=False)])
+
+    assert not dag.add_block(block)
+    assert block.hash not in dag.graph
+
+def test_blocks_with_malformed_keys_are_rejected(dag, genesis, new_wallet, make_transaction):
+    from app.api.methods.wallets import encode
+    from app.api.models.records import TransactionRecord
+    valid = make_transaction(genesis, new_wallet(), 1, 1)
+    # Valid Base64 sender key, but of the wrong length
+    malformed = TransactionRecord(encode(b"short key"), valid.recipient, 1, 2, valid.signature, datetime.now())
+    block = new_block(dag, transactions=[valid, malformed])
+
+    assert not dag.add_block(block)
+    assert block.hash not in dag.graph
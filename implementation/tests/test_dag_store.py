@@ -0,0 +1,66 @@
+# tests/test_dag_store.py
+
+from datetime import datetime
+
+import pytest
+
+from app.api.models import dag_store
+from app.api.models.dag_store import BlockState, DAGStore
+from app.api.models.records import BlockRecord
+
+def new_block(index: int) -> BlockRecord:
+    return BlockRecord(index, (), 0, (), datetime(2024, 1, 1), f"{index:064x}")
+
+@pytest.fixture
+def store():
+    store = DAGStore()
+    for index in range(3):
+        store.add(new_block(index), BlockState.VALIDATED)
+    return store
+
+def test_edges_go_to_later_blocks(store):
+    first, second, third = (new_block(index).hash for index in range(3))
+
+    assert store.add_edge(first, third)
+    assert store.add_edge(second, third)
+
+    assert store.predecessors(third) == [first, second]
+    assert store.successors(first) == [third]
+    assert (store.in_degree(third), store.out_degree(first)) == (2, 1)
+
+def test_edges_to_earlier_blocks_are_refused(store):
+    first, second = new_block(0).hash, new_block(1).hash
+    assert store.add_edge(first, second)
+
+    assert not store.add_edge(second, first)
+    assert not store.add_edge(first, first)
+    assert store.successors(second) == [] and store.predecessors(first) == []
+    assert [block.hash for _, block, _ in store.iter_positions()] == [new_block(index).hash for index in range(3)]
+
+def test_the_last_block_is_removed_with_its_edges(store):
+    first, third = new_block(0).hash, new_block(2).hash
+    assert store.add_edge(first, third)
+
+    with pytest.raises(ValueError):
+        store.remove_last(first)
+    store.remove_last(third)
+
+    assert third not in store and len(store) == 2
+    assert store.successors(first) == [] and store.out_degree(first) == 0
+    assert [position for position, _, _ in store.iter_positions()] == [0, 1]
+
+def test_compaction_keeps_the_edges(monkeypatch):
+    monkeypatch.setattr(dag_store, "COMPACTION_MIN_EDGES", 4)
+    store = DAGStore()
+    hashes = []
+    for index in range(20):
+        block = new_block(index)
+        store.add(block, BlockState.VALIDATED)
+        for child_hash in hashes[-2:]:
+            assert store.add_edge(child_hash, block.hash)
+        hashes.append(block.hash)
+
+    assert len(store._successors.targets) > 0
+    assert store.predecessors(hashes[10]) == hashes[8:10]
+    assert store.successors(hashes[10]) == hashes[11:13]
+    assert store.in_degree(hashes[0]) == 0 and store.out_degree(hashes[-1]) == 0
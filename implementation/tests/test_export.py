@@ -0,0 +1,76 @@
+# tests/test_export.py
+
+import asyncio
+import json
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.methods.codec import BINARY_MEDIA_TYPE, U32
+from app.api.models.blockchain import DAG
+from app.api.models.records import BlockRecord
+from app.api.routes import blockchain
+
+def export(accept: str = "", **query) -> bytes:
+    response = blockchain.export_dag(SimpleNamespace(headers={"accept": accept}), **{"cursor": 0, "limit": None, "min_index": None,
+                                     "max_index": None, "since": None, "until": None, **query})
+
+    async def read() -> bytes:
+        return b''.join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(read())
+
+def export_lines(**query) -> list:
+    return [json.loads(line) for line in export(**query).splitlines()]
+
+@pytest.fixture
+def blocks(open_dag, serve):
+    dag = open_dag()
+    engine = serve(dag, blockchain)
+    blocks = []
+    for index in range(5):
+        block = BlockRecord(index, (), 0, [blocks[-1].hash] if blocks else [], datetime(2024, 1, 1 + index))
+        assert engine.execute(DAG.add_block, block)
+        blocks.append(block)
+    return blocks
+
+def test_export_streams_every_block_in_topological_order(blocks):
+    lines = export_lines()
+
+    assert [line["position"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [line["hash"] for line in lines] == [block.hash for block in blocks]
+    assert lines[1]["block"]["children_hashes"] == [blocks[0].hash]
+
+def test_export_pages_follow_the_cursor(blocks):
+    pages, cursor = [], 0
+    while True:
+        page = export_lines(cursor=cursor, limit=2)
+        pages.append([line["hash"] for line in page])
+        if len(page) < 2:
+            break
+        cursor = page[-1]["position"] + 1
+
+    assert pages == [[blocks[0].hash, blocks[1].hash], [blocks[2].hash, blocks[3].hash], [blocks[4].hash]]
+
+def test_export_filters_by_index_and_time(blocks):
+    assert [line["block"]["index"] for line in export_lines(min_index=1, max_index=3)] == [1, 2, 3]
+    assert [line["block"]["index"] for line in export_lines(since=datetime(2024, 1, 2), until=datetime(2024, 1, 3))] == [1, 2]
+
+def test_binary_export_is_length_prefixed(blocks):
+    data, offset, hashes = export(BINARY_MEDIA_TYPE, limit=3), 0, []
+    while offset < len(data):
+        (length,), offset = U32.unpack_from(data, offset), offset + U32.size
+        hashes.append(BlockRecord.from_bytes(data[offset:offset + length]).hash)
+        offset += length
+
+    assert hashes == [block.hash for block in blocks[:3]]
+
+@pytest.mark.parametrize("query", [{"cursor": -1}, {"limit": 0}])
+def test_invalid_pages_are_refused(blocks, query):
+    with pytest.raises(HTTPException) as error:
+        export(**query)
+
+    assert error.value.status_code == 400
@@ -0,0 +1,104 @@
+# tests/test_gossip.py
+
+import time
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.methods import gossip
+from app.api.methods.codec import encode_block
+from app.api.methods.seen import SeenCache
+from app.api.models.records import BlockRecord
+from app.api.routes import nodes
+
+def new_block(children_hashes=(), index: int = 0) -> BlockRecord:
+    return BlockRecord(index, (), 0, children_hashes, datetime.now())
+
+def test_seen_cache_marks_ids_once():
+    seen = SeenCache(10, 60)
+
+    assert seen.add("a")
+    assert not seen.add("a")
+    assert "a" in seen
+    seen.discard("a")
+    assert "a" not in seen
+    assert seen.add("a")
+
+def test_seen_cache_forgets_the_oldest_ids_past_its_size():
+    seen = SeenCache(2, 60)
+    for key in ("a", "b", "c"):
+        seen.add(key)
+
+    assert seen.unseen(["a", "b", "c", "d"]) == ["a", "d"]
+    assert len(seen) == 2
+
+def test_seen_cache_forgets_ids_after_the_ttl():
+    seen = SeenCache(10, 0.05)
+    seen.add("a")
+    time.sleep(0.06)
+
+    assert "a" not in seen
+    assert seen.add("a")
+
+@pytest.fixture
+def seen_blocks(monkeypatch):
+    seen_blocks = SeenCache(100, 60)
+    monkeypatch.setattr(nodes, "seen_blocks", seen_blocks)
+    return seen_blocks
+
+@pytest.fixture
+def dag(open_dag, serve):
+    dag = open_dag()
+    serve(dag, nodes)
+    return dag
+
+def test_received_blocks_are_added_once(dag, seen_blocks):
+    block = new_block()
+
+    assert nodes.receive_neighbor_block(None, block).message == "Received neighbor block."
+    assert nodes.receive_neighbor_block(None, block).message == "Neighbor block already seen."
+    assert block.hash in dag.graph
+    assert block.hash in seen_blocks
+
+def test_rejected_blocks_are_not_marked_as_seen(dag, seen_blocks):
+    parent = new_block()
+    block = new_block([parent.hash], 1)
+
+    assert nodes.receive_neighbor_block(None, block).message == "Neighbor block rejected."
+    assert block.hash not in seen_blocks
+
+    # Once its children arrive, the same block is accepted
+    nodes.receive_neighbor_block(None, parent)
+    assert nodes.receive_neighbor_block(None, block).message == "Received neighbor block."
+    assert block.hash in dag.graph
+
+class Neighbor:
+    """
+    Stand-in for requests.post to a neighbor answering the binary payloads with status_code.
+    """
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.content_types = []
+
+    def __call__(self, url, data, headers, timeout):
+        self.content_types.append(headers["Content-Type"])
+        binary = headers["Content-Type"] != "application/json"
+        return SimpleNamespace(status_code=self.status_code if binary else 200)
+
+@pytest.mark.parametrize("status_code, json_only", [(415, True), (422, False)])
+def test_only_unsupported_media_types_switch_a_neighbor_to_json(monkeypatch, status_code, json_only):
+    neighbor = Neighbor(status_code)
+    monkeypatch.setattr(gossip.requests, "post", neighbor)
+    monkeypatch.setattr(gossip, "json_only_neighbors", set())
+    payload = encode_block(new_block())
+
+    first = gossip.post_payload("http://neighbor/", gossip.BLOCK_PATH, payload)
+    gossip.post_payload("http://neighbor/", gossip.BLOCK_PATH, payload)
+
+    assert first.status_code == (200 if json_only else 422)
+    assert ("http://neighbor/" in gossip.json_only_neighbors) == json_only
+    binary = neighbor.content_types[0]
+    expected = [binary, "application/json", "application/json"] if json_only else [binary, binary]
+    assert neighbor.content_types == expected
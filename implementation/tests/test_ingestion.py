@@ -0,0 +1,102 @@
+# tests/test_ingestion.py
+
+from datetime import datetime
+
+import pytest
+
+from app.api.methods.ingestion import IngestionOverloaded, IngestionPipeline, verify_and_admit, verify_transactions
+from app.api.methods.wallets import encode
+from app.api.models.records import TransactionRecord
+
+@pytest.fixture
+def transactions(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    return [make_transaction(genesis, recipient, 1, nonce) for nonce in range(1, 5)]
+
+class Admission:
+    """
+    Stand-in for the DAG writer: records the admitted batches and rejects the listed nonces.
+    """
+    def __init__(self, rejected=()):
+        self.batches = []
+        self.rejected = set(rejected)
+
+    def __call__(self, batch):
+        self.batches.append(list(batch))
+        return ["Invalid nonce." if tx.nonce in self.rejected else None for tx in batch]
+
+@pytest.fixture
+def pipeline():
+    pipelines = []
+
+    def pipeline(admit, **options) -> IngestionPipeline:
+        pipeline = IngestionPipeline(admit, timeout=5, **options)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield pipeline
+    for pipeline in pipelines:
+        pipeline.stop()
+
+def test_results_follow_the_submission_order(pipeline, transactions):
+    admit = Admission(rejected={3})
+    ingestion = pipeline(admit, batch_size=2)
+    ingestion.start()
+
+    assert ingestion.ingest(transactions) == [None, None, "Invalid nonce.", None]
+    assert [tx for batch in admit.batches for tx in batch] == transactions
+    assert ingestion._in_flight == {} and ingestion._senders == {}
+
+def test_invalid_signatures_do_not_reach_the_admission(pipeline, genesis, new_wallet, make_transaction):
+    admit = Admission()
+    ingestion = pipeline(admit)
+    ingestion.start()
+    invalid, valid = make_transaction(genesis, new_wallet(), 1, 1, valid=False), make_transaction(genesis, new_wallet(), 1, 2)
+
+    assert ingestion.ingest([invalid, valid]) == ["Invalid signature.", None]
+    assert admit.batches == [[valid]]
+
+def test_transactions_in_flight_are_deduplicated(pipeline, transactions):
+    admit = Admission()
+    ingestion = pipeline(admit)
+    first = ingestion.submit(transactions[:2] + transactions[:1])
+    again = ingestion.submit(transactions[1:2])
+
+    assert first[0] is first[2] and again[0] is first[1]
+    assert ingestion._verify_queue.qsize() == 2
+    ingestion.start()
+    assert [future.result(5) for future in first + again] == [None] * 4
+    assert admit.batches == [transactions[:2]]
+
+def test_senders_with_too_many_transactions_in_flight_are_refused(pipeline, transactions):
+    ingestion = pipeline(Admission(), max_pending_per_sender=3)
+    ingestion.submit(transactions[:2])
+
+    with pytest.raises(IngestionOverloaded) as error:
+        ingestion.submit(transactions[2:])
+    assert error.value.status_code == 429
+    # Nothing of the refused list was queued
+    assert ingestion._verify_queue.qsize() == 2
+    assert len(ingestion._in_flight) == 2
+
+def test_a_full_pipeline_refuses_new_work(pipeline, transactions):
+    ingestion = pipeline(Admission(), queue_size=3, retry_after=7)
+    ingestion.submit(transactions[:2])
+
+    with pytest.raises(IngestionOverloaded) as error:
+        ingestion.submit(transactions[2:])
+    assert (error.value.status_code, error.value.retry_after) == (503, 7)
+    assert ingestion.submit(transactions[2:3])
+
+def test_verify_and_admit_runs_both_stages_in_order(genesis, new_wallet, make_transaction, transactions):
+    admit = Admission(rejected={2})
+    invalid = make_transaction(genesis, new_wallet(), 1, 9, valid=False)
+
+    assert verify_and_admit(transactions[:2] + [invalid], admit) == [None, "Invalid nonce.", "Invalid signature."]
+    assert admit.batches == [transactions[:2]]
+
+def test_a_malformed_transaction_only_rejects_itself(transactions, new_wallet):
+    # Valid Base64 sender key, but of the wrong length
+    malformed = TransactionRecord(encode(b"short key"), new_wallet().public_key, 1, 1, transactions[0].signature, datetime.now())
+
+    assert verify_transactions(transactions[:2] + [malformed] + transactions[2:]) == [None, None, "Invalid signature.", None, None]
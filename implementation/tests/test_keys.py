@@ -0,0 +1,57 @@
+# tests/test_keys.py
+
+import os
+
+import pytest
+
+from app.api.methods.keys import KeyRegistry
+from app.api.methods.wallets import key_id
+
+@pytest.fixture
+def registry_path(tmp_path):
+    return str(tmp_path / 'keys' / 'keys.sqlite3')
+
+def test_the_database_is_opened_on_first_use(registry_path, genesis):
+    registry = KeyRegistry(registry_path)
+    assert not os.path.exists(registry_path)
+
+    registry.register([genesis.public_key])
+
+    assert os.path.exists(registry_path)
+    registry.close()
+
+def test_registered_keys_survive_a_reopen(registry_path, genesis, new_wallet):
+    registry = KeyRegistry(registry_path)
+    registry.open()
+    registry.register([genesis.public_key, genesis.public_key])
+    registry.close()
+    registry.close()
+
+    assert KeyRegistry(registry_path).get(genesis.address) == genesis.public_key
+    # A closed registry opens its database again when needed
+    assert registry.get(new_wallet().address) is None
+    assert registry.get(genesis.address) == genesis.public_key
+    registry.close()
+
+def test_lookups_go_through_a_bounded_cache(registry_path, new_wallet):
+    registry = KeyRegistry(registry_path, cache_size=2)
+    wallets = [new_wallet() for _ in range(3)]
+    registry.register(wallet.public_key for wallet in wallets)
+
+    assert [registry.get(wallet.address) for wallet in wallets] == [wallet.public_key for wallet in wallets]
+    assert list(registry._cache) == [wallets[1].address, wallets[2].address]
+    registry.close()
+
+def test_interned_keys_share_one_string(registry_path, genesis):
+    registry = KeyRegistry(registry_path)
+    first = registry.intern(genesis.public_key)
+    copy = "".join(list(genesis.public_key))
+
+    assert copy is not first
+    assert registry.intern(copy) is first
+    assert registry.intern("not a key!") == "not a key!"
+    registry.close()
+
+def test_addresses_are_the_sha256_of_the_raw_key(genesis):
+    assert key_id(genesis.public_key) == genesis.address
+    assert len(genesis.address) == 64
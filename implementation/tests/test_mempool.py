@@ -0,0 +1,75 @@
+# tests/test_mempool.py
+
+import pytest
+
+from app.api.models.mempool import Mempool
+
+@pytest.fixture
+def sender_transactions(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    return [make_transaction(genesis, recipient, 10 * nonce, nonce) for nonce in range(1, 6)]
+
+def test_size_is_tracked_in_serialized_bytes(sender_transactions):
+    mempool = Mempool()
+    for tx in sender_transactions:
+        mempool.add(tx)
+
+    assert mempool.size_bytes == sum(len(tx.to_bytes()) for tx in sender_transactions)
+
+    mempool.remove(sender_transactions[0].id)
+    mempool.remove_many(tx.id for tx in sender_transactions[3:])
+
+    assert mempool.size_bytes == sum(len(tx.to_bytes()) for tx in sender_transactions[1:3])
+    assert len(mempool) == 2
+
+def test_removing_every_transaction_resets_the_size(sender_transactions):
+    mempool = Mempool()
+    for tx in sender_transactions:
+        mempool.add(tx)
+
+    assert mempool.remove_many(tx.id for tx in sender_transactions) == len(sender_transactions)
+    assert mempool.size_bytes == 0
+    assert mempool.senders == {}
+
+def test_duplicates_are_rejected(genesis, new_wallet, make_transaction, sender_transactions):
+    mempool = Mempool()
+    mempool.add(sender_transactions[0])
+
+    assert not mempool.add(sender_transactions[0])
+    # Another transaction of the same sender with the same nonce
+    assert not mempool.add(make_transaction(genesis, new_wallet(), 1, sender_transactions[0].nonce))
+    assert len(mempool) == 1
+
+def test_lookup_by_id_and_sender(genesis, sender_transactions):
+    mempool = Mempool()
+    for tx in reversed(sender_transactions):
+        mempool.add(tx)
+
+    assert mempool.get(sender_transactions[2].id) is sender_transactions[2]
+    assert sender_transactions[2].id in mempool
+    assert mempool.by_sender(genesis.address) == sender_transactions
+    assert mempool.get_by_sender_nonce(genesis.address, 3) is sender_transactions[2]
+    assert mempool.get_by_sender_nonce(genesis.address, 9) is None
+    assert mempool.get_by_sender_nonce("unknown", 1) is None
+    assert mempool.by_sender("unknown") == []
+    assert mempool.remove("unknown") is None
+
+def test_pages_follow_the_arrival_order(sender_transactions):
+    mempool = Mempool()
+    for tx in sender_transactions:
+        mempool.add(tx)
+
+    assert mempool.page(1, 2) == sender_transactions[1:3]
+    assert mempool.page(4) == sender_transactions[4:]
+    assert list(mempool) == sender_transactions
+
+def test_copy_does_not_see_later_changes(sender_transactions):
+    mempool = Mempool()
+    mempool.add(sender_transactions[0])
+    copy = mempool.copy()
+
+    mempool.add(sender_transactions[1])
+    mempool.remove(sender_transactions[0].id)
+
+    assert list(copy) == [sender_transactions[0]]
+    assert copy.version < mempool.version
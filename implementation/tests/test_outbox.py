@@ -0,0 +1,141 @@
+# tests/test_outbox.py
+
+import threading
+import time
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.methods.outbox import Outbox
+
+class Peers:
+    """
+    Records the deliveries of an outbox and answers them with the queued status codes (200 once they run out).
+    """
+    def __init__(self) -> None:
+        self.delivered = []
+        self.statuses = {}
+        self.lock = threading.Lock()
+
+    def send(self, peer, path, payload, timeout):
+        with self.lock:
+            statuses = self.statuses.get(peer, [])
+            status = statuses.pop(0) if statuses else 200
+            if status is None:
+                raise ConnectionError(f"{peer} is down")
+            self.delivered.append((peer, path, payload, status))
+        return SimpleNamespace(status_code=status)
+
+    def payloads(self, peer):
+        with self.lock:
+            return [payload for delivered_peer, _, payload, status in self.delivered if delivered_peer == peer and status == 200]
+
+def wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+@pytest.fixture
+def peers():
+    return Peers()
+
+@pytest.fixture
+def open_outbox(tmp_path, peers):
+    outboxes = []
+
+    def open_outbox(**fields) -> Outbox:
+        fields = {"max_backoff": 0.05, "circuit_cooldown": 0.2, **fields}
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), peers.send, **fields)
+        outboxes.append(outbox)
+        return outbox
+
+    yield open_outbox
+    for outbox in outboxes:
+        outbox.stop()
+
+def test_deliveries_keep_the_order_of_every_peer(open_outbox, peers):
+    outbox = open_outbox()
+    for i in range(20):
+        outbox.enqueue("a", "nodes/block/", b"a%d" % i)
+        outbox.enqueue("b", "nodes/block/", b"b%d" % i)
+
+    outbox.start()
+    wait_until(lambda: outbox.pending() == 0)
+
+    assert peers.payloads("a") == [b"a%d" % i for i in range(20)]
+    assert peers.payloads("b") == [b"b%d" % i for i in range(20)]
+
+def test_failed_deliveries_are_retried_in_order(open_outbox, peers):
+    peers.statuses["a"] = [500, None, 429]
+    outbox = open_outbox()
+    outbox.enqueue("a", "nodes/block/", b"first")
+    outbox.enqueue("a", "nodes/block/", b"second")
+
+    outbox.start()
+    wait_until(lambda: outbox.pending() == 0)
+
+    assert [status for _, _, _, status in peers.delivered] == [500, 429, 200, 200]
+    assert peers.payloads("a") == [b"first", b"second"]
+
+def test_rejected_deliveries_are_not_retried(open_outbox, peers):
+    peers.statuses["a"] = [400]
+    outbox = open_outbox()
+    outbox.enqueue("a", "nodes/block/", b"invalid")
+
+    outbox.start()
+    wait_until(lambda: outbox.pending() == 0)
+
+    assert len(peers.delivered) == 1
+
+def test_circuit_opens_after_repeated_failures(open_outbox, peers):
+    peers.statuses["a"] = [None] * 3
+    outbox = open_outbox(circuit_failures=3, circuit_cooldown=60)
+    outbox.enqueue("a", "nodes/block/", b"block")
+    outbox.enqueue("b", "nodes/block/", b"block")
+
+    outbox.start()
+    wait_until(lambda: outbox.peers.get("a") is not None and outbox.peers["a"].failures == 3)
+    wait_until(lambda: outbox.pending("b") == 0)
+    time.sleep(0.2)
+
+    assert outbox.peers["a"].open_until > time.time()
+    assert outbox.pending("a") == 1
+    assert not peers.payloads("a")
+
+def test_circuit_closes_after_the_cooldown(open_outbox, peers):
+    peers.statuses["a"] = [None] * 2
+    outbox = open_outbox(circuit_failures=2)
+    outbox.enqueue("a", "nodes/block/", b"block")
+
+    outbox.start()
+    wait_until(lambda: outbox.pending("a") == 0)
+
+    assert peers.payloads("a") == [b"block"]
+    assert outbox.peers["a"].failures == 0
+
+def test_pending_deliveries_survive_a_restart(open_outbox, peers):
+    outbox = open_outbox()
+    outbox.enqueue("a", "nodes/block/", b"block")
+    outbox.stop()
+
+    restarted = open_outbox()
+    assert restarted.pending("a") == 1
+    restarted.start()
+    wait_until(lambda: restarted.pending() == 0)
+
+    assert peers.payloads("a") == [b"block"]
+
+def test_oldest_deliveries_are_dropped_past_the_peer_limit(open_outbox, peers):
+    outbox = open_outbox(max_pending_per_peer=3)
+    for i in range(5):
+        outbox.enqueue("a", "nodes/block/", b"%d" % i)
+    outbox.enqueue("b", "nodes/block/", b"b")
+
+    assert outbox.pending("a") == 3
+    assert outbox.pending() == 4
+    outbox.start()
+    wait_until(lambda: outbox.pending() == 0)
+
+    assert peers.payloads("a") == [b"2", b"3", b"4"]
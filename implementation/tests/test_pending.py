@@ -0,0 +1,109 @@
+# tests/test_pending.py
+
+from datetime import datetime
+
+import pytest
+
+from app.api.models import mempool
+from app.api.models.mempool import PendingTransactions
+from app.api.models.records import BlockRecord
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A monotonic clock moved by hand, in seconds.
+    """
+    now = [0.0]
+    monkeypatch.setattr(mempool.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def sender_transactions(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    return {nonce: make_transaction(genesis, recipient, 1, nonce) for nonce in range(1, 8)}
+
+def test_transactions_wait_for_their_nonce(clock, genesis, sender_transactions):
+    pending = PendingTransactions(max_per_sender=4, max_transactions=10, ttl=60)
+
+    assert pending.add(sender_transactions[4], 2) is None
+    assert pending.add(sender_transactions[3], 2) is None
+    assert pending.add(sender_transactions[3], 2) == "Duplicated transaction."
+    assert pending.add(sender_transactions[7], 2) == "Invalid nonce." # Farther than max_per_sender
+
+    assert pending.pop(genesis.address, 2) is None
+    assert pending.pop(genesis.address, 3) is sender_transactions[3]
+    assert pending.discard_used(genesis.address, 4) == 1
+    assert len(pending) == 0 and pending.senders == {}
+
+def test_senders_keep_their_nearest_nonces(clock, genesis, sender_transactions):
+    pending = PendingTransactions(max_per_sender=3, max_transactions=10, ttl=60)
+    for nonce in (3, 4, 5):
+        assert pending.add(sender_transactions[nonce], 2) is None
+
+    assert pending.add(sender_transactions[6], 3) == "Too many queued transactions of the sender."
+    assert pending.add(sender_transactions[2], 1) is None
+
+    assert sorted(pending.senders[genesis.address]) == [2, 3, 4]
+
+def test_the_oldest_transactions_are_evicted_first(clock, genesis, new_wallet, make_transaction, sender_transactions):
+    pending = PendingTransactions(max_per_sender=4, max_transactions=2, ttl=60)
+    other = make_transaction(genesis, new_wallet(), 1, 3) # Same sender and nonce as sender_transactions[3]
+    assert pending.add(sender_transactions[3], 2) is None
+    assert pending.add(other, 2) == "Duplicated transaction."
+    assert pending.add(sender_transactions[4], 2) is None
+
+    assert pending.add(sender_transactions[5], 2) is None
+
+    assert sender_transactions[3].id not in pending
+    assert sorted(pending.senders[genesis.address]) == [4, 5]
+
+def test_queued_transactions_expire(clock, genesis, sender_transactions):
+    pending = PendingTransactions(max_per_sender=4, max_transactions=10, ttl=60)
+    pending.add(sender_transactions[3], 2)
+    clock[0] = 30
+    pending.add(sender_transactions[4], 2)
+
+    clock[0] = 60
+    assert pending.pop(genesis.address, 3) is None
+    assert len(pending) == 1
+    clock[0] = 90
+    assert pending.pop(genesis.address, 4) is None
+    assert len(pending) == 0
+
+@pytest.fixture
+def dag(open_dag):
+    return open_dag(block_mb_size_limit=1)
+
+def test_admission_queues_nonce_gaps_and_promotes_them(dag, genesis, sender_transactions):
+    assert dag.admit_transactions([sender_transactions[1]]) == [None]
+    assert dag.admit_transactions([sender_transactions[4], sender_transactions[3]]) == [None, None]
+    assert [tx.nonce for tx in dag.unconfirmed_transactions] == [1]
+
+    assert dag.admit_transactions([sender_transactions[2]]) == [None]
+
+    assert [tx.nonce for tx in dag.unconfirmed_transactions] == [1, 2, 3, 4]
+    assert dag.accounts.nonce(genesis.address) == 4
+    assert len(dag.pending_transactions) == 0
+
+def test_blocks_promote_the_queued_transactions(dag, genesis, sender_transactions):
+    assert dag.admit_transactions([sender_transactions[1], sender_transactions[3]]) == [None, None]
+    # The transaction filling the gap arrives in a block of another node
+    block = BlockRecord(0, [sender_transactions[2]], 0, [], datetime.now())
+
+    assert dag.add_block(block)
+
+    assert [tx.nonce for tx in dag.unconfirmed_transactions] == [1, 3]
+    assert dag.accounts.nonce(genesis.address) == 3
+    assert len(dag.pending_transactions) == 0
+
+def test_promoted_transactions_are_checked_again(dag, genesis, new_wallet, make_transaction, sender_transactions):
+    assert dag.admit_transactions([sender_transactions[1]]) == [None]
+    assert dag.admit_transactions([make_transaction(genesis, new_wallet(), 50, 3)]) == [None]
+    dag.accounts.set_balances({genesis.address: 10}) # Spent meanwhile
+
+    assert dag.admit_transactions([sender_transactions[2]]) == [None]
+
+    # The queued transaction was dropped, not admitted
+    assert [tx.nonce for tx in dag.unconfirmed_transactions] == [1, 2]
+    assert dag.accounts.nonce(genesis.address) == 2
+    assert len(dag.pending_transactions) == 0
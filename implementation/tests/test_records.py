@@ -0,0 +1,65 @@
+# tests/test_records.py
+
+import json
+
+from datetime import datetime
+from hashlib import sha256
+
+import pytest
+
+from app.api.config.keys import key_registry
+from app.api.models.records import BlockRecord, TransactionRecord
+from app.api.models.transaction import Transaction
+
+@pytest.fixture
+def transaction(genesis, new_wallet, make_transaction):
+    return make_transaction(genesis, new_wallet(), 10, 1)
+
+def test_records_have_no_instance_dict(transaction):
+    block = BlockRecord(0, [transaction], 0, [], datetime(2024, 1, 1))
+
+    for record in (transaction, block):
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+def test_transaction_record_matches_the_api_model(transaction):
+    model = Transaction(**{**transaction.to_dict(), "timestamp": transaction.timestamp})
+
+    assert model.to_dict() == transaction.to_dict()
+    assert model.id == transaction.id
+    assert model.size == transaction.size
+    assert model.message == transaction.message
+    assert model.to_bytes() == transaction.to_bytes()
+    assert transaction.id == sha256(transaction.to_bytes()).hexdigest()
+
+def test_transaction_record_keeps_the_raw_signature(transaction):
+    assert isinstance(transaction.signature, bytes)
+    assert transaction.to_dict()["signature"] == transaction.encoded_signature
+    assert TransactionRecord.from_fields({**transaction.to_dict(), "timestamp": transaction.timestamp}).id == transaction.id
+
+def test_records_share_interned_keys(genesis, transaction):
+    copy = "".join(list(genesis.public_key))
+    record = TransactionRecord(copy, transaction.recipient, 1, 2, transaction.signature, datetime(2024, 1, 1))
+
+    assert record.sender is key_registry.intern(genesis.public_key)
+    assert record.sender_address == genesis.address
+
+def test_block_hash_is_computed_unless_given(transaction):
+    block = BlockRecord(1, [transaction], 2, ["ab" * 32], datetime(2024, 1, 1))
+
+    assert BlockRecord(1, [transaction], 2, ["ab" * 32], datetime(2024, 1, 1)).hash == block.hash
+    assert BlockRecord(1, [transaction], 2, ["ab" * 32], datetime(2024, 1, 1), "given").hash == "given"
+    assert block.to_dict()["children_hashes"] == ["ab" * 32]
+
+def test_legacy_blocks_are_translated_to_their_current_hashes(transaction):
+    legacy_hashes = {}
+    first_legacy = {"index": 0, "transactions": [], "children_hashes": [], "timestamp": "2024-01-01T00:00:00"}
+    first = BlockRecord.from_legacy_dict(first_legacy, "legacy-first", legacy_hashes)
+    second_legacy = {"index": 1, "transactions": [transaction.to_dict()], "children_hashes": ["legacy-first"],
+                     "timestamp": "2024-01-02T00:00:00"}
+    second = BlockRecord.from_legacy_dict(json.loads(json.dumps(second_legacy)), "legacy-second", legacy_hashes)
+
+    assert legacy_hashes == {"legacy-first": first.hash, "legacy-second": second.hash}
+    assert second.children_hashes == (first.hash,)
+    assert second.transactions[0].id == transaction.id
@@ -0,0 +1,157 @@
+# tests/test_snapshot.py
+
+from datetime import datetime
+from types import MappingProxyType
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.models.blockchain import DAG
+from app.api.models.records import BlockRecord
+from app.api.models.snapshot import _DELETED, MempoolSnapshot, VersionedMap
+from app.api.models.dag_store import BlockState
+from app.api.models.mempool import Mempool
+from app.api.models.wallet import WalletsQuery
+from app.api.routes import wallets
+
+def test_versioned_map_keeps_every_version():
+    first = VersionedMap({"a": 1, "b": 2})
+    second = first.with_changes({"b": 3, "c": 4})
+
+    assert dict(first) == {"a": 1, "b": 2}
+    assert dict(second) == {"a": 1, "b": 3, "c": 4}
+    assert second.depth == 1
+    assert first.with_changes({}) is first
+
+def test_versioned_map_folds_its_layers():
+    versions = [VersionedMap({})]
+    for i in range(10):
+        versions.append(versions[-1].with_changes({i: i}, max_layers=4))
+
+    assert versions[-1].depth < 4
+    assert dict(versions[-1]) == {i: i for i in range(10)}
+    assert dict(versions[5]) == {i: i for i in range(5)}
+
+def test_versioned_map_removes_keys():
+    first = VersionedMap({"a": 1, "b": 2})
+    second = first.with_changes({"a": _DELETED, "c": 3})
+    third = second.with_changes({"a": 4}, max_layers=2)
+
+    assert "a" not in second and second.get("a") is None
+    assert list(second) == ["b", "c"] and len(second) == 2
+    assert list(third.items()) == [("b", 2), ("c", 3), ("a", 4)] and third.depth == 0
+    assert dict(first) == {"a": 1, "b": 2}
+
+def test_versioned_map_drops_the_layers_of_a_live_base():
+    store = {"a": 1}
+    # A view of a store, which already holds the changes of the layers
+    live = VersionedMap(MappingProxyType(store)).with_changes({"a": 2})
+    store["a"] = 3
+
+    assert live.with_changes({"a": 3}, max_layers=2).depth == 0
+    assert live.with_changes({"a": 3}, max_layers=2)["a"] == 3
+
+@pytest.fixture
+def ledger(open_dag, serve):
+    def ledger(backend: str = "memory"):
+        dag = open_dag(backend, minimal_degree=1)
+        engine = serve(dag, wallets)
+        return dag, engine
+    return ledger
+
+def transfer(engine, dag, sender, recipient, amount, nonce, make_transaction):
+    """
+    Confirm a block with a transfer, through the engine.
+    """
+    block = BlockRecord(len(dag.graph), [make_transaction(sender, recipient, amount, nonce)], 0, list(dag.tips.degrees), datetime.now())
+    assert engine.execute(DAG.add_block, block)
+    assert engine.execute(DAG.add_block, BlockRecord(len(dag.graph), (), 0, [block.hash], datetime.now()))
+
+def test_snapshots_are_not_changed_by_later_writes(ledger, genesis, new_wallet, make_transaction):
+    dag, engine = ledger()
+    recipient = new_wallet()
+    before = engine.snapshot
+
+    transfer(engine, dag, genesis, recipient, 250, 1, make_transaction)
+
+    after = engine.snapshot
+    assert after.version > before.version
+    assert before.get_wallet_balance(recipient.public_key) == 0
+    assert after.get_wallet_balance(recipient.public_key) == 2.5
+    assert after.get_nonce(genesis.public_key) == 1 and before.get_nonce(genesis.public_key) == 0
+    assert len(list(before.iter_blocks())) == 0
+    assert len(list(after.iter_blocks())) == 2
+
+def test_engine_commands_raise_their_errors(ledger):
+    _, engine = ledger()
+
+    def fail(dag):
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        engine.execute(fail)
+    assert engine.execute(lambda dag: dag.minimal_degree) == 1
+
+def test_conditional_polls_only_return_the_changed_wallets(ledger, genesis, new_wallet, make_transaction):
+    dag, engine = ledger()
+    recipient, untouched = new_wallet(), new_wallet()
+    identifiers = [genesis.public_key, recipient.public_key, untouched.public_key]
+    first = wallets.query_wallets(WalletsQuery(public_keys=identifiers), wallets.DAGSnapshot.get_nonce)
+
+    transfer(engine, dag, genesis, recipient, 100, 1, make_transaction)
+    changed = wallets.query_wallets(WalletsQuery(public_keys=identifiers, since_version=first["version"], epoch=first["epoch"]),
+                                    wallets.DAGSnapshot.get_wallet_balance)
+
+    assert changed["wallets"] == {genesis.public_key: 999.0, recipient.public_key: 1.0}
+    # A version from another epoch (before a restart) returns everything
+    stale = wallets.query_wallets(WalletsQuery(public_keys=identifiers, since_version=changed["version"], epoch="old"),
+                                  wallets.DAGSnapshot.get_wallet_balance)
+    assert set(stale["wallets"]) == set(identifiers)
+
+def test_conditional_polls_are_refused_with_a_persistent_account_state(ledger, genesis, new_wallet, make_transaction):
+    dag, engine = ledger("sqlite")
+    recipient = new_wallet()
+    transfer(engine, dag, genesis, recipient, 100, 1, make_transaction)
+    snapshot = engine.snapshot
+
+    assert not snapshot.consistent
+    assert wallets.query_wallets(WalletsQuery(addresses=[recipient.address]), wallets.DAGSnapshot.get_wallet_balance)["wallets"] == {recipient.address: 1.0}
+    with pytest.raises(HTTPException) as error:
+        wallets.query_wallets(WalletsQuery(addresses=[recipient.address], since_version=0, epoch=snapshot.epoch), wallets.DAGSnapshot.get_nonce)
+    assert error.value.status_code == 400
+
+def test_mempool_snapshots_only_store_the_changes(genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    transactions = [make_transaction(genesis, recipient, 1, nonce) for nonce in range(1, 5)]
+    mempool = Mempool()
+    for tx in transactions[:3]:
+        mempool.add(tx)
+    first = MempoolSnapshot.capture(mempool)
+
+    mempool.remove(transactions[0].id)
+    mempool.add(transactions[3])
+    second = first.advance(mempool)
+
+    assert second.advance(mempool) is second
+    assert second.transactions.depth == 1
+    assert list(first) == transactions[:3] and first.by_sender(genesis.address) == transactions[:3]
+    assert list(second) == transactions[1:] and second.by_sender(genesis.address) == transactions[1:]
+    assert second.page(1, 1) == [transactions[2]] and len(second) == 3
+    assert transactions[0].id in first and second.get(transactions[0].id) is None
+    assert second.size_bytes == mempool.size_bytes
+
+def test_snapshots_keep_the_block_states_they_saw(ledger, genesis, new_wallet, make_transaction):
+    dag, engine = ledger()
+    block = BlockRecord(0, [make_transaction(genesis, new_wallet(), 1, 1)], 0, [], datetime.now())
+    assert engine.execute(DAG.add_block, block)
+    before = engine.snapshot
+
+    assert engine.execute(DAG.add_block, BlockRecord(1, (), 0, [block.hash], datetime.now()))
+    # Published and later changes alike are hidden from the older snapshot
+    engine.execute(lambda dag: dag.graph.set_state(block.hash, BlockState.CONFIRMED))
+
+    assert before.get_block_by_hash(block.hash)["state"] == BlockState.VALIDATED
+    assert [state for _, _, state in before.iter_blocks()] == [BlockState.VALIDATED]
+    assert engine.snapshot.get_block_by_hash(block.hash)["state"] == BlockState.CONFIRMED
+    assert dag.get_block_state(block.hash) == BlockState.CONFIRMED
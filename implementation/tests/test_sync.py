@@ -0,0 +1,103 @@
+# tests/test_sync.py
+
+from datetime import datetime
+from hashlib import sha256
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.methods.bloom import BLOOM_HEADER, BloomFilter
+from app.api.methods.wallets import encode
+from app.api.models import blockchain
+from app.api.models.blockchain import DAG
+from app.api.models.records import BlockRecord
+from app.api.models.sync import SyncRequest
+from app.api.routes import nodes
+
+def new_block(dag, children_hashes=()) -> BlockRecord:
+    return BlockRecord(len(dag.graph), (), 0, children_hashes, datetime.now())
+
+def test_bloom_filter_has_no_false_negatives():
+    hashes = [sha256(str(i).encode()).hexdigest() for i in range(500)]
+    bloom = BloomFilter.from_items(hashes, len(hashes), seed=7)
+
+    decoded = BloomFilter.from_bytes(bloom.to_bytes())
+
+    assert all(block_hash in decoded for block_hash in hashes)
+    assert (decoded.size, decoded.hash_count, decoded.seed) == (bloom.size, bloom.hash_count, bloom.seed)
+
+@pytest.mark.parametrize("data", [
+    b"",
+    BLOOM_HEADER.pack(64, 3, 0),
+    BLOOM_HEADER.pack(64, 3, 0) + bytes(9),
+    # The header claims 512 MB: rejected before anything that size is allocated
+    BLOOM_HEADER.pack(2 ** 32 - 1, 3, 0) + bytes(8),
+])
+def test_bloom_filter_size_must_match_its_header(data):
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(data)
+
+def test_bloom_filter_larger_than_the_limit_is_rejected():
+    data = BloomFilter(1024, 3).to_bytes()
+
+    assert BloomFilter.from_bytes(data, 1024).size == 1024
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(data, 1023)
+
+@pytest.fixture
+def dag(open_dag, serve):
+    dag = open_dag()
+    serve(dag, nodes)
+    return dag
+
+def test_missing_blocks_are_listed_in_topological_order(dag):
+    first = new_block(dag)
+    nodes.engine.execute(DAG.add_block, first)
+    second = new_block(dag, [first.hash])
+    nodes.engine.execute(DAG.add_block, second)
+    third = new_block(dag, [second.hash])
+    nodes.engine.execute(DAG.add_block, third)
+
+    bloom = BloomFilter.from_items([first.hash], 10)
+    response = nodes.get_missing_blocks(None, SyncRequest(tips=[], bloom=encode(bloom.to_bytes())))
+
+    assert response.data == {"missing": [second.hash, third.hash], "tips": list(dag.tips.degrees)}
+
+@pytest.mark.parametrize("bloom", [
+    encode(BLOOM_HEADER.pack(2 ** 32 - 1, 3, 0)),
+    encode(BloomFilter(1024 * 8 + 8, 1).to_bytes()),
+    "not base64!",
+])
+def test_invalid_bloom_filters_are_refused(dag, monkeypatch, bloom):
+    monkeypatch.setattr(nodes, "SYNC_BLOOM_MAX_KB", 1)
+    with pytest.raises(HTTPException) as error:
+        nodes.get_missing_blocks(None, SyncRequest(tips=[], bloom=bloom))
+
+    assert error.value.status_code == 400
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    enqueued = []
+
+    class Outbox:
+        def enqueue(self, peer, path, payload):
+            enqueued.append((peer, path, BlockRecord.from_bytes(payload).hash))
+
+    monkeypatch.setattr(blockchain, "outbox", Outbox())
+    return enqueued
+
+def test_synced_blocks_are_not_relayed(open_dag, enqueued):
+    dag = open_dag(minimal_degree=1)
+    dag.neighbors = ["http://neighbor/"]
+    first = new_block(dag)
+    dag.add_synced_block(first)
+    second = new_block(dag, [first.hash])
+    assert dag.add_synced_block(second)
+
+    assert dag.get_block_state(first.hash) == blockchain.BlockState.APPLIED
+    assert enqueued == []
+
+    # Blocks received one by one are still shared once confirmed
+    assert dag.add_block(new_block(dag, [second.hash]))
+    assert enqueued == [("http://neighbor/", "nodes/block/", second.hash)]
@@ -0,0 +1,51 @@
+# tests/test_tips.py
+
+from app.api.methods.ingestion import verify_and_admit
+from app.api.models.tips import TipIndex
+
+def build_tips(*block_hashes) -> TipIndex:
+    tips = TipIndex()
+    for block_hash in block_hashes:
+        tips.add(block_hash)
+    return tips
+
+def test_tips_leave_the_index_at_the_minimal_degree():
+    tips = build_tips("a", "b")
+
+    assert tips.increment("a", 2) == 1
+    assert "a" in tips
+    assert tips.increment("a", 2) == 2
+    assert "a" not in tips
+    # Later references to a confirmed block are ignored
+    assert tips.increment("a", 2) == 2
+    assert list(tips.degrees) == ["b"]
+
+def test_oldest_policy_selects_by_age():
+    tips = build_tips("a", "b", "c")
+    tips.increment("a", 3)
+
+    assert tips.select(2, TipIndex.OLDEST) == ["a", "b"]
+    assert tips.select(10, TipIndex.OLDEST) == ["a", "b", "c"]
+
+def test_least_confirmed_policy_selects_by_degree_then_age():
+    tips = build_tips("a", "b", "c", "d")
+    tips.increment("a", 3)
+    tips.increment("c", 3)
+    tips.increment("c", 3)
+
+    assert tips.select(3, TipIndex.LEAST_CONFIRMED) == ["b", "d", "a"]
+    assert tips.buckets == {0: {"b": None, "d": None}, 1: {"a": None}, 2: {"c": None}}
+
+def test_created_blocks_reference_the_selected_tips(open_dag, genesis, new_wallet, make_transaction):
+    dag = open_dag(block_mb_size_limit=0, tip_selection_limit=2)
+    recipient = new_wallet()
+
+    assert verify_and_admit([make_transaction(genesis, recipient, 1, 1)], dag.admit_transactions) == [None]
+    assert verify_and_admit([make_transaction(genesis, recipient, 1, 2)], dag.admit_transactions) == [None]
+    assert verify_and_admit([make_transaction(genesis, recipient, 1, 3)], dag.admit_transactions) == [None]
+
+    first, second, third = (block for _, block, _ in dag.iter_blocks())
+    assert first.children_hashes == ()
+    assert second.children_hashes == (first.hash,)
+    assert third.children_hashes == (first.hash, second.hash)
+    assert list(dag.tips.degrees) == [first.hash, second.hash, third.hash]
@@ -0,0 +1,48 @@
+# tests/test_transaction_routes.py
+
+import asyncio
+import json
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.models.transaction import TransactionCreate
+from app.api.routes import nodes, transactions
+
+class JSONRequest:
+    """
+    Stand-in for a request with a JSON body.
+    """
+    def __init__(self, body):
+        self.headers = {"content-type": "application/json"}
+        self._body = json.dumps(body).encode()
+
+    async def body(self) -> bytes:
+        return self._body
+
+@pytest.fixture
+def malformed(genesis):
+    # A signature that is not Base64 passes the model fields but can not be encoded
+    return {"sender": genesis.public_key, "recipient": genesis.public_key, "amount": 1, "nonce": 1, "signature": "not base64!"}
+
+def test_posted_transactions_that_can_not_be_encoded_are_refused(malformed):
+    with pytest.raises(HTTPException) as error:
+        transactions.post_transaction(TransactionCreate(**malformed), None)
+
+    assert error.value.status_code == 400
+
+def test_neighbor_transactions_that_can_not_be_encoded_are_refused(malformed):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(nodes.read_transaction_batch(JSONRequest([{**malformed, "timestamp": "2024-01-01T00:00:00"}])))
+
+    assert error.value.status_code == 422
+
+@pytest.mark.parametrize("offset, limit", [(-1, None), (0, -1)])
+def test_negative_pages_are_refused(open_dag, serve, offset, limit):
+    serve(open_dag(), transactions)
+
+    assert transactions.get_unconfirmed_transactions(None, 0, 10).data == []
+    with pytest.raises(HTTPException) as error:
+        transactions.get_unconfirmed_transactions(None, offset, limit)
+    assert error.value.status_code == 400
@@ -0,0 +1,48 @@
+# tests/test_wallet_queries.py
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.models.blockchain import DAG
+from app.api.models.wallet import PublicKey, WalletsQuery
+from app.api.routes import wallets
+
+@pytest.fixture
+def engine(open_dag, serve):
+    dag = open_dag(block_mb_size_limit=1)
+    return serve(dag, wallets)
+
+def test_bulk_queries_key_the_values_as_requested(engine, genesis, new_wallet):
+    unknown = new_wallet()
+    query = WalletsQuery(public_keys=[genesis.public_key, unknown.public_key], addresses=[genesis.address])
+
+    balances = wallets.get_wallets_balances(query, None).data
+    nonces = wallets.get_wallets_nonces(query, None).data
+
+    assert balances["wallets"] == {genesis.public_key: 1000.0, unknown.public_key: 0, genesis.address: 1000.0}
+    assert nonces["wallets"] == {genesis.public_key: 0, unknown.public_key: 0, genesis.address: 0}
+    assert balances["epoch"] == engine.snapshot.epoch
+
+def test_bulk_queries_read_one_version(engine, genesis, new_wallet, make_transaction):
+    recipient = new_wallet()
+    engine.execute(DAG.admit_transactions, [make_transaction(genesis, recipient, 1, 1)])
+
+    data = wallets.get_wallets_nonces(WalletsQuery(public_keys=[genesis.public_key, recipient.public_key]), None).data
+
+    assert data["version"] == engine.snapshot.version
+    assert data["wallets"] == {genesis.public_key: 1, recipient.public_key: 0}
+    assert wallets.get_wallet_nonce(PublicKey(public_key=genesis.public_key), None).data == 1
+
+def test_bulk_queries_are_limited(engine, monkeypatch, genesis):
+    monkeypatch.setattr(wallets, "WALLETS_BULK_LIMIT", 2)
+
+    assert len(wallets.get_wallets_balances(WalletsQuery(addresses=[genesis.address] * 2), None).data["wallets"]) == 1
+    with pytest.raises(HTTPException) as error:
+        wallets.get_wallets_balances(WalletsQuery(addresses=[genesis.address] * 3), None)
+    assert error.value.status_code == 400
+
+def test_unknown_identifiers_are_answered_as_empty_wallets(engine):
+    data = wallets.get_wallets_balances(WalletsQuery(public_keys=["not a key"], addresses=["00" * 32]), None).data
+
+    assert data["wallets"] == {"not a key": 0, "00" * 32: 0}
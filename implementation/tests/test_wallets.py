@@ -0,0 +1,90 @@
+# tests/test_wallets.py
+
+import pytest
+
+from app.api.methods import wallets
+from app.api.methods.wallets import sign_transaction, verify_signatures
+
+@pytest.fixture
+def signed(genesis):
+    """
+    Factory of (message, signature, public key) items signed by the genesis wallet.
+    """
+    def factory(text: str):
+        return (text.encode(), sign_transaction(text, genesis.secret_key), genesis.public_key)
+    return factory
+
+def test_signatures_are_verified(signed, new_wallet):
+    message, signature, public_key = signed("transfer 1")
+
+    assert verify_signatures([(message, signature, public_key)]) == [True]
+    assert verify_signatures([(b"transfer 2", signature, public_key)]) == [False]
+    assert verify_signatures([(message, signature, new_wallet().public_key)]) == [False]
+
+def test_raw_and_base64_signatures_are_equivalent(signed):
+    message, signature, public_key = signed("transfer 3")
+
+    assert verify_signatures([(message, wallets.decode(signature), public_key)]) == [True]
+
+def test_malformed_signatures_and_keys_are_invalid(signed):
+    message, signature, public_key = signed("transfer 4")
+
+    assert verify_signatures([(message, "not base64!", public_key), (message, signature, "not a key!")]) == [False, False]
+
+def test_keys_of_the_wrong_length_only_fail_their_own_item(signed):
+    items = [signed(f"transfer {i}") for i in range(3)]
+    message, signature, _ = items[1]
+    # Valid Base64, but not a Dilithium2 public key
+    items[1] = (message, signature, wallets.encode(b"short key"))
+
+    assert verify_signatures(items) == [True, False, True]
+
+def test_results_are_cached(signed, monkeypatch):
+    valid = signed("transfer 5")
+    invalid = (b"transfer 6", valid[1], valid[2])
+    assert verify_signatures([valid, invalid]) == [True, False]
+
+    def fail(items):
+        raise AssertionError("Cached signatures must not be verified again.")
+    monkeypatch.setattr(wallets, "_verify_chunk", fail)
+
+    assert verify_signatures([invalid, valid]) == [False, True]
+
+def test_verifier_contexts_are_reused(signed):
+    verify_signatures([signed("transfer 7")])
+    with wallets._verifier() as first:
+        pass
+    with wallets._verifier() as second:
+        pass
+
+    assert first is second
+
+def test_cache_is_bounded():
+    cache = wallets.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+def test_large_batches_are_verified_by_the_worker_processes(signed, monkeypatch):
+    monkeypatch.setattr(wallets, "SIGNATURE_WORKERS", 2)
+    monkeypatch.setattr(wallets, "SIGNATURE_BATCH_THRESHOLD", 4)
+    items = [signed(f"batch transfer {i}") for i in range(8)]
+    items[3] = (b"tampered", items[3][1], items[3][2])
+    try:
+        pool = wallets.start_process_pool()
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert verify_signatures(items) == [index != 3 for index in range(8)]
+    finally:
+        wallets.shutdown_process_pool()
+
+def test_duplicated_items_are_verified_once(signed, monkeypatch):
+    item = signed("transfer 8")
+    verified = []
+    verify_chunk = wallets._verify_chunk
+    monkeypatch.setattr(wallets, "_verify_chunk", lambda items: verified.extend(items) or verify_chunk(items))
+
+    assert verify_signatures([item, item, item]) == [True, True, True]
+    assert len(verified) == 1
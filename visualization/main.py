@@ -1,18 +1,19 @@
+import json
 import requests
 import networkx as nx
 import matplotlib.pyplot as plt
 
 def fetch_dag():
-    response = requests.get('http://localhost:8000/api/v1/blockchain_investigation/dag/')
-    data = response.json()
-    return data['data']
+    # The export streams one block per line, in topological order
+    response = requests.get('http://localhost:8000/api/v1/blockchain_investigation/dag/export/', stream=True)
+    return [json.loads(line) for line in response.iter_lines() if line]
 
 def plot_dag(dag_data):
     G = nx.DiGraph()
-    for node in dag_data['nodes']:
-        G.add_node(node['id'], label=node['block']['index'])
-    for link in dag_data['links']:
-        G.add_edge(link['source'], link['target'])
+    for record in dag_data:
+        G.add_node(record['hash'], label=record['block']['index'])
+        for child_hash in record['block']['children_hashes']:
+            G.add_edge(child_hash, record['hash'])
 
     pos = nx.spring_layout(G)  # Layout for visualizing the DAG
     nx.draw(G, pos, with_labels=True, labels=nx.get_node_attributes(G, 'label'))